@@ -0,0 +1,76 @@
+"""
+Rule-based metric evaluation and impact analysis
+
+The evaluation core (EnhancedMetricEvaluator, compiled plans, config
+registry, ratings and profiling) is imported eagerly and needs only the
+standard library. Batch evaluation, result tables, streaming, wavefront
+scheduling, plan files, decision-tree rendering, Monte Carlo simulation,
+sensitivity analysis, goal seeking, async input providers and the original
+evaluators load on first attribute access, so scoring workers that only
+evaluate never import numpy, graphviz, csv, asyncio, sqlite3 or
+multiprocessing.
+Importing the package does not configure logging.
+"""
+from importlib import import_module
+
+from .config import (ConfigEntry, ConfigRegistry, DependencyIndex, config_fingerprint,
+                     config_registry, get_eval_order)
+from .evaluator import EnhancedMetricEvaluator
+from .expressions import (CONDITION_FUNCTIONS, CONDITION_OPERATORS, Expression, ExpressionCache,
+                          parse_expression, shared_expression_cache)
+from .plan import DEFAULT_MEMO_TYPES, ExecutionPlan, MemoCache, PlanCompiler
+from .profiling import LatencyStats, MetricProfiler
+from .ratings import NA_VALUES, STANDARD_RATING_ORDER, STANDARD_RATING_SCALE, RatingScale, rating_scale
+from .results import EvaluationResult, EvaluationResults
+
+# Public name -> submodule that defines it, imported on first access
+_LAZY_ATTRIBUTES = {
+    "BatchEvaluator": "batch",
+    "CategoricalColumn": "batch",
+    "ResultColumn": "table",
+    "ResultRow": "table",
+    "ResultTable": "table",
+    "StreamingPipeline": "streaming",
+    "DEFAULT_COST_HINTS": "wavefront",
+    "WavefrontScheduler": "wavefront",
+    "PLAN_FILE_MAGIC": "planfile",
+    "PLAN_FORMAT_VERSION": "planfile",
+    "load_or_compile_plan": "planfile",
+    "load_plan": "planfile",
+    "save_plan": "planfile",
+    "DecisionTreeRenderer": "decision_tree",
+    "decision_tree_renderer": "decision_tree",
+    "THRESHOLD_BRANCHES": "rule_usage",
+    "BranchCounters": "rule_usage",
+    "RuleUsageMetricEvaluator": "rule_usage",
+    "MonteCarloDriver": "monte_carlo",
+    "SensitivityAnalyzer": "sensitivity",
+    "GoalSeeker": "goal_seek",
+    "InputProvider": "providers",
+    "SQLiteInputProvider": "providers",
+    "AsyncEntityPipeline": "providers",
+    "MetricEvaluator": "basic",
+    "generate_decision_tree": "basic",
+}
+
+__all__ = [
+    "CONDITION_FUNCTIONS", "CONDITION_OPERATORS", "ConfigEntry", "ConfigRegistry", "DEFAULT_MEMO_TYPES",
+    "DependencyIndex", "EnhancedMetricEvaluator", "EvaluationResult", "EvaluationResults", "ExecutionPlan",
+    "Expression", "ExpressionCache", "LatencyStats", "MemoCache", "MetricProfiler", "NA_VALUES", "PlanCompiler",
+    "RatingScale", "STANDARD_RATING_ORDER", "STANDARD_RATING_SCALE", "config_fingerprint",
+    "config_registry", "get_eval_order", "parse_expression", "rating_scale", "shared_expression_cache",
+    *_LAZY_ATTRIBUTES
+]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | _LAZY_ATTRIBUTES.keys())
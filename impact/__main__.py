@@ -0,0 +1,251 @@
+"""Example usage with enhanced features: python -m impact"""
+import logging
+
+from .evaluator import EnhancedMetricEvaluator
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    # Enhanced rule configuration
+    # Enhanced rule configuration with Excel-like patterns
+    enhanced_config = {
+        "metrics": {
+            # Basic thresholds
+            "G1_Rating": {
+                "type": "threshold",
+                "dependencies": ["G1"],
+                "expression": [10, 20, 30],
+                "labels": ["Low", "Moderate", "High", "Critical"]
+            },
+            "G2_Rating": {
+                "type": "threshold",
+                "dependencies": ["G2"],
+                "expression": [15, 25, 35],
+                "labels": ["Low", "Moderate", "High", "Critical"]
+            },
+            "G3_Rating": {
+                "type": "threshold",
+                "dependencies": ["G3"],
+                "expression": [10, 20, 30]
+            },
+            
+            # Excel-like conditional patterns - Common business logic
+            "Primary_Rating": {
+                "type": "fallback",
+                "dependencies": ["G1_Rating", "G2_Rating"],
+                "expression": {
+                    "na_values": ["N/A", None, ""]
+                }
+            },
+            
+            "Backup_Rating": {
+                "type": "coalesce",
+                "dependencies": ["G1_Rating", "G2_Rating", "G3_Rating"],
+                "expression": {
+                    "default": "Low"
+                }
+            },
+            
+            "Status_Based_Rating": {
+                "type": "if_then_else",
+                "dependencies": ["Status", "G1_Rating", "G2_Rating"],
+                "expression": {
+                    "condition": "Status == 'Active'",
+                    "if_true": "G1_Rating",
+                    "if_false": "G2_Rating"
+                }
+            },
+            
+            "Worst_Case_Rating": {
+                "type": "rating_worst",
+                "dependencies": ["G1_Rating", "G2_Rating", "G3_Rating"]
+            },
+            
+            "Best_Case_Rating": {
+                "type": "rating_best", 
+                "dependencies": ["G1_Rating", "G2_Rating", "G3_Rating"]
+            },
+            
+            "Priority_Rating": {
+                "type": "priority_select",
+                "dependencies": ["High_Priority_Rating", "Medium_Priority_Rating", "Low_Priority_Rating"],
+                "expression": {
+                    "default": "Low"
+                }
+            },
+            
+            "Complex_Logic_Rating": {
+                "type": "conditional_rating",
+                "dependencies": ["Status", "Category", "G1_Rating", "G2_Rating"],
+                "expression": {
+                    "rules": [
+                        {"condition": "Status == 'Critical' and Category == 'A'", "return": "Critical"},
+                        {"condition": "Status == 'Active'", "return": "G1_Rating"},
+                        {"condition": "Category == 'B'", "return": "G2_Rating"}
+                    ],
+                    "default": "Low"
+                }
+            },
+            
+            # Score mappings
+            "G1_Score": {
+                "type": "map_rating",
+                "dependencies": ["G1_Rating"],
+                "expression": {
+                    "Low": 1,
+                    "Moderate": 2,
+                    "High": 3,
+                    "Critical": 4
+                }
+            },
+            "G2_Score": {
+                "type": "map_rating",
+                "dependencies": ["G2_Rating"],
+                "expression": {
+                    "Low": 1,
+                    "Moderate": 2,
+                    "High": 3,
+                    "Critical": 4
+                }
+            },
+            "G3_Score": {
+                "type": "map_rating",
+                "dependencies": ["G3_Rating"],
+                "expression": {
+                    "Low": 1,
+                    "Moderate": 2,
+                    "High": 3,
+                    "Critical": 4
+                }
+            },
+            
+            # Mathematical operations
+            "Average_Score": {
+                "type": "avg",
+                "dependencies": ["G1_Score", "G2_Score", "G3_Score"],
+                "precision": 1
+            },
+            "Weighted_Risk": {
+                "type": "weighted_sum",
+                "dependencies": ["G1_Score", "G2_Score", "G3_Score"],
+                "expression": {
+                    "weights": [0.4, 0.35, 0.25]
+                },
+                "precision": 2
+            },
+            
+            # Final determinations
+            "Risk_Level": {
+                "type": "conditional",
+                "dependencies": ["Weighted_Risk", "G1_Score"],
+                "expression": {
+                    "conditions": [
+                        {"if": "Weighted_Risk >= 3.5", "then": "Critical"},
+                        {"if": "Weighted_Risk >= 2.5", "then": "High"},
+                        {"if": "Weighted_Risk >= 1.5", "then": "Moderate"}
+                    ],
+                    "default": "Low"
+                }
+            },
+            "Final_Score": {
+                "type": "max",
+                "dependencies": ["G1_Score", "G2_Score", "G3_Score"]
+            },
+            "Final_Rating": {
+                "type": "map_score",
+                "dependencies": ["Final_Score"],
+                "expression": {
+                    "1": "Low",
+                    "2": "Moderate", 
+                    "3": "High",
+                    "4": "Critical"
+                }
+            }
+        }
+    }
+    
+    # Sample input with additional fields for testing conditional logic
+    input_values = {
+        "G1": 12,
+        "G2": 35,
+        "G3": 28,
+        "Status": "Active",
+        "Category": "A",
+        "High_Priority_Rating": "N/A",
+        "Medium_Priority_Rating": "High",
+        "Low_Priority_Rating": "Moderate"
+    }
+    
+    # Create enhanced evaluator
+    evaluator = EnhancedMetricEvaluator(
+        enhanced_config["metrics"], 
+        input_values, 
+        debug=True
+    )
+    
+    # Run evaluation
+    print("=" * 60)
+    print("🔍 ENHANCED METRIC EVALUATION")
+    print("=" * 60)
+    
+    result = evaluator.run_evaluation()
+    
+    print(f"\n📊 Final Results:")
+    print("-" * 40)
+    for k, v in result.items():
+        print(f"{k:15}: {v}")
+    
+    print(f"\n🎯 EXCEL-LIKE CONDITIONAL PATTERNS DEMO")
+    print("=" * 60)
+    
+    # Demo the new conditional patterns
+    conditional_results = {
+        "Primary_Rating": result.get("Primary_Rating", "N/A"),
+        "Backup_Rating": result.get("Backup_Rating", "N/A"), 
+        "Status_Based_Rating": result.get("Status_Based_Rating", "N/A"),
+        "Worst_Case_Rating": result.get("Worst_Case_Rating", "N/A"),
+        "Best_Case_Rating": result.get("Best_Case_Rating", "N/A"),
+        "Priority_Rating": result.get("Priority_Rating", "N/A"),
+        "Complex_Logic_Rating": result.get("Complex_Logic_Rating", "N/A")
+    }
+    
+    print("📋 Conditional Logic Results:")
+    print("-" * 40)
+    for pattern, value in conditional_results.items():
+        print(f"{pattern:20}: {value}")
+    
+    print(f"\n📖 Pattern Explanations:")
+    print("-" * 40)
+    print("• Primary_Rating    : G1_Rating if not N/A, else G2_Rating")
+    print("• Backup_Rating     : First non-N/A from G1, G2, G3 ratings")
+    print("• Status_Based      : G1_Rating if Status='Active', else G2_Rating")
+    print("• Worst_Case        : Highest severity among all ratings")
+    print("• Best_Case         : Lowest severity among all ratings")
+    print("• Priority_Rating   : First available from priority order")
+    print("• Complex_Logic     : Multi-condition business rules")
+    
+    impact = evaluator.impact_analysis({"G1": 35, "G2": 45})
+    
+    print(f"Changes Applied: {impact['changes_applied']}")
+    print(f"Affected Metrics: {impact['summary']['affected_count']}")
+    print(f"Unchanged Metrics: {impact['summary']['unchanged_count']}")
+    
+    print(f"\n📈 Affected Metrics:")
+    print("-" * 40)
+    for metric, change in impact["affected_metrics"].items():
+        if change["changed"]:
+            print(f"{metric:15}: {change['old_value']} → {change['new_value']}")
+    
+    # Export results
+    print(f"\n💾 Export Results (JSON):")
+    print("-" * 40)
+    print(evaluator.export_results("json"))
+
+    # Compile once, then score many entities against the same plan
+    plan = evaluator.compile()
+    population = [dict(input_values, G1=g1) for g1 in range(0, 40, 5)]
+    print(f"\n⚡ Compiled Plan ({len(plan.order)} metrics):")
+    print("-" * 40)
+    for row, scored in zip(population, plan.run_many(population)):
+        print(f"G1={row['G1']:<3}: Final_Rating={scored['Final_Rating']}, Risk_Level={scored['Risk_Level']}")
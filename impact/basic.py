@@ -0,0 +1,180 @@
+"""Minimal evaluator for the original five metric types"""
+import logging
+
+from .config import get_eval_order
+
+logger = logging.getLogger(__name__)
+
+
+class MetricEvaluator:
+    def __init__(self, metrics, input_values):
+        self.metrics = metrics
+        self.input_values = input_values
+        self.results = {}
+
+        self.dispatch_map = {
+            "threshold": self.evaluate_threshold,
+            "map_rating": self.evaluate_map_rating,
+            "map_score": self.evaluate_map_score,
+            "max": self.evaluate_max,
+            "custom": self.evaluate_custom
+        }
+
+    def evaluate_metric(self, m_id):
+        metric = self.metrics[m_id]
+        mtype = metric["type"]
+
+        if mtype not in self.dispatch_map:
+            raise ValueError(f"Unknown metric type: {mtype}")
+
+        return self.dispatch_map[mtype](m_id, metric)
+
+    def evaluate_threshold(self, m_id, metric):
+        value = self.input_values[metric["dependencies"][0]]
+        thresholds = metric["expression"]
+        if value < thresholds[0]:
+            return "Low"
+        elif value < thresholds[1]:
+            return "Moderate"
+        elif value < thresholds[2]:
+            return "High"
+        else:
+            return "Critical"
+
+    def evaluate_map_rating(self, m_id, metric):
+        rating = self.results[metric["dependencies"][0]]
+        return metric["expression"].get(rating, 0)
+
+    def evaluate_map_score(self, m_id, metric):
+        score = self.results[metric["dependencies"][0]]
+        return metric["expression"].get(str(score), "NR")
+
+    def evaluate_max(self, m_id, metric):
+        values = [self.results[dep] for dep in metric["dependencies"]]
+        return max(values)
+
+    def evaluate_custom(self, m_id, metric):
+        local_vars = {dep: self.results[dep] if dep in self.results else self.input_values.get(dep) for dep in metric["dependencies"]}
+        func = eval(metric["expression"])
+        return func(**local_vars)
+
+    def run_evaluation(self, eval_order):
+        for m_id in eval_order:
+            self.results[m_id] = self.evaluate_metric(m_id)
+        return self.results
+
+
+def generate_decision_tree(metrics, input_values, results, focus=None, direction="both",
+                           background=False):
+    from .decision_tree import decision_tree_renderer
+    renderer = decision_tree_renderer(metrics, "Decision Tree")
+    output = renderer.render("decision_tree", background=background, results=results,
+                             input_values=input_values, focus=focus, direction=direction)
+    if not background:
+        logger.info("Decision tree written to decision_tree.png")
+    return output
+
+
+# ------------------------
+# Example Usage
+# ------------------------
+if __name__ == "__main__":
+    rule_config = {
+        "metrics": {
+            "G1_Rating": {
+                "type": "threshold",
+                "dependencies": ["G1"],
+                "expression": [10, 20, 30]
+            },
+            "G2_Rating": {
+                "type": "threshold",
+                "dependencies": ["G2"],
+                "expression": [10, 20, 30]
+            },
+            "G3_Rating": {
+                "type": "threshold",
+                "dependencies": ["G3"],
+                "expression": [10, 20, 30]
+            },
+            "G1_Score": {
+                "type": "map_rating",
+                "dependencies": ["G1_Rating"],
+                "expression": {
+                    "Low": 1,
+                    "Moderate": 2,
+                    "High": 3,
+                    "Critical": 4
+                }
+            },
+            "G2_Score": {
+                "type": "map_rating",
+                "dependencies": ["G2_Rating"],
+                "expression": {
+                    "Low": 1,
+                    "Moderate": 2,
+                    "High": 3,
+                    "Critical": 4
+                }
+            },
+            "G3_Score": {
+                "type": "map_rating",
+                "dependencies": ["G3_Rating"],
+                "expression": {
+                    "Low": 1,
+                    "Moderate": 2,
+                    "High": 3,
+                    "Critical": 4
+                }
+            },
+            "G1G2_Score": {
+                "type": "max",
+                "dependencies": ["G1_Score", "G2_Score"]
+            },
+            "G1G2_Rating": {
+                "type": "map_score",
+                "dependencies": ["G1G2_Score"],
+                "expression": {
+                    "1": "Low",
+                    "2": "Moderate",
+                    "3": "High",
+                    "4": "Critical"
+                }
+            },
+            "SpecialRating": {
+                "type": "custom",
+                "dependencies": ["G1_Rating", "G2_Rating"],
+                "expression": "lambda G1_Rating, G2_Rating: 'Critical' if G1_Rating == 'Critical' or G2_Rating == 'Critical' else 'Moderate'"
+            },
+            "Final_Score": {
+                "type": "max",
+                "dependencies": ["G1G2_Score", "G3_Score"]
+            },
+            "Final_Rating": {
+                "type": "map_score",
+                "dependencies": ["Final_Score"],
+                "expression": {
+                    "1": "Low",
+                    "2": "Moderate",
+                    "3": "High",
+                    "4": "Critical"
+                }
+            }
+        }
+    }
+
+    input_values = {
+        "G1": 12,
+        "G2": 35,
+        "G3": 28
+    }
+
+    evaluator = MetricEvaluator(rule_config["metrics"], input_values)
+    order = get_eval_order(rule_config["metrics"])
+    print("Evaluation Order:", order)
+    result = evaluator.run_evaluation(order)
+
+    print("\n🔍 Final Evaluation Result:")
+    for k in result:
+        print(f"{k}: {result[k]}")
+
+    generate_decision_tree(rule_config["metrics"], input_values, result)
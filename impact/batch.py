@@ -0,0 +1,535 @@
+"""Columnar batch evaluation over NumPy arrays"""
+import math
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from .expressions import CONDITION_FUNCTIONS, CONDITION_OPERATORS, Expression
+from .plan import ExecutionPlan, _MISSING
+from .ratings import NA_VALUES, RatingScale, STANDARD_RATING_SCALE, rating_scale
+
+
+def _import_numpy():
+    """numpy is only needed for batch evaluation, so import it on first use"""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Batch evaluation requires numpy (pip install numpy)") from e
+    return numpy
+
+
+class CategoricalColumn:
+    """Column stored as integer codes into a list of distinct values"""
+
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, codes, categories: List[Any]):
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class BatchEvaluator:
+    """
+    Column-at-a-time evaluation of an ExecutionPlan over NumPy arrays
+
+    Rating-like values travel between metrics as CategoricalColumn codes and
+    are decoded only on output. Built-in numeric and mapping types run as
+    array operations, and so do custom expressions and conditions that read
+    a dense column. Anything else (or an expression that raises for some
+    row) falls back to the plan's row closure, called once per distinct
+    combination of its inputs rather than once per row. Results match
+    row-wise evaluation, with custom expressions assumed to be pure.
+    """
+
+    def __init__(self, evaluator: "EnhancedMetricEvaluator", plan: ExecutionPlan):
+        self.np = _import_numpy()
+        self.evaluator = evaluator
+        self.plan = plan
+        self._slots: List[Any] = []
+
+        self.vector_map = {
+            "threshold": self.batch_threshold,
+            "map_rating": self.batch_map_rating,
+            "map_score": self.batch_map_score,
+            "lookup": self.batch_lookup,
+            "max": self.batch_max,
+            "min": self.batch_min,
+            "avg": self.batch_avg,
+            "sum": self.batch_sum,
+            "weighted_sum": self.batch_weighted_sum,
+            "percentage": self.batch_percentage,
+            "worst_of": self.batch_worst_of,
+            "best_of": self.batch_best_of,
+            "rating_worst": self.batch_rating_worst,
+            "rating_best": self.batch_rating_best,
+            "custom": self.batch_custom,
+            "conditional": self.batch_conditional,
+            "if_then_else": self.batch_if_then_else,
+            "conditional_rating": self.batch_conditional_rating
+        }
+
+    def run(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate every metric in the plan; returns one array per metric"""
+        np = self.np
+        plan = self.plan
+        size = None
+        for name, column in columns.items():
+            if size is None:
+                size = len(column)
+            elif len(column) != size:
+                raise ValueError(f"Column '{name}' has {len(column)} rows, expected {size}")
+        if size is None:
+            raise ValueError("Batch evaluation needs at least one input column")
+
+        slots: List[Any] = [None] * len(plan.order)
+        self._slots = slots
+        for name, required in plan.input_spec:
+            if name in columns:
+                slots.append(self._as_column(columns[name]))
+            elif required:
+                raise ValueError(f"Dependency '{name}' not found in results or inputs")
+            else:
+                slots.append(CategoricalColumn(np.zeros(size, dtype=np.intp), [_MISSING]))
+
+        metrics = self.evaluator.metrics
+        for i, (slot, evaluate) in enumerate(plan.steps):
+            m_id = plan.order[i]
+            metric = metrics[m_id]
+            dep_columns = [slots[s] for s in plan.dependency_slots[i]]
+            vectorized = self.vector_map.get(metric["type"])
+            column = vectorized(m_id, metric, dep_columns) if vectorized else None
+            if column is None:
+                column = self._rowwise(evaluate, plan.read_slots[i], slots, size)
+            slots[slot] = column
+
+        return {m_id: self._decode(slots[slot]) for slot, m_id in enumerate(plan.order)}
+
+    # -----------------------------------------------------------------
+    # Column helpers
+    # -----------------------------------------------------------------
+
+    def _from_values(self, values: List[Any]):
+        """Typed array when every value is a plain int or float, else object"""
+        np = self.np
+        if values and all(type(v) is int for v in values):
+            try:
+                return np.array(values, dtype=np.int64)
+            except OverflowError:
+                pass
+        elif values and all(type(v) is float for v in values):
+            return np.array(values, dtype=np.float64)
+        column = np.empty(len(values), dtype=object)
+        for i, value in enumerate(values):
+            column[i] = value
+        return column
+
+    def _as_column(self, data):
+        """Input data as an array whose elements match the row-wise values"""
+        np = self.np
+        if isinstance(data, np.ndarray):
+            if data.dtype.kind in "US":
+                return data.astype(object)
+            return data
+        return self._from_values(list(data))
+
+    def _decode(self, column):
+        if isinstance(column, CategoricalColumn):
+            return self._from_values(column.categories)[column.codes]
+        return column
+
+    def _numeric(self, column):
+        """Dense int/float array for the column, or None"""
+        if isinstance(column, CategoricalColumn):
+            column = self._decode(column)
+        if column.dtype.kind in "if":
+            return column
+        return None
+
+    def _categorical(self, column) -> Optional[CategoricalColumn]:
+        """Factorize the column into codes, or None if values are unhashable"""
+        np = self.np
+        if isinstance(column, CategoricalColumn):
+            return column
+        if column.dtype.kind != "O":
+            return self._distinct(column)
+
+        index: Dict[Tuple[Any, ...], int] = {}
+        categories: List[Any] = []
+        codes = np.empty(len(column), dtype=np.intp)
+        try:
+            for i, value in enumerate(column.tolist()):
+                # Keyed with the type so 1, 1.0 and True stay distinct, and
+                # with the sign of floats so 0.0 and -0.0 do
+                key = (type(value), value)
+                if type(value) is float:
+                    key += (math.copysign(1, value),)
+                code = index.get(key)
+                if code is None:
+                    code = index[key] = len(categories)
+                    categories.append(value)
+                codes[i] = code
+        except TypeError:
+            return None
+        return CategoricalColumn(codes, categories)
+
+    def _distinct(self, column) -> CategoricalColumn:
+        """Factorize a typed array; 0.0 and -0.0 get separate categories"""
+        np = self.np
+        categories, codes = np.unique(column, return_inverse=True)
+        codes = codes.reshape(-1)
+        categories = categories.tolist()
+        if column.dtype.kind == "f":
+            # np.unique treats -0.0 as 0.0 and keeps either one
+            negative_zero = (column == 0) & np.signbit(column)
+            if negative_zero.any():
+                zero = int(codes[negative_zero][0])
+                categories[zero] = 0.0
+                codes = np.where(negative_zero, len(categories), codes)
+                categories.append(-0.0)
+        return CategoricalColumn(codes, categories)
+
+    def _round(self, column, precision):
+        """Python round() per distinct value, so results match row-wise exactly"""
+        distinct = self._distinct(column)
+        rounded = [round(v, precision) for v in distinct.categories]
+        return self._from_values(rounded)[distinct.codes]
+
+    def _map_categories(self, column, mapper: Callable[[Any], Any]):
+        categorical = self._categorical(column)
+        if categorical is None:
+            return None
+        try:
+            categories = [mapper(value) for value in categorical.categories]
+        except TypeError:
+            return None
+        return CategoricalColumn(categorical.codes, categories)
+
+    def _rowwise(self, evaluate: Callable[[List[Any]], Any], read_slots: Tuple[int, ...],
+                 slots: List[Any], size: int):
+        """Run a row closure once per distinct combination of the slots it reads"""
+        np = self.np
+        values: List[Any] = [None] * len(slots)
+        categoricals = [self._categorical(slots[s]) for s in read_slots]
+
+        if any(c is None for c in categoricals):
+            # Unhashable inputs: evaluate every row
+            dense = [self._decode(slots[s]).tolist() for s in read_slots]
+            results = []
+            for row in range(size):
+                for s, column in zip(read_slots, dense):
+                    values[s] = column[row]
+                results.append(evaluate(values))
+            return self._from_values(results)
+
+        key = np.zeros(size, dtype=np.int64)
+        cardinality = 1
+        for categorical in categoricals:
+            width = max(len(categorical.categories), 1)
+            if cardinality * width >= 2 ** 62:
+                distinct, key = np.unique(key, return_inverse=True)
+                key = key.reshape(-1).astype(np.int64)
+                cardinality = len(distinct)
+            key = key * width + categorical.codes
+            cardinality *= width
+
+        distinct, first_rows, inverse = np.unique(key, return_index=True, return_inverse=True)
+        results = []
+        for row in first_rows.tolist():
+            for s, categorical in zip(read_slots, categoricals):
+                values[s] = categorical.categories[categorical.codes[row]]
+            results.append(evaluate(values))
+        return CategoricalColumn(inverse.reshape(-1), results)
+
+    # -----------------------------------------------------------------
+    # Vectorized metric types (return None to fall back to row closures)
+    # -----------------------------------------------------------------
+
+    def batch_threshold(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        np = self.np
+        thresholds = metric["expression"]
+        labels = list(metric.get("labels", ["Low", "Moderate", "High", "Critical"]))
+        values = self._numeric(columns[0])
+        if values is None or not all(type(t) in (int, float) for t in thresholds):
+            return None
+        if any(b < a for a, b in zip(thresholds, thresholds[1:])):
+            return None
+
+        if len(thresholds) == 3:
+            if len(labels) < 4:
+                return None
+            table = labels[:4]
+        else:
+            table = [labels[i] if i < len(labels) else f"Level_{i}" for i in range(len(thresholds))]
+            table.append(labels[-1] if labels else f"Level_{len(thresholds)}")
+
+        # First threshold the value is below == number of thresholds <= value
+        codes = np.searchsorted(np.asarray(thresholds), values, side="right")
+        return CategoricalColumn(codes, table)
+
+    def batch_map_rating(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        mapping = metric["expression"]
+        default_value = metric.get("default", 0)
+        return self._map_categories(columns[0], lambda rating: mapping.get(rating, default_value))
+
+    def batch_map_score(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        mapping = metric["expression"]
+        default_value = metric.get("default", "NR")
+        return self._map_categories(columns[0], lambda score: mapping.get(str(score), default_value))
+
+    def batch_lookup(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        table = metric["expression"]["table"]
+        default_value = metric.get("default", None)
+        return self._map_categories(columns[0], lambda key: table.get(str(key), default_value))
+
+    def _batch_ranked(self, columns: List[Any], scale: RatingScale, exclude_na: bool, worst: bool):
+        np = self.np
+        categoricals = [self._categorical(column) for column in columns]
+        if not categoricals or any(c is None for c in categoricals):
+            return None
+
+        # Per dependency and row: scale code, -1 when off the scale, -2 when excluded as N/A
+        ordinals = []
+        for categorical in categoricals:
+            table = []
+            for value in categorical.categories:
+                if exclude_na and value in NA_VALUES:
+                    table.append(-2)
+                else:
+                    code = scale.encode(value)
+                    table.append(-1 if code is None else code)
+            ordinals.append(np.asarray(table, dtype=np.intp)[categorical.codes])
+        stacked = np.stack(ordinals)
+
+        on_scale = stacked >= 0
+        if worst:
+            picked = stacked.max(axis=0)
+        else:
+            picked = np.where(on_scale, stacked, len(scale.labels)).min(axis=0)
+        hit = on_scale.any(axis=0)
+
+        # The first dependency holding the picked code supplies the value, as
+        # row-wise; with no rating on the scale, the first remaining candidate
+        # (code -1) is returned as is, and with no candidate at all "N/A"
+        matches = stacked == np.where(hit, picked, -1)
+        found = matches.any(axis=0)
+        first = matches.argmax(axis=0)
+        categories: List[Any] = ["N/A"]
+        codes = np.zeros(len(first), dtype=np.intp)
+        for j, categorical in enumerate(categoricals):
+            rows = found & (first == j)
+            if rows.any():
+                codes = np.where(rows, categorical.codes + len(categories), codes)
+                categories.extend(categorical.categories)
+        return CategoricalColumn(codes, categories)
+
+    def batch_worst_of(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        return self._batch_ranked(columns, rating_scale(metric["expression"]["rating_order"]),
+                                  metric.get("expression", {}).get("exclude_na", True), worst=True)
+
+    def batch_best_of(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        return self._batch_ranked(columns, rating_scale(metric["expression"]["rating_order"]),
+                                  metric.get("expression", {}).get("exclude_na", True), worst=False)
+
+    def batch_rating_worst(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        return self._batch_ranked(columns, STANDARD_RATING_SCALE, True, worst=True)
+
+    def batch_rating_best(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        return self._batch_ranked(columns, STANDARD_RATING_SCALE, True, worst=False)
+
+    def _all_numeric(self, columns: List[Any]) -> Optional[List[Any]]:
+        arrays = [self._numeric(column) for column in columns]
+        if not arrays or any(a is None for a in arrays):
+            return None
+        return arrays
+
+    def _batch_extreme(self, columns: List[Any], reduce):
+        np = self.np
+        arrays = self._all_numeric(columns)
+        if arrays is None or len({a.dtype.kind for a in arrays}) != 1:
+            return None
+        # max()/min() keep the first of equal values and the first NaN they
+        # meet; numpy propagates any NaN and may pick either signed zero
+        if arrays[0].dtype.kind == "f" and any((np.isnan(a) | (a == 0)).any() for a in arrays):
+            return None
+        return reduce.reduce(arrays)
+
+    def batch_max(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        return self._batch_extreme(columns, self.np.maximum)
+
+    def batch_min(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        return self._batch_extreme(columns, self.np.minimum)
+
+    @staticmethod
+    def _int_bound(arrays: List[Any], weights: Optional[List[Any]] = None) -> int:
+        """Largest magnitude any partial sum of the int columns (times int weights) can reach"""
+        bound = 0
+        for array, weight in zip(arrays, weights if weights is not None else [1] * len(arrays)):
+            if array.dtype.kind == "i" and array.size and type(weight) is int:
+                bound += max(int(array.max()), -int(array.min())) * abs(weight)
+        return bound
+
+    def _running_sum(self, arrays: List[Any]):
+        # Left to right from 0, like sum() over the dependency list (so -0.0 sums to 0.0)
+        total = 0 + arrays[0]
+        for array in arrays[1:]:
+            total = total + array
+        return total
+
+    def batch_sum(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        arrays = self._all_numeric(columns)
+        # Python ints do not overflow; int64 would wrap silently
+        if arrays is None or self._int_bound(arrays) >= 2 ** 63:
+            return None
+        return self._running_sum(arrays)
+
+    def batch_avg(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        arrays = self._all_numeric(columns)
+        # int / int is correctly rounded in Python; numpy converts the sum to
+        # float first, which is only exact below 2**53
+        if arrays is None or self._int_bound(arrays) >= 2 ** 53:
+            return None
+        return self._round(self._running_sum(arrays) / len(arrays), metric.get("precision", 2))
+
+    def batch_weighted_sum(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        weights = metric["expression"]["weights"]
+        arrays = self._all_numeric(columns)
+        if arrays is None or not all(type(w) in (int, float) for w in weights):
+            return None
+        if self._int_bound(arrays, weights) >= 2 ** 63:
+            return None
+        total = self._running_sum([array * weight for array, weight in zip(arrays, weights)])
+        return self._round(total, metric.get("precision", 2))
+
+    def batch_percentage(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        np = self.np
+        arrays = self._all_numeric(columns[:2])
+        if arrays is None:
+            return None
+        numerator, denominator = arrays
+        zero = denominator == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentage = (numerator / np.where(zero, 1, denominator)) * 100
+        rounded = self._round(percentage, metric.get("precision", 1))
+        if not zero.any():
+            return rounded
+        # Zero denominators give the int 0, exactly as the row evaluator does
+        values = rounded.tolist()
+        for row in np.flatnonzero(zero).tolist():
+            values[row] = 0
+        return self._from_values(values)
+
+    def _expression_values(self, expression: Expression, dependencies: List[str], columns: List[Any],
+                           functions: Dict[str, Any], operators: Dict[str, Any], condition: bool = False):
+        """Array result of an expression over the dependency columns, or None"""
+        np = self.np
+        if all(isinstance(column, CategoricalColumn) for column in columns):
+            # Few distinct inputs: the row closure over distinct combinations is cheaper
+            return None
+        evaluate = expression.vectorize({dep: i for i, dep in enumerate(dependencies)},
+                                        functions, operators, np, condition)
+        dense = [self._decode(column) for column in columns]
+        try:
+            with np.errstate(all="raise"):
+                return evaluate(dense)
+        except Exception:
+            # Some row errors or needs short-circuiting: row closures handle it exactly
+            return None
+
+    def _conditions(self, sources: List[str], dependencies: List[str], columns: List[Any]):
+        """Truth column (or constant) per condition, or None to fall back"""
+        cache = self.evaluator.expression_cache
+        tests = []
+        for source in sources:
+            truth = self._expression_values(cache.parse(source), dependencies, columns,
+                                            CONDITION_FUNCTIONS, CONDITION_OPERATORS, condition=True)
+            if truth is None:
+                return None
+            tests.append(truth)
+        return tests
+
+    def _reference(self, m_id: str, name: Any) -> Tuple[Any, Any]:
+        """(column, None) or (None, literal) for a literal-or-name value, as PlanCompiler.reference resolves it"""
+        plan = self.plan
+        try:
+            slot = plan.metric_slots.get(name)
+        except TypeError:
+            return None, name
+        if slot is None or slot >= plan.metric_slots[m_id]:
+            # Not an earlier metric: an optional input, else the literal itself
+            slot = plan.input_slots[name]
+            column = self._slots[slot]
+            if isinstance(column, CategoricalColumn) and column.categories == [_MISSING]:
+                return None, name
+        return self._slots[slot], None
+
+    def _select(self, tests: List[Any], candidates: List[Tuple[Any, Any]], size: int):
+        """
+        Per row, the candidate after the first true test, or the last
+        candidate when none is true; candidates are (column, literal) pairs
+        """
+        np = self.np
+        choice = np.full(size, len(tests), dtype=np.intp)
+        for k in reversed(range(len(tests))):
+            choice = np.where(tests[k], k, choice)
+
+        codes = np.zeros(size, dtype=np.intp)
+        categories: List[Any] = []
+        for k, (column, literal) in enumerate(candidates):
+            rows = choice == k
+            if not rows.any():
+                continue
+            if column is None:
+                codes[rows] = len(categories)
+                categories.append(literal)
+                continue
+            categorical = self._categorical(column)
+            if categorical is None:
+                return None
+            codes[rows] = categorical.codes[rows] + len(categories)
+            categories.extend(categorical.categories)
+
+        # Keep only the values some row returns, so decoding types the column as row-wise would
+        used, codes = np.unique(codes, return_inverse=True)
+        return CategoricalColumn(codes.reshape(-1), [categories[i] for i in used.tolist()])
+
+    def batch_custom(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        np = self.np
+        expression = metric["expression"]
+        cache = self.evaluator.expression_cache
+        parsed = cache.parse_lambda(expression) if isinstance(expression, str) else cache.parse(str(expression))
+        namespace = self.evaluator.custom_namespace
+        values = self._expression_values(parsed, metric["dependencies"], columns, namespace, namespace)
+        if values is None:
+            return None
+        if not isinstance(values, np.ndarray):
+            return self._from_values([values] * len(columns[0]))
+        if values.dtype.kind in "if":
+            return values
+        return self._from_values(values.tolist())
+
+    def batch_conditional(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        conditions = metric["expression"]["conditions"]
+        tests = self._conditions([condition["if"] for condition in conditions], metric["dependencies"], columns)
+        if tests is None:
+            return None
+        candidates = [(None, condition["then"]) for condition in conditions]
+        candidates.append((None, metric["expression"].get("default", None)))
+        return self._select(tests, candidates, len(columns[0]))
+
+    def batch_if_then_else(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        expression = metric["expression"]
+        tests = self._conditions([expression["condition"]], metric["dependencies"], columns)
+        if tests is None:
+            return None
+        candidates = [self._reference(m_id, expression["if_true"]), self._reference(m_id, expression["if_false"])]
+        return self._select(tests, candidates, len(columns[0]))
+
+    def batch_conditional_rating(self, m_id: str, metric: Dict[str, Any], columns: List[Any]):
+        rules = metric["expression"]["rules"]
+        tests = self._conditions([rule["condition"] for rule in rules], metric["dependencies"], columns)
+        if tests is None:
+            return None
+        candidates = [self._reference(m_id, rule["return"]) for rule in rules]
+        candidates.append((None, metric["expression"].get("default", "N/A")))
+        return self._select(tests, candidates, len(columns[0]))
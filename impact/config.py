@@ -0,0 +1,518 @@
+"""Config fingerprints, dependency closures, evaluation order and the config registry"""
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict, defaultdict, deque
+from typing import Dict, Any, List, Optional, Callable, Iterable, Iterator, Tuple
+
+from .expressions import CONDITION_FUNCTIONS, CONDITION_OPERATORS, ExpressionCache
+
+
+def config_fingerprint(metrics: Dict[str, Any]) -> str:
+    """
+    Stable content hash of a metrics configuration
+
+    Key order is kept, since it decides the evaluation order among
+    independent metrics, and so is every key's and value's type: {1: 10}
+    and {"1": 10}, or a tuple and a list, hash differently. Equal configs
+    get the same hash across processes.
+    """
+    payload = json.dumps(_canonical(metrics), separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _canonical(value: Any) -> list:
+    """JSON-safe encoding of value that tags every node with its type"""
+    kind = type(value)
+    if isinstance(value, dict):
+        return [kind.__name__, [[_canonical(key), _canonical(item)] for key, item in value.items()]]
+    if isinstance(value, (list, tuple)):
+        return [kind.__name__, [_canonical(item) for item in value]]
+    if kind in (str, int, bool, type(None)):
+        return [kind.__name__, value]
+    # float repr keeps -0.0, nan and inf apart
+    return [f"{kind.__module__}.{kind.__qualname__}", repr(value)]
+
+
+def _identical(first: Any, second: Any) -> bool:
+    """
+    Equal, with the same type at every key and value and float zeros of the
+    same sign, so True, 1 and 1.0 differ
+    """
+    if first is second:
+        return True
+    if type(first) is not type(second):
+        return False
+    if isinstance(first, dict):
+        return (len(first) == len(second)
+                and all(_identical(k1, k2) and _identical(v1, v2)
+                        for (k1, v1), (k2, v2) in zip(first.items(), second.items())))
+    if isinstance(first, (list, tuple)):
+        return len(first) == len(second) and all(map(_identical, first, second))
+    if isinstance(first, float):
+        if first != first:
+            return second != second
+        return first == second and (first != 0 or repr(first) == repr(second))
+    return first == second
+
+
+class DependencyIndex:
+    """
+    Transitive closure of a metrics configuration as bitsets over node IDs
+
+    Metrics and the external inputs they read are numbered, and each node
+    stores its ancestors and descendants as int bitmasks. Upstream,
+    downstream and shared-ancestor queries are then a few integer
+    operations, plus decoding the names in the result. Everything is built
+    iteratively, so deep chains cannot hit the recursion limit.
+    """
+
+    def __init__(self, metrics: Dict[str, Any], eval_order: Optional[Tuple[str, ...]] = None):
+        nodes = list(metrics)
+        ids = {name: i for i, name in enumerate(nodes)}
+        for config in metrics.values():
+            for dep in config.get("dependencies", []):
+                if dep not in ids:
+                    ids[dep] = len(nodes)
+                    nodes.append(dep)
+        self.nodes = tuple(nodes)
+        self.ids = ids
+
+        direct = [0] * len(nodes)
+        for m_id, config in metrics.items():
+            for dep in config.get("dependencies", []):
+                direct[ids[m_id]] |= 1 << ids[dep]
+        self.direct = tuple(direct)
+
+        if eval_order is not None:
+            self.ancestors, self.descendants = self._closure_acyclic(metrics, eval_order)
+        else:
+            self.ancestors, self.descendants = self._closure_fixpoint()
+
+    def _closure_acyclic(self, metrics: Dict[str, Any], eval_order: Tuple[str, ...]):
+        ids = self.ids
+        ancestors = [0] * len(self.nodes)
+        dependents: List[List[int]] = [[] for _ in self.nodes]
+        for m_id in eval_order:
+            node = ids[m_id]
+            mask = 0
+            for dep in metrics[m_id].get("dependencies", []):
+                dep_node = ids[dep]
+                mask |= (1 << dep_node) | ancestors[dep_node]
+                dependents[dep_node].append(node)
+            ancestors[node] = mask
+
+        descendants = [0] * len(self.nodes)
+        for m_id in reversed(eval_order):
+            node = ids[m_id]
+            for dep_node in set(self._bits(self.direct[node])):
+                descendants[dep_node] |= (1 << node) | descendants[node]
+        return tuple(ancestors), tuple(descendants)
+
+    def _closure_fixpoint(self):
+        """Closure for configs with cycles: propagate until nothing changes"""
+        ancestors = list(self.direct)
+        changed = True
+        while changed:
+            changed = False
+            for node, mask in enumerate(ancestors):
+                expanded = mask
+                for dep_node in self._bits(mask):
+                    expanded |= ancestors[dep_node]
+                if expanded != mask:
+                    ancestors[node] = expanded
+                    changed = True
+
+        descendants = [0] * len(self.nodes)
+        for node, mask in enumerate(ancestors):
+            for dep_node in self._bits(mask):
+                descendants[dep_node] |= 1 << node
+        return tuple(ancestors), tuple(descendants)
+
+    @staticmethod
+    def _bits(mask: int) -> Iterator[int]:
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def names(self, mask: int) -> List[str]:
+        """Decode a bitmask into node names, in node ID order"""
+        return [self.nodes[i] for i in self._bits(mask)]
+
+    def upstream_mask(self, node_id: str) -> int:
+        node = self.ids.get(node_id)
+        return 0 if node is None else self.ancestors[node]
+
+    def downstream_mask(self, node_id: str) -> int:
+        node = self.ids.get(node_id)
+        return 0 if node is None else self.descendants[node]
+
+    def upstream(self, node_id: str) -> List[str]:
+        """Every metric and input node_id depends on, directly or indirectly"""
+        return self.names(self.upstream_mask(node_id))
+
+    def downstream(self, node_id: str) -> List[str]:
+        """Every metric that depends on node_id, directly or indirectly"""
+        return self.names(self.downstream_mask(node_id))
+
+    def shared_upstream(self, first_id: str, second_id: str) -> List[str]:
+        """Nodes both first_id and second_id depend on"""
+        return self.names(self.upstream_mask(first_id) & self.upstream_mask(second_id))
+
+    def depends_on(self, node_id: str, other_id: str) -> bool:
+        """True if other_id is upstream of node_id"""
+        other = self.ids.get(other_id)
+        return other is not None and bool(self.upstream_mask(node_id) >> other & 1)
+
+
+def _metric_references(config: Dict[str, Any]) -> List[Any]:
+    """Literal-or-name values a metric resolves at run time besides its dependencies"""
+    expression = config.get("expression")
+    if not isinstance(expression, dict):
+        return []
+    if config.get("type") == "if_then_else":
+        return [expression.get("if_true"), expression.get("if_false")]
+    if config.get("type") == "conditional_rating":
+        return [rule.get("return") for rule in expression.get("rules", [])]
+    return []
+
+
+def _metric_expressions(config: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    """
+    (kind, source) of every expression a metric evaluates, where kind is
+    "lambda" or "expression" for custom metrics and "condition" otherwise
+    """
+    mtype = config.get("type")
+    expression = config.get("expression")
+    if mtype == "custom":
+        if isinstance(expression, str):
+            yield "lambda", expression
+        else:
+            yield "expression", str(expression)
+    elif not isinstance(expression, dict):
+        return
+    elif mtype == "conditional":
+        for condition in expression.get("conditions", []):
+            yield "condition", condition.get("if")
+    elif mtype == "conditional_rating":
+        for rule in expression.get("rules", []):
+            yield "condition", rule.get("condition")
+    elif mtype == "if_then_else":
+        yield "condition", expression.get("condition")
+
+
+def _unconditional_dependencies(config: Dict[str, Any], cache: ExpressionCache) -> Tuple[str, ...]:
+    """
+    Dependencies a metric reads on every evaluation: the first candidate of
+    the short-circuiting types, the names read by the first condition, and
+    every dependency of the other types
+    """
+    dependencies = config.get("dependencies", [])
+    mtype = config.get("type")
+    expression = config.get("expression")
+    if mtype in ("fallback", "coalesce", "priority_select",
+                 "worst_of", "best_of", "rating_worst", "rating_best"):
+        return tuple(dependencies[:1])
+    if mtype not in ("if_then_else", "conditional", "conditional_rating"):
+        return tuple(dependencies)
+    if not isinstance(expression, dict):
+        return ()
+    if mtype == "if_then_else":
+        first = expression.get("condition")
+    elif mtype == "conditional":
+        first = next(iter(expression.get("conditions", [])), {}).get("if")
+    else:
+        first = next(iter(expression.get("rules", [])), {}).get("condition")
+    if first is None:
+        return ()
+    try:
+        names = cache.parse(first).names
+    except (TypeError, ValueError):
+        return tuple(dependencies)
+    return tuple(dep for dep in dependencies if dep in names)
+
+
+class ConfigEntry:
+    """Derived data for one metrics configuration, computed on first use"""
+
+    def __init__(self, fingerprint: str, metrics: Dict[str, Any],
+                 order: Optional[Iterable[str]] = None):
+        self.fingerprint = fingerprint
+        self.metric_ids = tuple(metrics)
+        self._metrics = metrics
+        self._order: Optional[Tuple[str, ...]] = tuple(order) if order is not None else None
+        self._order_error: Optional[str] = None
+        self._checks: Dict[frozenset, Tuple[bool, frozenset, tuple]] = {}
+        self._expression_errors: Dict[frozenset, Tuple[Tuple[str, str], ...]] = {}
+        self._unconditional: Optional[Dict[str, Tuple[str, ...]]] = None
+        self._plans: Dict[Any, "ExecutionPlan"] = {}
+        self._closures: Dict[frozenset, Tuple[Tuple[str, ...], frozenset]] = {}
+        self._dependency_index: Optional[DependencyIndex] = None
+        self._lock = threading.Lock()
+
+    def eval_order(self) -> Tuple[str, ...]:
+        """Topological order, raising ValueError for circular dependencies"""
+        if self._order is None and self._order_error is None:
+            try:
+                self._order = tuple(_compute_eval_order(self._metrics))
+            except ValueError as e:
+                self._order_error = str(e)
+        if self._order_error is not None:
+            raise ValueError(self._order_error)
+        return self._order
+
+    def dependency_index(self) -> DependencyIndex:
+        """Ancestor/descendant bitsets for the config"""
+        if self._dependency_index is None:
+            try:
+                order = self.eval_order()
+            except ValueError:
+                order = None
+            self._dependency_index = DependencyIndex(self._metrics, order)
+        return self._dependency_index
+
+    def closure(self, targets: Iterable[str]) -> Tuple[Tuple[str, ...], frozenset]:
+        """
+        Upstream closure of the target metrics
+
+        Returns (order, external_inputs): every metric the targets depend on,
+        directly or through a literal-or-name reference, in evaluation order,
+        and the inputs those metrics require. Metrics outside the closure are
+        never evaluated, so a cycle elsewhere in the config does not matter.
+        """
+        key = frozenset(targets)
+        cached = self._closures.get(key)
+        if cached is not None:
+            return cached
+
+        metrics = self._metrics
+        unknown = [t for t in key if t not in metrics]
+        if unknown:
+            raise ValueError(f"Unknown target metrics: {sorted(unknown)}")
+
+        members = set()
+        external_inputs = set()
+        stack = list(key)
+        while stack:
+            m_id = stack.pop()
+            if m_id in members:
+                continue
+            members.add(m_id)
+            config = metrics[m_id]
+            for dep in config.get("dependencies", []):
+                if dep in metrics:
+                    stack.append(dep)
+                else:
+                    external_inputs.add(dep)
+            for name in _metric_references(config):
+                try:
+                    if name in metrics:
+                        stack.append(name)
+                except TypeError:
+                    pass
+
+        try:
+            order = tuple(m_id for m_id in self.eval_order() if m_id in members)
+        except ValueError:
+            order = tuple(_compute_eval_order({m_id: config for m_id, config in metrics.items()
+                                               if m_id in members}))
+        cached = self._closures[key] = (order, frozenset(external_inputs))
+        return cached
+
+    def checks(self, metric_types) -> Tuple[bool, frozenset, tuple]:
+        """
+        Validation facts that do not depend on input values
+
+        Returns (has_type_errors, external_inputs, per-metric checks), where each
+        check is (metric_id, type error or None, dependencies that are not metrics).
+        """
+        key = frozenset(metric_types)
+        cached = self._checks.get(key)
+        if cached is not None:
+            return cached
+
+        per_metric = []
+        external_inputs = set()
+        has_type_errors = False
+        for metric_id, config in self._metrics.items():
+            type_error = None
+            if "type" not in config:
+                type_error = f"Metric {metric_id}: Missing 'type' field"
+            elif config["type"] not in key:
+                type_error = f"Metric {metric_id}: Unknown type '{config['type']}'"
+            has_type_errors = has_type_errors or type_error is not None
+            external = tuple(dep for dep in config.get("dependencies", []) if dep not in self._metrics)
+            external_inputs.update(external)
+            per_metric.append((metric_id, type_error, external))
+
+        cached = self._checks[key] = (has_type_errors, frozenset(external_inputs), tuple(per_metric))
+        return cached
+
+    def expression_errors(self, cache: ExpressionCache,
+                          custom_namespace: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+        """
+        (metric_id, message) for every expression that does not parse or
+        uses a name, function or operator it cannot: conditions see their
+        dependencies and CONDITION_FUNCTIONS, custom expressions their
+        dependencies and custom_namespace
+        """
+        key = frozenset(custom_namespace.items())
+        cached = self._expression_errors.get(key)
+        if cached is not None:
+            return cached
+
+        errors = []
+        for metric_id, config in self._metrics.items():
+            dependencies = config.get("dependencies", [])
+            for kind, source in _metric_expressions(config):
+                if not isinstance(source, str):
+                    errors.append((metric_id, f"Expression {source!r} is not a string"))
+                    continue
+                try:
+                    if kind == "condition":
+                        problem = cache.parse(source).check(dependencies, CONDITION_FUNCTIONS,
+                                                            CONDITION_OPERATORS)
+                    else:
+                        parsed = cache.parse_lambda(source) if kind == "lambda" else cache.parse(source)
+                        problem = parsed.check(dependencies, custom_namespace, custom_namespace)
+                except ValueError as e:
+                    problem = str(e)
+                else:
+                    if problem is not None:
+                        problem = f"Expression '{source}': {problem}"
+                if problem is not None:
+                    errors.append((metric_id, problem))
+
+        cached = self._expression_errors[key] = tuple(errors)
+        return cached
+
+    def unconditional_dependencies(self, cache: ExpressionCache) -> Dict[str, Tuple[str, ...]]:
+        """Per metric, the dependencies it reads whatever their values"""
+        if self._unconditional is None:
+            self._unconditional = {m_id: _unconditional_dependencies(config, cache)
+                                   for m_id, config in self._metrics.items()}
+        return self._unconditional
+
+    def plan(self, key: Any, build: Callable[[], "ExecutionPlan"]) -> "ExecutionPlan":
+        """Compiled plan for key (order and compile settings), built once"""
+        with self._lock:
+            plan = self._plans.get(key)
+        if plan is None:
+            plan = build()
+            with self._lock:
+                plan = self._plans.setdefault(key, plan)
+        return plan
+
+
+class ConfigRegistry:
+    """
+    Process-wide LRU cache of ConfigEntry objects keyed by config fingerprint
+
+    Lets evaluators built for an already-seen configuration reuse its
+    validation, evaluation order and compiled plans instead of redoing them.
+    Equal configs loaded separately share an entry through their fingerprint,
+    once the entry's own copy is confirmed identical to them (see
+    _identical). A config object seen before skips the hashing while it is
+    still identical to that copy; once it has been edited in place it is
+    fingerprinted again and gets its own entry.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, ConfigEntry]" = OrderedDict()
+        # id(metrics) -> (metrics, entry); holding metrics keeps the id unique
+        self._by_identity: "OrderedDict[int, Tuple[Dict[str, Any], ConfigEntry]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def entry(self, metrics: Dict[str, Any]) -> ConfigEntry:
+        known = self._by_identity.get(id(metrics))
+        if known is not None and known[0] is metrics and _identical(metrics, known[1]._metrics):
+            return known[1]
+
+        # Entries keep their own copy so later edits to metrics cannot leak in
+        return self._register(config_fingerprint(metrics), metrics,
+                              lambda fingerprint: ConfigEntry(fingerprint, copy.deepcopy(metrics)))
+
+    def preload(self, fingerprint: str, metrics: Dict[str, Any],
+                order: Optional[Iterable[str]] = None) -> ConfigEntry:
+        """
+        Register a config restored from a plan file without hashing or copying it
+
+        The caller hands metrics over to the registry and must not edit it;
+        order is its known evaluation order, if it has one.
+        """
+        return self._register(fingerprint, metrics,
+                              lambda fingerprint: ConfigEntry(fingerprint, metrics, order))
+
+    def _register(self, fingerprint: str, metrics: Dict[str, Any],
+                  build: Callable[[str], ConfigEntry]) -> ConfigEntry:
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None and _identical(metrics, entry._metrics):
+                self._entries.move_to_end(fingerprint)
+            else:
+                entry = self._entries[fingerprint] = build(fingerprint)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            self._by_identity[id(metrics)] = (metrics, entry)
+            while len(self._by_identity) > self.maxsize:
+                self._by_identity.popitem(last=False)
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_identity.clear()
+
+
+config_registry = ConfigRegistry()
+
+
+def get_eval_order(metrics: Dict[str, Any]) -> List[str]:
+    """
+    Enhanced topological sort with cycle detection, memoized per config fingerprint
+
+    metrics may be edited in place between calls; the next call sees the
+    edit.
+    """
+    return list(config_registry.entry(metrics).eval_order())
+
+
+def _compute_eval_order(metrics: Dict[str, Any]) -> List[str]:
+    """Kahn's algorithm over metric dependencies"""
+    graph = defaultdict(list)
+    indegree = defaultdict(int)
+    
+    all_metrics = set(metrics.keys())
+    
+    # Build dependency graph
+    for metric, config in metrics.items():
+        indegree[metric] = 0  # Initialize
+        
+    for metric, config in metrics.items():
+        for dep in config.get("dependencies", []):
+            if dep in all_metrics:  # Only consider metric dependencies
+                graph[dep].append(metric)
+                indegree[metric] += 1
+    
+    # Topological sort
+    queue = deque([m for m in metrics if indegree[m] == 0])
+    order = []
+    
+    while queue:
+        current = queue.popleft()
+        order.append(current)
+        
+        for neighbor in graph[current]:
+            indegree[neighbor] -= 1
+            if indegree[neighbor] == 0:
+                queue.append(neighbor)
+    
+    # Check for cycles
+    if len(order) != len(metrics):
+        remaining = set(metrics.keys()) - set(order)
+        raise ValueError(f"Circular dependency detected among metrics: {remaining}")
+    
+    return order
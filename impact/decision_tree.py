@@ -0,0 +1,229 @@
+"""Decision-tree DOT/JSON export and graphviz rendering"""
+import json
+import threading
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _dot_quote(text):
+    text = str(text).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{text}"'
+
+def _same_value(a, b):
+    try:
+        return a is b or (type(a) is type(b) and bool(a == b))
+    except Exception:
+        return False
+
+_MISSING_VALUE = object()
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def _background_renderer():
+    """Single worker thread shared by background renders"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="decision-tree")
+        return _render_pool
+
+def _render_dot(source, filename, format):
+    from graphviz import Source
+    return Source(source).render(filename, format=format, cleanup=True)
+
+class DecisionTreeRenderer:
+    """
+    DOT and JSON views of a metric graph, cached per config structure
+
+    Adjacency and edge statements are built once. Each node's DOT statement
+    is cached with the value (and usage) it was drawn with, so a render only
+    re-labels nodes whose value changed. A view can be limited to the
+    upstream/downstream cone of one metric, to an explicit node set, or to
+    the metrics affected by an impact_analysis report. Graphviz itself runs
+    only in render(), optionally on a background thread.
+    """
+
+    def __init__(self, metrics, comment="Decision Tree"):
+        self.comment = comment
+        self.metrics = {m_id: (metric.get("type"), list(metric.get("dependencies", [])))
+                        for m_id, metric in metrics.items()}
+        self.parents = defaultdict(list)
+        self.children = defaultdict(list)
+        self.nodes = list(self.metrics)
+        for m_id, (_, dependencies) in self.metrics.items():
+            for dep in dependencies:
+                if dep not in self.metrics and dep not in self.parents and dep not in self.children:
+                    self.nodes.append(dep)
+                self.parents[m_id].append(dep)
+                self.children[dep].append(m_id)
+        self.edges = [(dep, m_id) for m_id, (_, deps) in self.metrics.items() for dep in deps]
+        self._edge_lines = [f"\t{_dot_quote(dep)} -> {_dot_quote(m_id)}" for dep, m_id in self.edges]
+        self._node_lines = {}  # node -> (state, DOT statement)
+        self._cones = {}
+        self._lock = threading.Lock()
+
+    def cone(self, node_id, direction="both"):
+        """Node ids upstream and/or downstream of node_id, including it"""
+        key = (node_id, direction)
+        if key not in self._cones:
+            if direction not in ("up", "down", "both"):
+                raise ValueError(f"Unknown cone direction: {direction}")
+            selected = {node_id}
+            for step, wanted in ((self.parents, "up"), (self.children, "down")):
+                if direction not in (wanted, "both"):
+                    continue
+                queue = deque([node_id])
+                while queue:
+                    for neighbor in step.get(queue.popleft(), ()):
+                        if neighbor not in selected:
+                            selected.add(neighbor)
+                            queue.append(neighbor)
+            self._cones[key] = frozenset(selected)
+        return self._cones[key]
+
+    def _view(self, results, input_values, focus, direction, nodes, report):
+        """(ordered nodes, values, old values, highlighted nodes) for one view"""
+        values = dict(input_values or {})
+        values.update(results or {})
+        old_values = {}
+        highlight = set()
+        if report is not None:
+            changes = report.get("changes_applied", {})
+            for name, value in changes.items():
+                old_values[name] = values.get(name, _MISSING_VALUE)
+                values[name] = value
+            for m_id, change in report.get("affected_metrics", {}).items():
+                old_values[m_id] = change["old_value"]
+                values[m_id] = change["new_value"]
+            highlight = set(old_values)
+            if nodes is None and focus is None:
+                nodes = highlight
+
+        selected = None
+        if focus is not None:
+            selected = set(self.cone(focus, direction))
+        if nodes is not None:
+            selected = set(nodes) if selected is None else selected & set(nodes)
+        ordered = self.nodes if selected is None else [n for n in self.nodes if n in selected]
+        return ordered, values, old_values, highlight
+
+    def _node_line(self, node, values, old_values, highlight, usage, show_inputs):
+        value = values.get(node, _MISSING_VALUE)
+        old = old_values.get(node, _MISSING_VALUE)
+        hits = usage.get(node, 0) if usage is not None else None
+        state = (value, old, hits, node in highlight, show_inputs)
+
+        cached = self._node_lines.get(node)
+        if cached is not None and all(_same_value(a, b) for a, b in zip(cached[0], state)):
+            return cached[1]
+
+        is_metric = node in self.metrics
+        if is_metric:
+            shown = "Pending" if value is _MISSING_VALUE else value
+            label = f"{node}\n{shown}"
+            attrs = {"shape": "box", "style": "filled", "color": "lightblue"}
+            if hits is not None:
+                label += f"\nUsed: {hits}"
+                attrs["fontsize"] = str(12 + hits)
+        elif show_inputs:
+            label = f"{node}\n{'Unknown' if value is _MISSING_VALUE else value}"
+            attrs = {"shape": "ellipse", "color": "lightgray"}
+        else:
+            label, attrs = None, {}
+
+        if old is not _MISSING_VALUE:
+            label = f"{label or node}\n(was {old})"
+        if node in highlight:
+            attrs.update({"style": "filled", "color": "orange"})
+        if label is not None:
+            attrs = {"label": label, **attrs}
+        rendered = " ".join(f"{key}={_dot_quote(val)}" for key, val in attrs.items())
+        line = f"\t{_dot_quote(node)} [{rendered}]" if rendered else f"\t{_dot_quote(node)}"
+        self._node_lines[node] = (state, line)
+        return line
+
+    def dot_source(self, results=None, input_values=None, usage=None, focus=None,
+                   direction="both", nodes=None, report=None):
+        """
+        DOT text for the graph (or a view of it)
+
+        usage maps metric ids to hit counts (drawn as "Used: n"), input_values
+        adds labelled input nodes, focus/direction select a cone, nodes an
+        explicit subset and report an impact_analysis result to highlight.
+        """
+        ordered, values, old_values, highlight = self._view(results, input_values, focus,
+                                                            direction, nodes, report)
+        show_inputs = input_values is not None
+        with self._lock:
+            lines = [self._node_line(node, values, old_values, highlight, usage, show_inputs)
+                     for node in ordered]
+        if len(ordered) == len(self.nodes):
+            lines.extend(self._edge_lines)
+        else:
+            included = set(ordered)
+            lines.extend(line for (dep, m_id), line in zip(self.edges, self._edge_lines)
+                         if dep in included and m_id in included)
+        return f"// {self.comment}\ndigraph {{\n" + "\n".join(lines) + "\n}\n"
+
+    def to_json(self, results=None, input_values=None, usage=None, focus=None,
+                direction="both", nodes=None, report=None):
+        """Node/edge lists for a web viewer; values that are not JSON types become strings"""
+        ordered, values, old_values, highlight = self._view(results, input_values, focus,
+                                                            direction, nodes, report)
+        def plain(value):
+            if value is _MISSING_VALUE:
+                return None
+            return value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+        graph_nodes = []
+        for node in ordered:
+            entry = {"id": node, "kind": "metric" if node in self.metrics else "input",
+                     "value": plain(values.get(node, _MISSING_VALUE))}
+            if node in self.metrics:
+                entry["type"] = self.metrics[node][0]
+            if usage is not None and node in self.metrics:
+                entry["usage"] = usage.get(node, 0)
+            if node in old_values:
+                entry["old_value"] = plain(old_values[node])
+            if node in highlight:
+                entry["highlight"] = True
+            graph_nodes.append(entry)
+        included = set(ordered)
+        graph_edges = [{"source": dep, "target": m_id} for dep, m_id in self.edges
+                       if dep in included and m_id in included]
+        return {"comment": self.comment, "nodes": graph_nodes, "edges": graph_edges}
+
+    def write_json(self, path, **view):
+        """Write to_json(**view) to path"""
+        with open(path, "w") as handle:
+            json.dump(self.to_json(**view), handle, indent=2)
+        return path
+
+    def render(self, filename, format="png", background=False, **view):
+        """
+        Render a view with graphviz; returns the output path, or a Future
+        for it when background=True. The DOT text is built before returning,
+        so later changes to results do not affect a queued render.
+        """
+        source = self.dot_source(**view)
+        if background:
+            return _background_renderer().submit(_render_dot, source, filename, format)
+        return _render_dot(source, filename, format)
+
+_decision_tree_renderers = OrderedDict()
+
+def decision_tree_renderer(metrics, comment="Decision Tree"):
+    """Renderer for a config, reused while its metrics, types and dependencies are unchanged"""
+    key = (comment, tuple((m_id, metric.get("type"), tuple(metric.get("dependencies", [])))
+                          for m_id, metric in metrics.items()))
+    with _render_pool_lock:
+        renderer = _decision_tree_renderers.get(key)
+        if renderer is not None:
+            _decision_tree_renderers.move_to_end(key)
+            return renderer
+    renderer = DecisionTreeRenderer(metrics, comment)
+    with _render_pool_lock:
+        renderer = _decision_tree_renderers.setdefault(key, renderer)
+        while len(_decision_tree_renderers) > 16:
+            _decision_tree_renderers.popitem(last=False)
+    return renderer
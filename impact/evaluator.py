@@ -0,0 +1,1089 @@
+"""EnhancedMetricEvaluator: row-wise evaluation, validation and impact analysis"""
+import json
+import logging
+import operator
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Union, Optional, Iterable, Tuple
+
+from .config import config_registry, get_eval_order
+from .expressions import CONDITION_FUNCTIONS, CONDITION_OPERATORS, ExpressionCache, shared_expression_cache
+from .plan import PlanCompiler
+from .profiling import MetricProfiler
+from .ratings import STANDARD_RATING_SCALE, rating_scale
+from .results import EvaluationResult, EvaluationResults
+
+logger = logging.getLogger(__name__)
+
+
+class EnhancedMetricEvaluator:
+    """
+    Enhanced rule-based metric evaluation system for impact analysis
+    
+    Features:
+    - Multiple evaluation strategies
+    - Dependency tracking and validation
+    - Impact analysis (what-if scenarios)
+    - Detailed logging and debugging
+    - Error handling and validation
+    - Performance tracking
+    - Demand-driven evaluation of selected target metrics
+
+    The metrics configuration is validated, and plans are compiled, as it
+    is when the evaluator is constructed. After editing it in place,
+    construct a new evaluator: that one validates and compiles the edited
+    configuration.
+    """
+    
+    def __init__(self, metrics: Dict[str, Any], input_values: Dict[str, Any], 
+                 debug: bool = False, expression_cache: Optional[ExpressionCache] = None,
+                 timing: bool = False, profiler: Optional[MetricProfiler] = None,
+                 targets: Optional[Iterable[str]] = None, lazy: bool = False,
+                 providers: Optional[Iterable["InputProvider"]] = None):
+        self.metrics = metrics
+        self.input_values = input_values
+        # Async sources of per-entity inputs for evaluate_entities; the
+        # inputs they list need not be in input_values
+        self.providers = list(providers) if providers is not None else []
+        # Default targets for run_evaluation/compile; None evaluates everything
+        self.targets = tuple(targets) if targets is not None else None
+        # Default for run_evaluation(lazy=...): compute metrics only when read
+        self.lazy = lazy
+        # During a lazy run: metric -> order position while not yet computed,
+        # and the positions of the metrics being computed (innermost last)
+        self._pending: Optional[Dict[str, int]] = None
+        self._forcing: List[int] = []
+        self.results = EvaluationResults(metrics)
+        self.debug = debug
+        # Per-metric timing is opt-in; debug logging and profilers imply it
+        self.timing = timing
+        self.profiler = profiler
+        self.expression_cache = expression_cache if expression_cache is not None else shared_expression_cache
+        
+        # Enhanced dispatch map with more operators
+        self.dispatch_map = {
+            "threshold": self.evaluate_threshold,
+            "map_rating": self.evaluate_map_rating,
+            "map_score": self.evaluate_map_score,
+            "max": self.evaluate_max,
+            "min": self.evaluate_min,
+            "avg": self.evaluate_avg,
+            "sum": self.evaluate_sum,
+            "custom": self.evaluate_custom,
+            "conditional": self.evaluate_conditional,
+            "weighted_sum": self.evaluate_weighted_sum,
+            "percentage": self.evaluate_percentage,
+            "lookup": self.evaluate_lookup,
+            # New Excel-like conditional patterns
+            "fallback": self.evaluate_fallback,
+            "worst_of": self.evaluate_worst_of,
+            "best_of": self.evaluate_best_of,
+            "if_then_else": self.evaluate_if_then_else,
+            "coalesce": self.evaluate_coalesce,
+            "priority_select": self.evaluate_priority_select,
+            "rating_worst": self.evaluate_rating_worst,
+            "rating_best": self.evaluate_rating_best,
+            "conditional_rating": self.evaluate_conditional_rating
+        }
+        
+        # Mathematical operators
+        self.math_operators = {
+            '+': operator.add,
+            '-': operator.sub,
+            '*': operator.mul,
+            '/': operator.truediv,
+            '//': operator.floordiv,
+            '%': operator.mod,
+            '**': operator.pow,
+            'max': max,
+            'min': min,
+            'abs': abs,
+            'round': round
+        }
+        
+        # Functions and operators available to custom expressions
+        self.custom_namespace = dict(self.math_operators)
+        self.custom_namespace.update({
+            'abs': abs, 'len': len, 'str': str, 'int': int, 'float': float
+        })
+        # (kind, source, dependencies) -> compiled row closure
+        self._expressions: Dict[Tuple[str, str, Tuple[str, ...]], Any] = {}
+        
+        # Compiled plan and baseline reused across impact analyses
+        self._plan: Optional["ExecutionPlan"] = None
+        self._baseline: Optional[Tuple[Dict[str, Any], List[Any]]] = None
+        self._positions: Optional[Dict[str, int]] = None
+        
+        # Validation, order and plans are shared by every evaluator of this config
+        self.config = config_registry.entry(metrics)
+        self._validate_configuration(self.targets)
+
+    def _validate_configuration(self, targets: Optional[Iterable[str]] = None):
+        """Validate the metric configuration, or only the closure of targets"""
+        has_type_errors, external_inputs, checks = self.config.checks(self.dispatch_map)
+        expression_errors = self.config.expression_errors(self.expression_cache, self.custom_namespace)
+        if targets is not None:
+            order, external_inputs = self.config.closure(targets)
+        provided = frozenset().union(*(provider.inputs for provider in self.providers))
+        known = self.input_values.keys() | provided
+        if not has_type_errors and not expression_errors and external_inputs <= known:
+            return
+        
+        if targets is not None:
+            members = set(order)
+            checks = tuple(check for check in checks if check[0] in members)
+            expression_errors = tuple(error for error in expression_errors if error[0] in members)
+        errors = []
+        for metric_id, type_error, external in checks:
+            # Check required fields
+            if type_error:
+                errors.append(type_error)
+            
+            # Check dependencies exist
+            for dep in external:
+                if dep not in known:
+                    errors.append(f"Metric {metric_id}: Unknown dependency '{dep}'")
+        
+        for metric_id, message in expression_errors:
+            errors.append(f"Metric {metric_id}: {message}")
+        
+        if errors:
+            raise ValueError("Configuration validation failed:\n" + "\n".join(errors))
+
+    def get_dependency_value(self, dep_id: str) -> Any:
+        """Get value from either results or input values"""
+        pending = self._pending
+        if pending is not None and dep_id in pending and pending[dep_id] < self._forcing[-1]:
+            # Lazy run: an earlier metric nobody has read yet
+            self._force(dep_id)
+        values = self.results.values
+        if dep_id in values:
+            return values[dep_id]
+        elif dep_id in self.input_values:
+            return self.input_values[dep_id]
+        else:
+            raise ValueError(f"Dependency '{dep_id}' not found in results or inputs")
+
+    def evaluate_threshold(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Enhanced threshold evaluation with customizable labels"""
+        value = self.get_dependency_value(metric["dependencies"][0])
+        thresholds = metric["expression"]
+        labels = metric.get("labels", ["Low", "Moderate", "High", "Critical"])
+        
+        if not isinstance(thresholds, list) or len(thresholds) < 1:
+            raise ValueError(f"Metric {m_id}: Invalid thresholds format")
+        
+        # Handle different threshold configurations
+        if len(thresholds) == 3:  # Standard 4-level threshold
+            if value < thresholds[0]:
+                return labels[0]
+            elif value < thresholds[1]:
+                return labels[1]
+            elif value < thresholds[2]:
+                return labels[2]
+            else:
+                return labels[3]
+        else:  # Custom threshold levels
+            for i, threshold in enumerate(thresholds):
+                if value < threshold:
+                    return labels[i] if i < len(labels) else f"Level_{i}"
+            return labels[-1] if labels else f"Level_{len(thresholds)}"
+
+    def evaluate_map_rating(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Map rating to score with default value support"""
+        rating = self.get_dependency_value(metric["dependencies"][0])
+        mapping = metric["expression"]
+        default_value = metric.get("default", 0)
+        return mapping.get(rating, default_value)
+
+    def evaluate_map_score(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Map score to rating with default value support"""
+        score = self.get_dependency_value(metric["dependencies"][0])
+        mapping = metric["expression"]
+        default_value = metric.get("default", "NR")
+        return mapping.get(str(score), default_value)
+
+    def evaluate_max(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Get maximum value from dependencies"""
+        values = [self.get_dependency_value(dep) for dep in metric["dependencies"]]
+        # Filter out non-numeric values if specified
+        if metric.get("numeric_only", False):
+            values = [v for v in values if isinstance(v, (int, float))]
+        return max(values) if values else None
+
+    def evaluate_min(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Get minimum value from dependencies"""
+        values = [self.get_dependency_value(dep) for dep in metric["dependencies"]]
+        if metric.get("numeric_only", False):
+            values = [v for v in values if isinstance(v, (int, float))]
+        return min(values) if values else None
+
+    def evaluate_avg(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Calculate average of dependencies"""
+        values = [self.get_dependency_value(dep) for dep in metric["dependencies"]]
+        numeric_values = [v for v in values if isinstance(v, (int, float))]
+        if not numeric_values:
+            return 0
+        result = sum(numeric_values) / len(numeric_values)
+        return round(result, metric.get("precision", 2))
+
+    def evaluate_sum(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Calculate sum of dependencies"""
+        values = [self.get_dependency_value(dep) for dep in metric["dependencies"]]
+        numeric_values = [v for v in values if isinstance(v, (int, float))]
+        return sum(numeric_values)
+
+    def evaluate_weighted_sum(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Calculate weighted sum of dependencies"""
+        dependencies = metric["dependencies"]
+        weights = metric["expression"]["weights"]
+        
+        if len(dependencies) != len(weights):
+            raise ValueError(f"Metric {m_id}: Number of dependencies must match number of weights")
+        
+        total = sum(self.get_dependency_value(dep) * weight 
+                   for dep, weight in zip(dependencies, weights))
+        return round(total, metric.get("precision", 2))
+
+    def evaluate_percentage(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Calculate percentage"""
+        numerator = self.get_dependency_value(metric["dependencies"][0])
+        denominator = self.get_dependency_value(metric["dependencies"][1])
+        
+        if denominator == 0:
+            return 0
+        
+        percentage = (numerator / denominator) * 100
+        return round(percentage, metric.get("precision", 1))
+
+    def evaluate_conditional(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Enhanced conditional evaluation with multiple conditions"""
+        conditions = metric["expression"]["conditions"]
+        default_value = metric["expression"].get("default", None)
+        
+        for condition in conditions:
+            condition_result = self._evaluate_condition(condition["if"], metric["dependencies"])
+            if condition_result:
+                return condition["then"]
+        
+        return default_value
+
+    def _expression(self, kind: str, source: str, dependencies: List[str]) -> Tuple[Any, Tuple[str, ...]]:
+        """
+        Row closure for a condition ("condition"), custom lambda ("lambda") or
+        direct custom expression ("expression"), plus the dependencies whose
+        values it takes, in order, as a list; conditions read only the
+        dependencies they name
+        """
+        key = (kind, source, tuple(dependencies))
+        entry = self._expressions.get(key)
+        if entry is None:
+            if kind == "condition":
+                functions, operators = CONDITION_FUNCTIONS, CONDITION_OPERATORS
+            else:
+                functions = operators = self.custom_namespace
+            parsed = (self.expression_cache.parse_lambda if kind == "lambda" else self.expression_cache.parse)(source)
+            reads = tuple(dict.fromkeys(dep for dep in dependencies
+                                        if kind != "condition" or dep in parsed.names))
+            positions = {dep: i for i, dep in enumerate(reads)}
+            entry = self._expressions[key] = (parsed.closure(positions, functions, operators), reads)
+        return entry
+
+    def _evaluate_condition(self, condition_expr: str, dependencies: List[str]) -> bool:
+        """Evaluate a condition expression safely"""
+        closure, reads = self._expression("condition", condition_expr, dependencies)
+        values = [self.get_dependency_value(dep) for dep in reads]
+        try:
+            return bool(closure(values))
+        except Exception as e:
+            logger.error(f"Error evaluating condition '{condition_expr}': {e}")
+            return False
+
+    def evaluate_lookup(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Lookup value from a table/mapping"""
+        lookup_key = self.get_dependency_value(metric["dependencies"][0])
+        lookup_table = metric["expression"]["table"]
+        default_value = metric.get("default", None)
+        
+        return lookup_table.get(str(lookup_key), default_value)
+
+    def evaluate_custom(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """Enhanced custom evaluation with better error handling"""
+        expression = metric["expression"]
+        if isinstance(expression, str):
+            # Lambda expression, called with the dependencies by name
+            closure, reads = self._expression("lambda", expression, metric["dependencies"])
+        else:
+            # Direct expression evaluation
+            closure, reads = self._expression("expression", str(expression), metric["dependencies"])
+        values = [self.get_dependency_value(dep) for dep in reads]
+        
+        try:
+            return closure(values)
+        except Exception as e:
+            logger.error(f"Error in custom metric {m_id}: {e}")
+            raise ValueError(f"Custom metric evaluation failed for {m_id}: {e}")
+
+    # =================================================================
+    # EXCEL-LIKE CONDITIONAL PATTERNS
+    # =================================================================
+    
+    def evaluate_fallback(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """
+        Fallback logic: if primary is N/A/None/empty, use secondary
+        Pattern: IF(G1="N/A", G2, G1) or IF(ISNA(G1), G2, G1)
+        
+        Config example:
+        {
+            "type": "fallback",
+            "dependencies": ["G1", "G2"],
+            "expression": {
+                "na_values": ["N/A", None, "", "NULL"]  # Optional, defaults to ["N/A", None, ""]
+            }
+        }
+        """
+        primary_val = self.get_dependency_value(metric["dependencies"][0])
+        na_values = metric.get("expression", {}).get("na_values", ["N/A", None, ""])
+        
+        # The fallback is only read when it is used
+        if primary_val in na_values:
+            return self.get_dependency_value(metric["dependencies"][1])
+        return primary_val
+
+    def evaluate_coalesce(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """
+        Return first non-N/A value from multiple dependencies
+        Pattern: COALESCE(G1, G2, G3, "Default")
+        
+        Config example:
+        {
+            "type": "coalesce",
+            "dependencies": ["G1", "G2", "G3"],
+            "expression": {
+                "na_values": ["N/A", None, ""],
+                "default": "No Value"  # Optional default if all are N/A
+            }
+        }
+        """
+        na_values = metric.get("expression", {}).get("na_values", ["N/A", None, ""])
+        default_value = metric.get("expression", {}).get("default", "N/A")
+        
+        for dep in metric["dependencies"]:
+            value = self.get_dependency_value(dep)
+            if value not in na_values:
+                return value
+        
+        return default_value
+
+    def evaluate_if_then_else(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """
+        Simple if-then-else logic
+        Pattern: IF(condition, value_if_true, value_if_false)
+        
+        Config example:
+        {
+            "type": "if_then_else",
+            "dependencies": ["metric1", "metric2"],
+            "expression": {
+                "condition": "metric1 == 'Yes'",
+                "if_true": "metric1_rating",  # Can be dependency name or literal value
+                "if_false": "metric2_rating"
+            }
+        }
+        """
+        condition_expr = metric["expression"]["condition"]
+        if_true = metric["expression"]["if_true"]
+        if_false = metric["expression"]["if_false"]
+        
+        # Evaluate condition
+        condition_result = self._evaluate_condition(condition_expr, metric["dependencies"])
+        
+        # Return appropriate value (could be dependency or literal)
+        selected_value = if_true if condition_result else if_false
+        
+        # Check if it's a dependency name or literal value
+        try:
+            return self.get_dependency_value(selected_value)
+        except ValueError:
+            # It's a literal value
+            return selected_value
+
+    def evaluate_worst_of(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """
+        Return the worst (highest risk) rating from multiple dependencies
+        Pattern: Take worst case scenario from multiple ratings
+        
+        Config example:
+        {
+            "type": "worst_of",
+            "dependencies": ["rating1", "rating2", "rating3"],
+            "expression": {
+                "rating_order": ["Low", "Moderate", "High", "Critical"],  # Worst to best
+                "exclude_na": true  # Optional: ignore N/A values
+            }
+        }
+        """
+        scale = rating_scale(metric["expression"]["rating_order"])
+        exclude_na = metric.get("expression", {}).get("exclude_na", True)
+        values = (self.get_dependency_value(dep) for dep in metric["dependencies"])
+        
+        # Worst rating is the highest code on the scale
+        return scale.worst(values, exclude_na)
+
+    def evaluate_best_of(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """
+        Return the best (lowest risk) rating from multiple dependencies
+        Pattern: Take best case scenario from multiple ratings
+        """
+        scale = rating_scale(metric["expression"]["rating_order"])
+        exclude_na = metric.get("expression", {}).get("exclude_na", True)
+        values = (self.get_dependency_value(dep) for dep in metric["dependencies"])
+        
+        # Best rating is the lowest code on the scale
+        return scale.best(values, exclude_na)
+
+    def evaluate_rating_worst(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """
+        Specialized worst-of for standard rating scales (Low/Moderate/High/Critical)
+        
+        Config example:
+        {
+            "type": "rating_worst",
+            "dependencies": ["G1_Rating", "G2_Rating", "G3_Rating"]
+        }
+        """
+        # Dependencies are read until one is Critical
+        values = (self.get_dependency_value(dep) for dep in metric["dependencies"])
+        return STANDARD_RATING_SCALE.worst(values)
+
+    def evaluate_rating_best(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """
+        Specialized best-of for standard rating scales (Low/Moderate/High/Critical)
+        """
+        values = (self.get_dependency_value(dep) for dep in metric["dependencies"])
+        return STANDARD_RATING_SCALE.best(values)
+
+    def evaluate_priority_select(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """
+        Select value based on priority order of dependencies
+        Pattern: Use first available (non-N/A) value in priority order
+        
+        Config example:
+        {
+            "type": "priority_select",
+            "dependencies": ["high_priority", "medium_priority", "low_priority"],
+            "expression": {
+                "na_values": ["N/A", None, ""],
+                "default": "No Data"
+            }
+        }
+        """
+        na_values = metric.get("expression", {}).get("na_values", ["N/A", None, ""])
+        default_value = metric.get("expression", {}).get("default", "N/A")
+        
+        # Return first non-N/A value in dependency order (priority order)
+        for dep in metric["dependencies"]:
+            value = self.get_dependency_value(dep)
+            if value not in na_values:
+                return value
+        
+        return default_value
+
+    def evaluate_conditional_rating(self, m_id: str, metric: Dict[str, Any]) -> Any:
+        """
+        Complex conditional logic for ratings based on multiple criteria
+        Pattern: IF(metric1="Yes", use metric1_rating, ELSE IF(metric2="High", use metric2_rating, ELSE use default))
+        
+        Config example:
+        {
+            "type": "conditional_rating",
+            "dependencies": ["status1", "status2", "rating1", "rating2"],
+            "expression": {
+                "rules": [
+                    {"condition": "status1 == 'Yes'", "return": "rating1"},
+                    {"condition": "status2 == 'High'", "return": "rating2"},
+                    {"condition": "status1 == 'Maybe' and status2 != 'Low'", "return": "Moderate"}
+                ],
+                "default": "Low"
+            }
+        }
+        """
+        rules = metric["expression"]["rules"]
+        default_value = metric["expression"].get("default", "N/A")
+        
+        for rule in rules:
+            condition_result = self._evaluate_condition(rule["condition"], metric["dependencies"])
+            if condition_result:
+                return_value = rule["return"]
+                # Check if return value is a dependency or literal
+                try:
+                    return self.get_dependency_value(return_value)
+                except ValueError:
+                    return return_value
+        
+        return default_value
+
+    def evaluate_metric(self, m_id: str) -> EvaluationResult:
+        """Evaluate a single metric with timing and dependency tracking"""
+        value, computation_time = self._evaluate_timed(m_id)
+        return EvaluationResult(
+            value=value,
+            timestamp=datetime.now(),
+            dependencies_used=self.metrics[m_id].get("dependencies", []),
+            computation_time_ms=computation_time
+        )
+
+    def _evaluate_value(self, m_id: str) -> Any:
+        """Evaluate a single metric without any instrumentation"""
+        metric = self.metrics[m_id]
+        try:
+            return self.dispatch_map[metric["type"]](m_id, metric)
+        except Exception as e:
+            logger.error(f"Error evaluating metric {m_id}: {e}")
+            raise
+
+    def _evaluate_timed(self, m_id: str) -> Tuple[Any, float]:
+        """Evaluate a single metric; returns the value and the time taken in ms"""
+        metric = self.metrics[m_id]
+        mtype = metric["type"]
+        profiler = self.profiler
+        
+        if self.debug:
+            logger.info(f"Evaluating metric: {m_id} (type: {mtype})")
+        
+        if profiler is not None:
+            profiler.before(m_id, mtype)
+        start_ns = time.perf_counter_ns()
+        try:
+            value = self.dispatch_map[mtype](m_id, metric)
+        except Exception as e:
+            if profiler is not None:
+                profiler.after(m_id, mtype, time.perf_counter_ns() - start_ns, e)
+            logger.error(f"Error evaluating metric {m_id}: {e}")
+            raise
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        if profiler is not None:
+            profiler.after(m_id, mtype, elapsed_ns, None)
+        computation_time = elapsed_ns / 1e6
+        
+        if self.debug:
+            logger.info(f"✓ {m_id} = {value} (computed in {computation_time:.2f}ms)")
+        
+        return value, computation_time
+
+    def run_evaluation(self, eval_order: Optional[List[str]] = None,
+                       targets: Optional[Iterable[str]] = None,
+                       lazy: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Run complete evaluation with optional custom order
+
+        Args:
+            targets: Metric IDs to evaluate (defaults to self.targets). Only
+                their upstream closure is evaluated and returned, and only the
+                inputs it reads need to be present.
+            lazy: Compute each metric only when a requested metric reads it
+                (defaults to self.lazy); see _run_lazy. Returns the
+                requested metrics only: the targets, or every metric.
+        """
+        if targets is not None:
+            self._validate_configuration(targets)
+        else:
+            targets = self.targets
+        eval_order = self._target_order(eval_order, targets)
+        if self.lazy if lazy is None else lazy:
+            return self._run_lazy(eval_order, targets)
+        
+        results = self.results
+        if self.timing or self.debug or self.profiler is not None:
+            if self.debug:
+                logger.info(f"Evaluation order: {eval_order}")
+            
+            start_ns = time.perf_counter_ns()
+            for m_id in eval_order:
+                results.set(m_id, *self._evaluate_timed(m_id))
+            total_time = (time.perf_counter_ns() - start_ns) / 1e6
+            
+            if self.debug:
+                logger.info(f"Total evaluation completed in {total_time:.2f}ms")
+        else:
+            for m_id in eval_order:
+                results.set(m_id, self._evaluate_value(m_id))
+        results.timestamp = datetime.now()
+        
+        if targets is not None:
+            values = results.values
+            return {m_id: values[m_id] for m_id in eval_order}
+        # Return simple dict for backward compatibility
+        return dict(results.values)
+
+    def _run_lazy(self, eval_order: List[str], targets: Optional[Iterable[str]]) -> Dict[str, Any]:
+        """
+        Demand-driven evaluation: every metric in eval_order is a thunk,
+        computed when first read
+
+        The requested metrics are computed in order, and each computes what
+        it reads on the way: fallback, coalesce and priority_select stop at
+        the first usable dependency, if_then_else, conditional and
+        conditional_rating read only the selected branch, and the worst/best
+        types stop at the end of the scale. Metrics behind unselected
+        branches, and everything only they depend on, are never computed (so
+        their errors are never raised either). A metric only sees metrics
+        earlier in eval_order, exactly as in an eager run, so every computed
+        value is identical. Per-metric timings include the metrics forced
+        while computing it. Metrics of eval_order that are not computed are
+        removed from self.results, so no value from an earlier run is left
+        next to the new ones.
+        """
+        results = self.results
+        for m_id in eval_order:
+            if m_id in results:
+                del results[m_id]
+
+        requested = eval_order
+        if targets is not None:
+            wanted = set(targets)
+            requested = [m_id for m_id in eval_order if m_id in wanted]
+        
+        self._pending = {m_id: i for i, m_id in enumerate(eval_order)}
+        self._forcing = []
+        try:
+            for m_id in requested:
+                if m_id in self._pending:
+                    self._force(m_id)
+        finally:
+            self._pending = None
+        self.results.timestamp = datetime.now()
+        
+        values = self.results.values
+        return {m_id: values[m_id] for m_id in requested}
+
+    def _force(self, m_id: str):
+        """
+        Compute a pending metric in a lazy run
+
+        Dependencies it reads unconditionally are computed first, iteratively,
+        so long dependency chains do not recurse; only branches chosen at run
+        time are forced from inside get_dependency_value.
+        """
+        pending = self._pending
+        unconditional = self.config.unconditional_dependencies(self.expression_cache)
+        instrumented = self.timing or self.debug or self.profiler is not None
+        results = self.results
+        stack = [m_id]
+        while stack:
+            current = stack[-1]
+            position = pending.get(current)
+            if position is None:
+                stack.pop()
+                continue
+            needed = [dep for dep in unconditional[current] if pending.get(dep, position) < position]
+            if needed:
+                stack.extend(reversed(needed))
+                continue
+            stack.pop()
+            del pending[current]
+            self._forcing.append(position)
+            try:
+                if instrumented:
+                    results.set(current, *self._evaluate_timed(current))
+                else:
+                    results.set(current, self._evaluate_value(current))
+            finally:
+                self._forcing.pop()
+
+    def _target_order(self, eval_order: Optional[List[str]],
+                      targets: Optional[Iterable[str]]) -> List[str]:
+        """Evaluation order, restricted to the upstream closure of targets if any"""
+        if targets is None:
+            targets = self.targets
+        if targets is None:
+            return eval_order if eval_order is not None else get_eval_order(self.metrics)
+        closure, _ = self.config.closure(targets)
+        if eval_order is None:
+            return list(closure)
+        members = set(closure)
+        return [m_id for m_id in eval_order if m_id in members]
+
+    def compile(self, eval_order: Optional[List[str]] = None,
+                memoize: Union[bool, Iterable[str]] = False, memo_size: int = 4096,
+                targets: Optional[Iterable[str]] = None) -> "ExecutionPlan":
+        """
+        Compile the configuration into a reusable ExecutionPlan
+
+        The plan gives the same values as run_evaluation but resolves order,
+        dispatch and parameters once, so it can be run against many input
+        dicts: plan.run(inputs) or plan.run_many(rows).
+
+        Args:
+            memoize: True memoizes DEFAULT_MEMO_TYPES; an iterable names the
+                metric types and/or metric ids to memoize. A metric's own
+                "memoize": true/false setting always wins.
+            memo_size: Entries kept per memoized metric (LRU)
+            targets: Compile only the upstream closure of these metrics
+                (defaults to self.targets); the plan then requires only the
+                inputs that closure reads
+        """
+        eval_order = self._target_order(eval_order, targets)
+        if memoize is True:
+            memo_spec: Any = (True, memo_size)
+        elif memoize:
+            memo_spec = (frozenset(memoize), memo_size)
+        else:
+            memo_spec = None
+        # Plans depend only on the config, the order, the custom namespace and
+        # memo settings; memo caches are shared by every user of the plan
+        key = (tuple(eval_order), frozenset(self.custom_namespace.items()), memo_spec)
+        return self.config.plan(key, lambda: PlanCompiler(self, memoize, memo_size).compile(eval_order))
+
+    def save_plan(self, path: str, eval_order: Optional[List[str]] = None,
+                  memoize: Union[bool, Iterable[str]] = False, memo_size: int = 4096,
+                  targets: Optional[Iterable[str]] = None) -> "ExecutionPlan":
+        """Compile and write the plan to path for fast loading with load_plan()"""
+        from .planfile import save_plan
+        return save_plan(self, path, eval_order, memoize, memo_size, targets)
+
+    def evaluate_batch(self, columns: Dict[str, Any],
+                       eval_order: Optional[List[str]] = None,
+                       targets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Evaluate the configuration for many entities at once (requires numpy)
+
+        Args:
+            columns: One sequence or NumPy array per input, e.g.
+                {"G1": [...], "G2": [...], "Status": [...]}, all the same length
+            targets: Evaluate only the upstream closure of these metrics
+
+        Returns:
+            One NumPy array per metric, row i matching run_evaluation on row i
+        """
+        from .batch import BatchEvaluator
+        return BatchEvaluator(self, self.compile(eval_order, targets=targets)).run(columns)
+
+    async def evaluate_entities(self, entity_ids: Iterable[Any],
+                                providers: Optional[Iterable["InputProvider"]] = None,
+                                targets: Optional[Iterable[str]] = None,
+                                max_concurrency: int = 8) -> Dict[Any, Dict[str, Any]]:
+        """
+        Fetch each entity's inputs from async providers and evaluate it
+
+        Only the inputs the (target) metrics read are fetched, in batches per
+        provider and concurrently across providers; each entity is evaluated
+        as soon as its inputs have arrived (see AsyncEntityPipeline, whose
+        stream() yields results in completion order). Inputs no provider
+        supplies come from input_values.
+
+        Args:
+            entity_ids: Entities to evaluate
+            providers: InputProvider instances, e.g. SQLiteInputProvider
+                (defaults to self.providers). Inputs only these supply
+                must be listed by self.providers too, since validation at
+                construction only accepts those as present
+            targets: Evaluate only the upstream closure of these metrics
+            max_concurrency: Most provider fetches in flight at once
+
+        Returns:
+            {entity_id: {metric: value}} in the order of entity_ids
+        """
+        from .providers import AsyncEntityPipeline
+        pipeline = AsyncEntityPipeline(self, providers if providers is not None else self.providers,
+                                       targets, max_concurrency)
+        return await pipeline.evaluate(entity_ids)
+
+    def run_wavefront(self, executor: str = "thread", max_workers: Optional[int] = None,
+                      cost_threshold: float = 10) -> Dict[str, Any]:
+        """
+        Evaluate input_values with independent expensive metrics running concurrently
+
+        See WavefrontScheduler; executor="serial" evaluates everything inline.
+        """
+        from .wavefront import WavefrontScheduler
+        with WavefrontScheduler(self, executor, max_workers, cost_threshold) as scheduler:
+            return scheduler.run()
+
+    def _compiled_plan(self) -> "ExecutionPlan":
+        """Plan for the full configuration, compiled on first use"""
+        if self._plan is None:
+            self._plan = self.compile()
+        return self._plan
+
+    def _baseline_values(self) -> List[Any]:
+        """Plan slot values for the current inputs, recomputed only when they change"""
+        if self._baseline is None or self._baseline[0] != self.input_values:
+            snapshot = dict(self.input_values)
+            self._baseline = (snapshot, self._compiled_plan().run_values(snapshot))
+        return self._baseline[1]
+
+    def impact_analysis(self, changes: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Perform impact analysis by changing input values and comparing results
+        
+        Only metrics downstream of the changed inputs are re-evaluated; the
+        baseline is cached until input_values changes. Neither input_values
+        nor results are modified.
+        
+        Args:
+            changes: Dictionary of input value changes {input_key: new_value}
+        
+        Returns:
+            Dictionary showing before/after values and affected metrics
+        """
+        return self._impact_report(self._baseline_values(), changes)
+
+    def _impact_report(self, baseline: List[Any], changes: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Build one impact report against a baseline slot list; reads shared state only"""
+        plan = self._compiled_plan()
+        new_values, recomputed = plan.propagate(baseline, changes)
+        
+        impact_report = {
+            "changes_applied": changes,
+            "affected_metrics": {},
+            "summary": {
+                "total_metrics": len(self.metrics),
+                "affected_count": 0,
+                "unchanged_count": len(self.metrics)
+            }
+        }
+        
+        # Report in configuration order, as a full comparison would
+        affected = [slot for slot in recomputed if baseline[slot] != new_values[slot]]
+        positions = self._metric_positions()
+        for slot in sorted(affected, key=lambda s: positions[plan.order[s]]):
+            impact_report["affected_metrics"][plan.order[slot]] = {
+                "old_value": baseline[slot],
+                "new_value": new_values[slot],
+                "changed": True
+            }
+        impact_report["summary"]["affected_count"] = len(affected)
+        impact_report["summary"]["unchanged_count"] -= len(affected)
+        
+        return impact_report
+
+    def sensitivity_analysis(self, input_name: str, low: Optional[float] = None,
+                             high: Optional[float] = None, targets: Optional[Iterable[str]] = None,
+                             sweep_points: int = 257) -> Dict[str, Any]:
+        """
+        Input ranges over which each metric keeps its value
+
+        Moves one numeric input over [low, high] with every other input held
+        at input_values, as repeated impact_analysis calls would, but solves
+        for the breakpoints instead of trying values. Thresholds, mappings,
+        max/min and sums are solved exactly; custom and conditional metrics
+        of the moving input are sampled (see SensitivityAnalyzer).
+        
+        Args:
+            input_name: Numeric input to move
+            low, high: Range to analyse, unbounded by default; sampled
+                metrics need both
+            targets: Metrics to report (defaults to self.targets, else every
+                metric downstream of input_name)
+            sweep_points: Samples per breakpoint interval for sampled metrics
+        
+        Returns:
+            {"input", "baseline", "low", "high",
+             "metrics": {metric: {"baseline": current value,
+                                  "stable": range holding the current input, or None,
+                                  "ranges": [range, ...], "swept": bool}},
+             "evaluations": plan evaluations used}
+            Each range is {"low", "high", "low_inclusive", "high_inclusive",
+            "value"}. Stretches where a metric changes continuously with the
+            input (a weighted_sum, say) are left out of "ranges", and
+            "stable" is None when the current input lies in one.
+        """
+        from .sensitivity import SensitivityAnalyzer
+        analyzer = SensitivityAnalyzer(self, sweep_points=sweep_points)
+        return analyzer.analyze(input_name, low, high, targets if targets is not None else self.targets)
+
+    def goal_seek(self, target: str, value: Any, direction: Optional[str] = None,
+                  inputs: Optional[Iterable[str]] = None, max_changes: int = 3, limit: int = 5,
+                  bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+                  scales: Optional[Dict[str, float]] = None,
+                  max_evaluations: int = 10000) -> Dict[str, Any]:
+        """
+        Smallest changes to numeric inputs that bring a metric to a goal value
+
+        Works back from the target using the breakpoints found by
+        sensitivity_analysis instead of trying input values, so it needs a
+        few plan evaluations per candidate rather than a grid (see
+        GoalSeeker). Neither input_values nor results are modified.
+        
+        Args:
+            target: Metric to move
+            value: Goal value for the target
+            direction: None for exactly value, or "at_least"/"at_most" on the
+                target's rating order (threshold labels, worst_of/best_of
+                rating_order, else Low < Moderate < High < Critical) or
+                numerically for numbers
+            inputs: Inputs that may change (defaults to every numeric input
+                upstream of target)
+            max_changes: Most inputs changed in one solution
+            limit: Number of solutions to return
+            bounds: {input: (low, high)} limits on new values
+            scales: {input: scale}; a change costs |new - old| / scale
+            max_evaluations: Search budget in plan evaluations
+        
+        Returns:
+            {"target", "goal", "direction", "baseline": current target value,
+             "solutions": [{"changes": {input: new value}, "deltas": {input: change},
+                            "cost": float, "value": target value reached}, ...],
+             "evaluations": plan evaluations used,
+             "complete": False when max_evaluations stopped the search}
+            Solutions are ranked by number of inputs changed, then cost.
+        """
+        from .goal_seek import GoalSeeker
+        seeker = GoalSeeker(self, max_changes, limit, bounds, scales, max_evaluations)
+        return seeker.seek(target, value, direction, inputs)
+
+    def impact_analysis_many(self, scenarios: List[Dict[str, Any]], executor: str = "process",
+                             max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run many what-if scenarios against one shared baseline
+        
+        Args:
+            scenarios: One changes dict per scenario, as for impact_analysis
+            executor: "process" (scales with cores), "thread" or "serial"
+            max_workers: Pool size, defaults to the CPU count
+        
+        Returns:
+            {"scenarios": [impact report per scenario],
+             "matrix": {"metrics": [...], "baseline": {...},
+                        "values": {metric: [new value or None per scenario]},
+                        "deltas": {metric: [new - old or None per scenario]}}}
+        """
+        if executor not in ("process", "thread", "serial"):
+            raise ValueError(f"Unsupported executor: {executor}")
+        # Imported here: pool support pulls in multiprocessing, which workers
+        # that never fan out should not pay for at import time
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        
+        plan = self._compiled_plan()
+        baseline = self._baseline_values()
+        workers = min(max_workers or os.cpu_count() or 1, len(scenarios))
+        
+        if executor == "serial" or workers <= 1:
+            reports = [self._impact_report(baseline, changes) for changes in scenarios]
+        elif executor == "thread":
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                reports = list(pool.map(lambda changes: self._impact_report(baseline, changes), scenarios))
+        else:
+            # Each worker rebuilds the evaluator once, seeded with this baseline
+            chunksize = max(1, len(scenarios) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_scenario_worker,
+                                     initargs=(self.metrics, dict(self.input_values), baseline)) as pool:
+                reports = list(pool.map(_run_scenario, scenarios, chunksize=chunksize))
+        
+        return {"scenarios": reports, "matrix": self._scenario_matrix(plan, baseline, reports)}
+
+    def _scenario_matrix(self, plan: "ExecutionPlan", baseline: List[Any],
+                         reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Metric-by-scenario view of the metrics affected in any scenario"""
+        affected = set()
+        for report in reports:
+            affected.update(report["affected_metrics"])
+        metrics = [m_id for m_id in self.metrics if m_id in affected]
+        
+        values = {m_id: [None] * len(reports) for m_id in metrics}
+        deltas = {m_id: [None] * len(reports) for m_id in metrics}
+        for i, report in enumerate(reports):
+            for m_id, change in report["affected_metrics"].items():
+                old_value, new_value = change["old_value"], change["new_value"]
+                values[m_id][i] = new_value
+                if _is_number(old_value) and _is_number(new_value):
+                    deltas[m_id][i] = new_value - old_value
+        
+        return {
+            "metrics": metrics,
+            "baseline": {m_id: baseline[plan.metric_slots[m_id]] for m_id in metrics},
+            "values": values,
+            "deltas": deltas
+        }
+
+    def _metric_positions(self) -> Dict[str, int]:
+        """Index of each metric in configuration order"""
+        if self._positions is None:
+            self._positions = {m_id: i for i, m_id in enumerate(self.metrics)}
+        return self._positions
+
+    def get_metric_dependencies(self, metric_id: str) -> List[str]:
+        """Get all dependencies (direct and indirect) for a metric"""
+        return self.config.dependency_index().upstream(metric_id)
+
+    def get_metric_dependents(self, node_id: str) -> List[str]:
+        """Get all metrics depending (directly or indirectly) on a metric or input"""
+        return self.config.dependency_index().downstream(node_id)
+
+    def get_shared_dependencies(self, first_id: str, second_id: str) -> List[str]:
+        """Get the dependencies two metrics have in common"""
+        return self.config.dependency_index().shared_upstream(first_id, second_id)
+
+    def _decision_tree_view(self, focus: Optional[str], direction: str,
+                            changes: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if self.results:
+            results = dict(self.results.values)
+        else:
+            results = dict(zip(self._compiled_plan().order, self._baseline_values()))
+        return {
+            "results": results,
+            "input_values": self.input_values,
+            "focus": focus,
+            "direction": direction,
+            "report": self.impact_analysis(changes) if changes else None
+        }
+
+    def render_decision_tree(self, filename: str = "decision_tree", format: str = "png",
+                             focus: Optional[str] = None, direction: str = "both",
+                             changes: Optional[Dict[str, Any]] = None, background: bool = False):
+        """
+        Render the metric graph with current values through graphviz
+        
+        Args:
+            focus: Only draw the cone around this metric or input
+            direction: "up", "down" or "both" for the focus cone
+            changes: Only draw inputs and metrics affected by impact_analysis(changes)
+            background: Render on a background thread and return a Future
+        
+        Returns:
+            Output path, or a Future for it when background is True
+        """
+        from .decision_tree import decision_tree_renderer
+        renderer = decision_tree_renderer(self.metrics)
+        return renderer.render(filename, format, background, **self._decision_tree_view(focus, direction, changes))
+
+    def decision_tree_json(self, focus: Optional[str] = None, direction: str = "both",
+                           changes: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Node/edge graph of the same view as render_decision_tree, for a web viewer"""
+        from .decision_tree import decision_tree_renderer
+        return decision_tree_renderer(self.metrics).to_json(**self._decision_tree_view(focus, direction, changes))
+
+    def export_results(self, format_type: str = "json") -> str:
+        """Export results in various formats"""
+        if format_type == "json":
+            export_data = {
+                "input_values": self.input_values,
+                "results": dict(self.results.values),
+                "metadata": {
+                    "evaluation_timestamp": datetime.now().isoformat(),
+                    "total_metrics": len(self.metrics)
+                }
+            }
+            return json.dumps(export_data, indent=2, default=str)
+        else:
+            raise ValueError(f"Unsupported export format: {format_type}")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Per-process evaluator for impact_analysis_many process pools
+_scenario_evaluator: Optional[EnhancedMetricEvaluator] = None
+
+
+def _init_scenario_worker(metrics: Dict[str, Any], input_values: Dict[str, Any], baseline: List[Any]):
+    global _scenario_evaluator
+    _scenario_evaluator = EnhancedMetricEvaluator(metrics, input_values)
+    _scenario_evaluator._baseline = (dict(input_values), baseline)
+
+
+def _run_scenario(changes: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return _scenario_evaluator._impact_report(_scenario_evaluator._baseline[1], changes)
@@ -0,0 +1,660 @@
+"""Condition and custom expressions: a whitelisted language compiled to closures"""
+import operator
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Iterable, Mapping, Sequence, Tuple
+
+
+# Names available to condition expressions
+CONDITION_FUNCTIONS = {
+    'abs': abs, 'max': max, 'min': min, 'len': len,
+    'str': str, 'int': int, 'float': float, 'bool': bool
+}
+
+# Arithmetic available to condition expressions; custom expressions get the
+# operators of the evaluator's math_operators instead
+CONDITION_OPERATORS = {
+    '+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv,
+    '//': operator.floordiv, '%': operator.mod, '**': operator.pow
+}
+
+
+def _contains(item, container):
+    return item in container
+
+
+def _not_contains(item, container):
+    return item not in container
+
+
+COMPARISON_OPERATORS = {
+    '==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge, 'in': _contains, 'not in': _not_contains,
+    'is': operator.is_, 'is not': operator.is_not
+}
+
+# ast node class names of the supported operators
+_BINARY_NODES = {"Add": "+", "Sub": "-", "Mult": "*", "Div": "/", "FloorDiv": "//", "Mod": "%", "Pow": "**"}
+_COMPARE_NODES = {"Eq": "==", "NotEq": "!=", "Lt": "<", "LtE": "<=", "Gt": ">", "GtE": ">=",
+                  "In": "in", "NotIn": "not in", "Is": "is", "IsNot": "is not"}
+_UNARY_NODES = {"UAdd": "+", "USub": "-", "Not": "not"}
+_CONSTANT_TYPES = (bool, int, float, complex, str, type(None))
+
+
+def _symbol(table: Dict[str, str], node) -> str:
+    name = type(node).__name__
+    if name not in table:
+        raise ValueError(f"operator {name} is not supported")
+    return table[name]
+
+
+def _translate(node) -> tuple:
+    """ast node -> expression tree of nested tuples"""
+    kind = type(node).__name__
+    if kind == "Constant":
+        if type(node.value) not in _CONSTANT_TYPES:
+            raise ValueError(f"constant {node.value!r} is not supported")
+        return ("const", node.value)
+    if kind == "Name":
+        return ("name", node.id)
+    if kind == "UnaryOp":
+        return ("unary", _symbol(_UNARY_NODES, node.op), _translate(node.operand))
+    if kind == "BinOp":
+        return ("binary", _symbol(_BINARY_NODES, node.op), _translate(node.left), _translate(node.right))
+    if kind == "BoolOp":
+        return ("bool", "and" if type(node.op).__name__ == "And" else "or",
+                tuple(_translate(value) for value in node.values))
+    if kind == "Compare":
+        return ("compare", _translate(node.left),
+                tuple((_symbol(_COMPARE_NODES, op), _translate(right))
+                      for op, right in zip(node.ops, node.comparators)))
+    if kind == "IfExp":
+        return ("if", _translate(node.test), _translate(node.body), _translate(node.orelse))
+    if kind == "Call":
+        if type(node.func).__name__ != "Name":
+            raise ValueError("only named functions can be called")
+        if node.keywords:
+            raise ValueError("keyword arguments are not supported")
+        return ("call", node.func.id, tuple(_translate(arg) for arg in node.args))
+    if kind in ("Tuple", "List"):
+        return (kind.lower(), tuple(_translate(item) for item in node.elts))
+    raise ValueError(f"{kind} is not supported")
+
+
+def _collect(node: tuple, names: set, calls: set, operators: set):
+    kind = node[0]
+    if kind == "name":
+        names.add(node[1])
+    elif kind == "unary":
+        _collect(node[2], names, calls, operators)
+    elif kind == "binary":
+        operators.add(node[1])
+        _collect(node[2], names, calls, operators)
+        _collect(node[3], names, calls, operators)
+    elif kind == "bool":
+        for operand in node[2]:
+            _collect(operand, names, calls, operators)
+    elif kind == "compare":
+        _collect(node[1], names, calls, operators)
+        for _, operand in node[2]:
+            _collect(operand, names, calls, operators)
+    elif kind == "if":
+        for operand in node[1:]:
+            _collect(operand, names, calls, operators)
+    elif kind == "call":
+        calls.add(node[1])
+        for operand in node[2]:
+            _collect(operand, names, calls, operators)
+    elif kind in ("tuple", "list"):
+        for operand in node[1]:
+            _collect(operand, names, calls, operators)
+
+
+def parse_expression(source: str, is_lambda: bool = False) -> "Expression":
+    """
+    Parse a condition, direct expression or (with is_lambda) custom lambda
+
+    Raises ValueError for syntax errors and for anything outside the
+    language: attribute access, subscripts, comprehensions, keyword
+    arguments, nested lambdas and so on.
+    """
+    import ast
+
+    try:
+        node = ast.parse(source, mode="eval").body
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression '{source}': {e.msg}") from None
+
+    params = None
+    if is_lambda:
+        if type(node).__name__ != "Lambda":
+            raise ValueError(f"Custom expression '{source}' is not a lambda")
+        args = node.args
+        if args.posonlyargs or args.vararg or args.kwonlyargs or args.kwarg or args.defaults:
+            raise ValueError(f"Custom expression '{source}': lambdas take plain parameters only")
+        params = tuple(arg.arg for arg in args.args)
+        node = node.body
+    try:
+        tree = _translate(node)
+    except ValueError as e:
+        raise ValueError(f"Unsupported expression '{source}': {e}") from None
+    except RecursionError:
+        raise ValueError(f"Unsupported expression '{source}': nested too deeply") from None
+    return Expression(source, tree, params)
+
+
+class Expression:
+    """
+    A parsed expression as a tree of plain tuples
+
+    The tree holds only constants, names, arithmetic, comparisons, boolean
+    logic, conditional expressions, tuple/list literals and calls of named
+    functions, so plan files can marshal it. closure() compiles it into a
+    row evaluator over a list of values; vectorize() into an evaluator over
+    whole NumPy columns. params is the parameter list of a custom lambda.
+    """
+
+    __slots__ = ("source", "tree", "params", "names", "calls", "operators")
+
+    def __init__(self, source: str, tree: tuple, params: Optional[Tuple[str, ...]] = None):
+        self.source = source
+        self.tree = tree
+        self.params = params
+        names, calls, operators = set(), set(), set()
+        _collect(tree, names, calls, operators)
+        self.names = frozenset(names)
+        self.calls = frozenset(calls)
+        self.operators = frozenset(operators)
+
+    def check(self, variables: Iterable[str], functions: Mapping[str, Any],
+              operators: Mapping[str, Any]) -> Optional[str]:
+        """Why the expression cannot run against these names, or None if it can"""
+        variables = list(dict.fromkeys(variables))
+        callable_names = set(functions)
+        if self.params is not None:
+            if set(self.params) != set(variables):
+                return (f"lambda parameters ({', '.join(self.params)}) do not match "
+                        f"dependencies ({', '.join(variables)})")
+            # Parameters shadow functions of the same name
+            callable_names.difference_update(self.params)
+        for name in sorted(self.calls - callable_names):
+            return f"'{name}' is not a callable function"
+        for name in sorted(self.names - set(variables)):
+            return f"unknown name '{name}'"
+        for symbol in sorted(self.operators - operators.keys()):
+            return f"operator '{symbol}' is not allowed"
+        return None
+
+    def _checked(self, positions: Mapping[str, int], functions: Mapping[str, Any],
+                 operators: Mapping[str, Any]):
+        problem = self.check(positions, functions, operators)
+        if problem is not None:
+            raise ValueError(f"Expression '{self.source}': {problem}")
+
+    def closure(self, positions: Mapping[str, int], functions: Mapping[str, Any],
+                operators: Mapping[str, Any]) -> Callable[[Sequence[Any]], Any]:
+        """
+        Row evaluator: reads each name from values[positions[name]], calls
+        functions by name and applies operators by symbol
+        """
+        self._checked(positions, functions, operators)
+        return _closure(self.tree, positions, functions, operators)
+
+    def vectorize(self, positions: Mapping[str, int], functions: Mapping[str, Any],
+                  operators: Mapping[str, Any], np, condition: bool = False) -> Callable[[Sequence[Any]], Any]:
+        """
+        Column evaluator: reads each name as the array columns[positions[name]]
+
+        Returns an array (or a scalar when no column is read) holding, per
+        row, what the closure would return. Numeric work runs as NumPy
+        ufuncs where that is exact; other values are computed element by
+        element with the Python operators. Call it under
+        np.errstate(all="raise") and treat any exception as "evaluate these
+        rows one at a time": errors are not attributed to rows, and the
+        columns are evaluated in full where Python would short-circuit.
+        With condition=True the result is the truth value of each row.
+        """
+        self._checked(positions, functions, operators)
+        compiler = _ArrayCompiler(np, positions, functions, operators)
+        evaluate = compiler.compile(self.tree)
+        if not condition:
+            return evaluate
+        truth = compiler.truth
+        return lambda columns: truth(evaluate(columns))
+
+
+def _closure(node: tuple, positions: Mapping[str, int], functions: Mapping[str, Any],
+             operators: Mapping[str, Any]) -> Callable[[Sequence[Any]], Any]:
+    kind = node[0]
+    if kind == "const":
+        value = node[1]
+        return lambda values: value
+    if kind == "name":
+        return operator.itemgetter(positions[node[1]])
+    if kind == "unary":
+        operand = _closure(node[2], positions, functions, operators)
+        if node[1] == "not":
+            return lambda values: not operand(values)
+        apply = operator.neg if node[1] == "-" else operator.pos
+        return lambda values: apply(operand(values))
+    if kind == "binary":
+        apply = operators[node[1]]
+        left = _closure(node[2], positions, functions, operators)
+        if node[3][0] == "const":
+            constant = node[3][1]
+            return lambda values: apply(left(values), constant)
+        right = _closure(node[3], positions, functions, operators)
+        return lambda values: apply(left(values), right(values))
+    if kind == "bool":
+        operands = tuple(_closure(operand, positions, functions, operators) for operand in node[2])
+        if node[1] == "and":
+            def evaluate(values):
+                for operand in operands:
+                    result = operand(values)
+                    if not result:
+                        return result
+                return result
+        else:
+            def evaluate(values):
+                for operand in operands:
+                    result = operand(values)
+                    if result:
+                        return result
+                return result
+        return evaluate
+    if kind == "compare":
+        first = _closure(node[1], positions, functions, operators)
+        links = tuple((COMPARISON_OPERATORS[symbol], _closure(operand, positions, functions, operators))
+                      for symbol, operand in node[2])
+        if len(links) == 1:
+            compare, second = links[0]
+            if node[2][0][1][0] == "const":
+                constant = node[2][0][1][1]
+                return lambda values: compare(first(values), constant)
+            return lambda values: compare(first(values), second(values))
+
+        def evaluate(values):
+            # a < b < c: each operand evaluated once, stopping at the first false link
+            left = first(values)
+            for compare, operand in links:
+                right = operand(values)
+                result = compare(left, right)
+                if not result:
+                    return result
+                left = right
+            return result
+        return evaluate
+    if kind == "if":
+        test, body, orelse = (_closure(operand, positions, functions, operators) for operand in node[1:])
+        return lambda values: body(values) if test(values) else orelse(values)
+    if kind == "call":
+        function = functions[node[1]]
+        args = tuple(_closure(arg, positions, functions, operators) for arg in node[2])
+        if len(args) == 1:
+            arg = args[0]
+            return lambda values: function(arg(values))
+        return lambda values: function(*[arg(values) for arg in args])
+    if kind == "tuple":
+        if all(item[0] == "const" for item in node[1]):
+            constant = tuple(item[1] for item in node[1])
+            return lambda values: constant
+        items = tuple(_closure(item, positions, functions, operators) for item in node[1])
+        return lambda values: tuple([item(values) for item in items])
+    if kind == "list":
+        items = tuple(_closure(item, positions, functions, operators) for item in node[1])
+        return lambda values: [item(values) for item in items]
+    raise ValueError(f"Unknown expression node: {kind}")
+
+
+def _make_tuple(*items):
+    return items
+
+
+def _make_list(*items):
+    return list(items)
+
+
+class _ArrayCompiler:
+    """
+    Compiles an expression tree into a function of whole columns
+
+    Values are NumPy arrays or, for constants and results that read no
+    column, plain Python values. A NumPy kernel is used only when it gives
+    the bit-identical result Python would: ints that could overflow int64 or
+    lose precision as floats, mixed types, NaN/signed-zero extremes, float
+    powers and replaced operators all go element by element through the
+    Python functions instead, on object arrays.
+    """
+
+    _UFUNCS = {'+': "add", '-': "subtract", '*': "multiply", '/': "true_divide",
+               '//': "floor_divide", '%': "remainder"}
+    _COMPARISONS = {'==': "equal", '!=': "not_equal", '<': "less", '<=': "less_equal",
+                    '>': "greater", '>=': "greater_equal"}
+
+    def __init__(self, np, positions: Mapping[str, int], functions: Mapping[str, Any],
+                 operators: Mapping[str, Any]):
+        self.np = np
+        self.positions = positions
+        self.functions = functions
+        self.operators = operators
+
+    # -----------------------------------------------------------------
+    # Value helpers
+    # -----------------------------------------------------------------
+
+    def kind(self, value) -> str:
+        """'b', 'i', 'f' for bool/int64/float64 values NumPy handles like Python, else 'O'"""
+        if isinstance(value, self.np.ndarray):
+            kind = value.dtype.kind
+            if kind == "b" or (kind in "if" and value.dtype.itemsize == 8):
+                return kind
+            return "O"
+        if type(value) is bool:
+            return "b"
+        if type(value) is int:
+            return "i" if -2 ** 62 < value < 2 ** 62 else "O"
+        if type(value) is float:
+            return "f"
+        return "O"
+
+    def bound(self, value) -> int:
+        """Largest magnitude of an int value or column"""
+        if isinstance(value, self.np.ndarray):
+            if not value.size:
+                return 0
+            return max(int(value.max()), -int(value.min()))
+        return abs(value)
+
+    def integers(self, value):
+        """bools as ints, as Python arithmetic treats them"""
+        if isinstance(value, self.np.ndarray):
+            return value.astype(self.np.int64) if value.dtype.kind == "b" else value
+        return int(value) if type(value) is bool else value
+
+    def objects(self, value):
+        """Object array of Python values; scalars become 0-d so they broadcast whole"""
+        np = self.np
+        if isinstance(value, np.ndarray):
+            return value if value.dtype.kind == "O" else value.astype(object)
+        boxed = np.empty((), dtype=object)
+        boxed[()] = value
+        return boxed
+
+    def elementwise(self, function: Callable, *values):
+        """Apply a Python function per element, exactly as the row closure would"""
+        np = self.np
+        if not any(isinstance(value, np.ndarray) for value in values):
+            return function(*values)
+        return np.frompyfunc(function, len(values), 1)(*[self.objects(value) for value in values])
+
+    def truth(self, value):
+        np = self.np
+        if not isinstance(value, np.ndarray):
+            return bool(value)
+        kind = value.dtype.kind
+        if kind == "b":
+            return value
+        if kind in "if":
+            # NaN is truthy, as in Python
+            return value != 0
+        return self.elementwise(bool, value).astype(bool)
+
+    def where(self, mask, when_true, when_false):
+        np = self.np
+        if not isinstance(mask, np.ndarray):
+            return when_true if mask else when_false
+        kind = self.kind(when_true)
+        if kind != "O" and kind == self.kind(when_false):
+            return np.where(mask, when_true, when_false)
+        # Mixed types keep each row's own Python value
+        return np.where(mask, self.objects(when_true), self.objects(when_false))
+
+    # -----------------------------------------------------------------
+    # Operations
+    # -----------------------------------------------------------------
+
+    def binary(self, symbol: str, left, right):
+        np = self.np
+        function = self.operators[symbol]
+        if (symbol not in self._UFUNCS or function is not CONDITION_OPERATORS[symbol]
+                or not any(isinstance(value, np.ndarray) for value in (left, right))):
+            return self.elementwise(function, left, right)
+        left, right = self.integers(left), self.integers(right)
+        kinds = {self.kind(left), self.kind(right)}
+        if "O" in kinds:
+            return self.elementwise(function, left, right)
+        if kinds == {"i"}:
+            if symbol == "*":
+                exact = self.bound(left) * self.bound(right) < 2 ** 63
+            elif symbol == "/":
+                exact = max(self.bound(left), self.bound(right)) < 2 ** 53
+            else:
+                exact = max(self.bound(left), self.bound(right)) < 2 ** 62
+        elif "i" in kinds:
+            # The int side is converted to float
+            integer = left if self.kind(left) == "i" else right
+            exact = self.bound(integer) < 2 ** 53
+        else:
+            exact = True
+        if not exact:
+            return self.elementwise(function, left, right)
+        return getattr(np, self._UFUNCS[symbol])(left, right)
+
+    def compare(self, symbol: str, left, right):
+        np = self.np
+        function = COMPARISON_OPERATORS[symbol]
+        if symbol not in self._COMPARISONS or not any(isinstance(v, np.ndarray) for v in (left, right)):
+            return self.elementwise(function, left, right)
+        kinds = {self.kind(left), self.kind(right)}
+        if "O" in kinds:
+            return self.elementwise(function, left, right)
+        if "f" in kinds and kinds & {"i", "b"}:
+            integer = right if self.kind(left) == "f" else left
+            if self.bound(self.integers(integer)) >= 2 ** 53:
+                return self.elementwise(function, left, right)
+        return getattr(np, self._COMPARISONS[symbol])(left, right)
+
+    def unary(self, symbol: str, operand):
+        np = self.np
+        if symbol == "not":
+            truth = self.truth(operand)
+            return np.logical_not(truth) if isinstance(truth, np.ndarray) else not truth
+        function = operator.neg if symbol == "-" else operator.pos
+        operand = self.integers(operand)
+        kind = self.kind(operand)
+        if isinstance(operand, np.ndarray) and (kind == "f" or (kind == "i" and self.bound(operand) < 2 ** 62)):
+            return np.negative(operand) if symbol == "-" else operand
+        return self.elementwise(function, operand)
+
+    def call(self, name: str, args: List[Any]):
+        np = self.np
+        function = self.functions[name]
+        if not any(isinstance(arg, np.ndarray) for arg in args):
+            return function(*args)
+        kinds = [self.kind(arg) for arg in args]
+        if len(args) == 1:
+            arg, kind = args[0], kinds[0]
+            if function is bool:
+                return self.truth(arg)
+            if kind == "b" and function in (abs, round, int):
+                return arg.astype(np.int64)
+            if kind == "i" and function in (abs, round, int) and self.bound(arg) < 2 ** 62:
+                return np.abs(arg) if function is abs else arg
+            if kind == "f" and function is abs:
+                return np.abs(arg)
+            if kind == "f" and function in (round, int) and np.isfinite(arg).all():
+                # round() halves to even like rint; int() truncates
+                whole = np.rint(arg) if function is round else np.trunc(arg)
+                if np.abs(whole).max(initial=0) < 2 ** 62:
+                    return whole.astype(np.int64)
+            if function is float and (kind in "bf" or (kind == "i" and self.bound(arg) < 2 ** 53)):
+                return arg.astype(np.float64)
+        elif function in (max, min) and len(set(kinds)) == 1 and kinds[0] in "bif":
+            # Python keeps the first of equal values; only NaN and signed zeros can tell
+            if kinds[0] != "f" or not any((np.isnan(arg) | (arg == 0)).any() for arg in args):
+                reduce = np.maximum if function is max else np.minimum
+                result = args[0]
+                for arg in args[1:]:
+                    result = reduce(result, arg)
+                return result
+        return self.elementwise(function, *args)
+
+    # -----------------------------------------------------------------
+    # Compilation
+    # -----------------------------------------------------------------
+
+    def compile(self, node: tuple) -> Callable[[Sequence[Any]], Any]:
+        kind = node[0]
+        if kind == "const":
+            value = node[1]
+            return lambda columns: value
+        if kind == "name":
+            return operator.itemgetter(self.positions[node[1]])
+        if kind == "unary":
+            symbol, operand = node[1], self.compile(node[2])
+            return lambda columns: self.unary(symbol, operand(columns))
+        if kind == "binary":
+            symbol, left, right = node[1], self.compile(node[2]), self.compile(node[3])
+            return lambda columns: self.binary(symbol, left(columns), right(columns))
+        if kind == "bool":
+            operands = [self.compile(operand) for operand in node[2]]
+            conjunction = node[1] == "and"
+
+            def evaluate(columns):
+                result = operands[0](columns)
+                for operand in operands[1:]:
+                    # a and b: b where a is true, else a; a or b the other way round
+                    value = operand(columns)
+                    truth = self.truth(result)
+                    result = self.where(truth, value, result) if conjunction else self.where(truth, result, value)
+                return result
+            return evaluate
+        if kind == "compare":
+            first = self.compile(node[1])
+            links = [(symbol, self.compile(operand)) for symbol, operand in node[2]]
+
+            def evaluate(columns):
+                left = first(columns)
+                result = None
+                for symbol, operand in links:
+                    right = operand(columns)
+                    link = self.compare(symbol, left, right)
+                    result = link if result is None else self.where(self.truth(result), link, result)
+                    left = right
+                return result
+            return evaluate
+        if kind == "if":
+            test, body, orelse = (self.compile(operand) for operand in node[1:])
+            return lambda columns: self.where(self.truth(test(columns)), body(columns), orelse(columns))
+        if kind == "call":
+            name = node[1]
+            args = [self.compile(arg) for arg in node[2]]
+            return lambda columns: self.call(name, [arg(columns) for arg in args])
+        if kind in ("tuple", "list"):
+            build = _make_tuple if kind == "tuple" else _make_list
+            items = [self.compile(item) for item in node[1]]
+            return lambda columns: self.elementwise(build, *[item(columns) for item in items])
+        raise ValueError(f"Unknown expression node: {kind}")
+
+
+class ExpressionCache:
+    """
+    Bounded LRU cache of parsed expressions
+
+    Entries are keyed by the expression source, so every evaluator sharing the
+    cache pays the parse cost once per distinct expression rather than once
+    per row per metric. Safe to share between threads.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 1:
+            raise ValueError("ExpressionCache maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[str, str], Expression]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: Tuple[str, str], build: Callable[[], Expression]) -> Expression:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Build outside the lock; parse errors propagate and are not cached
+        value = build()
+
+        with self._lock:
+            self._store(key, value)
+        return value
+
+    def _store(self, key: Tuple[str, str], value: Expression):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def parse(self, source: str) -> Expression:
+        """Parsed condition or direct expression"""
+        return self._get(("expr", source), lambda: parse_expression(source))
+
+    def parse_lambda(self, source: str) -> Expression:
+        """Parsed custom lambda; its params must match the metric's dependencies"""
+        return self._get(("lambda", source), lambda: parse_expression(source, is_lambda=True))
+
+    def entries(self, pairs: Iterable[Tuple[str, str]]) -> List[Tuple[str, str, tuple, Optional[tuple]]]:
+        """
+        (kind, source, tree, params) for each (kind, source) pair that parses,
+        the form preload() takes back; kind "lambda" is a custom lambda and
+        anything else a condition or direct expression
+        """
+        entries = []
+        for kind, source in pairs:
+            try:
+                if kind == "lambda":
+                    expression = self.parse_lambda(source)
+                else:
+                    kind, expression = "expr", self.parse(source)
+            except (TypeError, ValueError):
+                # Rejected again, with the same error, when the config is validated
+                continue
+            entries.append((kind, source, expression.tree, expression.params))
+        return entries
+
+    def preload(self, entries: Iterable[Tuple[str, str, tuple, Optional[tuple]]]):
+        """
+        Seed the cache with already parsed (kind, source, tree, params) entries
+
+        Plan files use this to skip parsing sources, and with it importing ast.
+        """
+        for kind, source, tree, params in entries:
+            expression = Expression(source, tree, params)
+            with self._lock:
+                self._store((kind, source), expression)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+# Process-wide cache shared by evaluators that are not given their own
+shared_expression_cache = ExpressionCache()
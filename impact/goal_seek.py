@@ -0,0 +1,301 @@
+"""Goal seeking: smallest input changes that give a metric a wanted value"""
+import heapq
+import math
+from itertools import combinations
+from typing import Dict, Any, List, Optional, Callable, Iterable, Tuple
+
+from .ratings import STANDARD_RATING_ORDER, RatingScale, rating_scale
+from .sensitivity import SensitivityAnalyzer
+
+
+def _nearest(value_range: Dict[str, Any], x: float, integer: bool) -> Optional[float]:
+    """Point of a range closest to x (None when an integer is wanted and it holds none)"""
+    low, high = value_range["low"], value_range["high"]
+    if x < low or (x == low and not value_range["low_inclusive"]):
+        if integer:
+            point = math.ceil(low)
+            if point == low and not value_range["low_inclusive"]:
+                point += 1
+        else:
+            point = low if value_range["low_inclusive"] else math.nextafter(low, math.inf)
+    elif high < x or (x == high and not value_range["high_inclusive"]):
+        if integer:
+            point = math.floor(high)
+            if point == high and not value_range["high_inclusive"]:
+                point -= 1
+        else:
+            point = high if value_range["high_inclusive"] else math.nextafter(high, -math.inf)
+    else:
+        return x
+    inside = ((low < point or (value_range["low_inclusive"] and low == point))
+              and (point < high or (value_range["high_inclusive"] and high == point)))
+    return point if inside else None
+
+
+def _covers(ranges: List[Dict[str, Any]], low: float, high: float) -> bool:
+    """Whether contiguous constant ranges span all of [low, high]"""
+    if not ranges or ranges[0]["low"] != low or ranges[-1]["high"] != high:
+        return False
+    return all(first["high"] == second["low"] and first["high_inclusive"] != second["low_inclusive"]
+               for first, second in zip(ranges, ranges[1:]))
+
+
+class GoalSeeker:
+    """
+    Ranks the smallest sets of input changes that bring a target metric to a goal
+
+    The search works back from the target: only numeric inputs upstream of
+    it are tried, and each is reduced to a handful of candidate values with
+    SensitivityAnalyzer. An input's candidates are the nearest point of
+    every range over which the metrics it feeds stay constant; values that
+    give those metrics the same values are interchangeable, so only the
+    nearest one is kept. Inputs that already hold integers only move to
+    integers.
+
+    Change sets are then tried with fewer inputs first and, for each size,
+    best-first by cost (the sum of |change| / scale per input), so results
+    come out ranked and the search stops once limit goals are reached. A
+    set that makes every move of a solution already found, at least as far
+    in the same direction, is not tried. Every solution is checked against
+    the plan.
+
+    An input that meets another varying input in a weighted_sum or other
+    arithmetic has its candidates computed with the other inputs at their
+    current values; solutions that move both stay correct but may not be
+    the smallest possible.
+    """
+
+    def __init__(self, evaluator: "EnhancedMetricEvaluator", max_changes: int = 3, limit: int = 5,
+                 bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+                 scales: Optional[Dict[str, float]] = None, max_evaluations: int = 10000):
+        if max_changes < 1 or limit < 1:
+            raise ValueError("max_changes and limit must be at least 1")
+        self.evaluator = evaluator
+        self.plan: Optional["ExecutionPlan"] = None
+        self.baseline: List[Any] = []
+        self.max_changes = max_changes
+        self.limit = limit
+        self.bounds = bounds or {}
+        self.scales = scales or {}
+        self.max_evaluations = max_evaluations
+        self.evaluations = 0
+
+    def seek(self, target: str, value: Any, direction: Optional[str] = None,
+             inputs: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Ranked change sets for one goal; see EnhancedMetricEvaluator.goal_seek"""
+        if target not in self.evaluator.metrics:
+            raise ValueError(f"Unknown target metric: {target}")
+        # Only the target's upstream closure is ever evaluated
+        plan = self.plan = self.evaluator.compile(targets=[target])
+        self.baseline = plan.run_values(self.evaluator.input_values)
+        slot = plan.metric_slots[target]
+        reached = self._goal(target, value, direction)
+        current = self.baseline[slot]
+        report = {
+            "target": target,
+            "goal": value,
+            "direction": direction,
+            "baseline": current,
+            "solutions": [],
+            "evaluations": 0,
+            "complete": True
+        }
+        if reached(current):
+            report["solutions"].append({"changes": {}, "deltas": {}, "cost": 0, "value": current})
+            return report
+
+        analyzer = SensitivityAnalyzer(self.evaluator, plan, self.baseline)
+        names = self._inputs(analyzer, slot, inputs)
+        candidates = self._candidates(analyzer, slot, names)
+        self.evaluations = analyzer.evaluations
+        report["solutions"], report["complete"] = self._search(slot, reached, names, candidates)
+        report["evaluations"] = self.evaluations
+        return report
+
+    # -----------------------------------------------------------------
+    # Goal and inputs
+    # -----------------------------------------------------------------
+
+    def _goal(self, target: str, value: Any, direction: Optional[str]) -> Callable[[Any], bool]:
+        """Predicate on the target's value"""
+        if direction is None:
+            return lambda result: result == value
+        if direction not in ("at_least", "at_most"):
+            raise ValueError(f"Unsupported goal direction: {direction}")
+        at_least = direction == "at_least"
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            def numeric(result):
+                if not isinstance(result, (int, float)):
+                    return False
+                return result >= value if at_least else result <= value
+            return numeric
+
+        scale = self._rating_scale(self.evaluator.metrics[target])
+        code = scale.encode(value)
+        if code is None:
+            raise ValueError(f"'{value}' is not on the rating order of {target}")
+
+        def ordinal(result):
+            result_code = scale.encode(result)
+            if result_code is None:
+                return False
+            return result_code >= code if at_least else result_code <= code
+        return ordinal
+
+    @staticmethod
+    def _rating_scale(metric: Dict[str, Any]) -> RatingScale:
+        """Order of the ratings a metric produces, as used by at_least/at_most"""
+        if metric["type"] == "threshold":
+            return rating_scale(metric.get("labels", ["Low", "Moderate", "High", "Critical"]))
+        order = metric.get("expression", {})
+        if isinstance(order, dict) and "rating_order" in order:
+            return rating_scale(order["rating_order"])
+        return rating_scale(STANDARD_RATING_ORDER)
+
+    def _inputs(self, analyzer: SensitivityAnalyzer, slot: int,
+                inputs: Optional[Iterable[str]]) -> List[str]:
+        """Numeric inputs the target depends on, or the requested ones checked"""
+        plan = self.plan
+        names = list(inputs) if inputs is not None else [name for name, _ in plan.input_spec]
+        usable = []
+        for name in names:
+            input_slot = plan.input_slots.get(name)
+            current = self.baseline[input_slot] if input_slot is not None else None
+            numeric = isinstance(current, (int, float)) and not isinstance(current, bool)
+            upstream = input_slot is not None and slot in analyzer._downstream(input_slot)
+            if numeric and upstream:
+                usable.append(name)
+            elif inputs is not None:
+                reason = "is not numeric" if input_slot is not None and upstream else "does not affect the target"
+                raise ValueError(f"Input '{name}' {reason}")
+        return usable
+
+    # -----------------------------------------------------------------
+    # Candidates
+    # -----------------------------------------------------------------
+
+    def _candidates(self, analyzer: SensitivityAnalyzer, slot: int,
+                    names: List[str]) -> List[List[Tuple[float, Any]]]:
+        """Per input: (cost, value) of each distinct way to move it, cheapest first"""
+        plan = self.plan
+        closure = set(analyzer._needed([slot], set(range(len(plan.order)))))
+        downstream = {name: analyzer._downstream(plan.input_slots[name]) & closure for name in names}
+        owners: Dict[int, set] = {}
+        for name, metrics in downstream.items():
+            for m_slot in metrics:
+                owners.setdefault(m_slot, set()).add(name)
+
+        candidates = []
+        for name in names:
+            # Watch the metrics only this input moves that something else
+            # reads, unless it meets another input directly
+            private = {m for m in downstream[name] if owners[m] == {name}}
+            mixed = any(owners[m] != {name} for m in plan.dependents[plan.input_slots[name]] if m in closure)
+            everything = sorted(downstream[name])
+            if mixed:
+                watched = everything
+            else:
+                watched = sorted(m for m in private
+                                 if m == slot or any(owners[r] != {name} for r in plan.dependents[m] if r in closure))
+            candidates.append(self._input_candidates(analyzer, name, watched, everything))
+        return candidates
+
+    def _input_candidates(self, analyzer: SensitivityAnalyzer, name: str,
+                          watched: List[int], everything: List[int]) -> List[Tuple[float, Any]]:
+        """
+        Candidates for one input: the nearest point of each range of the
+        watched metrics, one per distinct set of watched values. When the
+        input is mixed into arithmetic with other inputs (everything is
+        watched) or a watched metric varies continuously, every point is
+        distinct.
+        """
+        plan = self.plan
+        current = self.baseline[plan.input_slots[name]]
+        low, high = self.bounds.get(name, (None, None))
+        result = analyzer.analyze(name, low, high, [plan.order[m] for m in watched])
+        mixed = watched is everything
+        if not mixed and not all(_covers(info["ranges"], result["low"], result["high"])
+                                 for info in result["metrics"].values()):
+            mixed = True
+            watched = everything
+            result = analyzer.analyze(name, low, high, [plan.order[m] for m in watched])
+        integer = isinstance(current, int)
+        scale = self.scales.get(name, 1)
+
+        def signature(x):
+            values = analyzer._evaluate(x)
+            return (x,) if mixed else tuple(values[m] for m in watched)
+
+        unchanged = signature(current)
+        best: Dict[Any, Tuple[float, Any]] = {}
+        for info in result["metrics"].values():
+            for value_range in info["ranges"]:
+                point = _nearest(value_range, current, integer)
+                if point is None or point == current:
+                    continue
+                key = signature(point)
+                if key == unchanged:
+                    continue
+                cost = abs(point - current) / scale
+                if key not in best or cost < best[key][0]:
+                    best[key] = (cost, point)
+        return sorted(best.values(), key=lambda candidate: candidate[0])
+
+    # -----------------------------------------------------------------
+    # Search
+    # -----------------------------------------------------------------
+
+    def _search(self, slot: int, reached: Callable[[Any], bool], names: List[str],
+                candidates: List[List[Tuple[float, Any]]]) -> Tuple[List[Dict[str, Any]], bool]:
+        """Best-first over change sets of growing size; returns (solutions, complete)"""
+        plan = self.plan
+        solutions: List[Dict[str, Any]] = []
+        movable = [i for i, options in enumerate(candidates) if options]
+        for size in range(1, min(self.max_changes, len(movable)) + 1):
+            heap = []
+            for subset in combinations(movable, size):
+                indices = (0,) * size
+                heap.append((self._cost(candidates, subset, indices), subset, indices))
+            heapq.heapify(heap)
+            seen = set()
+            while heap:
+                if self.evaluations >= self.max_evaluations:
+                    return solutions, False
+                cost, subset, indices = heapq.heappop(heap)
+                for position in range(size):
+                    following = indices[:position] + (indices[position] + 1,) + indices[position + 1:]
+                    if following[position] < len(candidates[subset[position]]) and (subset, following) not in seen:
+                        seen.add((subset, following))
+                        heapq.heappush(heap, (self._cost(candidates, subset, following), subset, following))
+
+                changes = {names[i]: candidates[i][j][1] for i, j in zip(subset, indices)}
+                if any(self._dominates(solution, changes) for solution in solutions):
+                    continue
+                self.evaluations += 1
+                result = plan.propagate(self.baseline, changes)[0][slot]
+                if reached(result):
+                    solutions.append({
+                        "changes": changes,
+                        "deltas": {name: new - self.baseline[plan.input_slots[name]] for name, new in changes.items()},
+                        "cost": cost,
+                        "value": result
+                    })
+                    if len(solutions) >= self.limit:
+                        return solutions, True
+        return solutions, True
+
+    def _dominates(self, solution: Dict[str, Any], changes: Dict[str, Any]) -> bool:
+        """Whether changes makes every move of a solution, at least as far in the same direction"""
+        input_slots = self.plan.input_slots
+        for name, delta in solution["deltas"].items():
+            if name not in changes:
+                return False
+            moved = changes[name] - self.baseline[input_slots[name]]
+            if not (0 < delta <= moved or moved <= delta < 0):
+                return False
+        return True
+
+    @staticmethod
+    def _cost(candidates: List[List[Tuple[float, Any]]], subset: Tuple[int, ...],
+              indices: Tuple[int, ...]) -> float:
+        return sum(candidates[i][j][0] for i, j in zip(subset, indices))
@@ -0,0 +1,166 @@
+"""Monte Carlo rule-usage simulation across worker processes"""
+import os
+import random
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .config import get_eval_order
+from .rule_usage import BranchCounters, RuleUsageMetricEvaluator, generate_decision_tree
+
+
+def _make_sampler(rng, spec):
+    """Bind a distribution spec such as ("randint", lo, hi) to a shard's RNG"""
+    if callable(spec):
+        return partial(spec, rng)
+    kind, *args = spec
+    if kind == "randint":
+        return partial(rng.randint, *args)
+    if kind == "uniform":
+        return partial(rng.uniform, *args)
+    if kind == "normal":
+        return partial(rng.gauss, *args)
+    if kind == "choice":
+        return partial(rng.choice, list(args[0]))
+    if kind == "constant":
+        return lambda: args[0]
+    raise ValueError(f"Unknown distribution: {kind}")
+
+def _run_monte_carlo_shard(metrics, distributions, lookup_matrices, seed, shard, iterations):
+    """Run one shard with its own seeded RNG; returns mergeable counters"""
+    rng = random.Random(f"{seed}:{shard}")
+    samplers = [(name, _make_sampler(rng, spec)) for name, spec in distributions.items()]
+    evaluator = RuleUsageMetricEvaluator(metrics, {}, lookup_matrices)
+    order = get_eval_order(metrics)
+
+    counts = defaultdict(Counter)
+    numeric = {}  # metric -> [count, sum, sum of squares, min, max]
+    results = {}
+    for _ in range(iterations):
+        evaluator.input_values = {name: draw() for name, draw in samplers}
+        evaluator.results = {}
+        results = evaluator.run_evaluation(order)
+        for m_id, value in results.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                summary = numeric.get(m_id)
+                if summary is None:
+                    numeric[m_id] = [1, value, value * value, value, value]
+                else:
+                    summary[0] += 1
+                    summary[1] += value
+                    summary[2] += value * value
+                    summary[3] = min(summary[3], value)
+                    summary[4] = max(summary[4], value)
+            else:
+                counts[m_id][value] += 1
+
+    return {"branch_usage": evaluator.branch_counters.export(), "counts": dict(counts),
+            "numeric": numeric, "last_results": dict(results)}
+
+class MonteCarloDriver:
+    """
+    Reproducible Monte Carlo runs of RuleUsageMetricEvaluator
+
+    Iterations are split into fixed-size shards, each with its own seed
+    derived from (seed, shard index), so results do not depend on how many
+    workers run them. Shards run on a process pool and their branch
+    counters and result distributions are merged in shard order.
+
+    Distributions map each input to a spec: ("randint", lo, hi),
+    ("uniform", lo, hi), ("normal", mu, sigma), ("choice", values),
+    ("constant", value) or a picklable callable taking the RNG.
+    """
+
+    def __init__(self, metrics, distributions, lookup_matrices=None, seed=0, shard_size=10000):
+        self.metrics = metrics
+        self.distributions = distributions
+        self.lookup_matrices = lookup_matrices or {}
+        self.seed = seed
+        self.shard_size = shard_size
+
+    def run(self, iterations, max_workers=None, executor="process"):
+        shards = []
+        for shard, start in enumerate(range(0, iterations, self.shard_size)):
+            shards.append((self.metrics, self.distributions, self.lookup_matrices,
+                           self.seed, shard, min(self.shard_size, iterations - start)))
+
+        workers = min(max_workers or os.cpu_count() or 1, len(shards))
+        if executor == "serial" or workers <= 1:
+            outcomes = [_run_monte_carlo_shard(*args) for args in shards]
+        elif executor == "process":
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(_run_monte_carlo_shard, *zip(*shards)))
+        else:
+            raise ValueError(f"Unsupported executor: {executor}")
+
+        return self._merge(iterations, outcomes)
+
+    def _merge(self, iterations, outcomes):
+        branch_usage = BranchCounters(self.metrics, self.lookup_matrices)
+        counts = defaultdict(Counter)
+        numeric = {}
+        for outcome in outcomes:
+            branch_usage.merge(outcome["branch_usage"])
+            for m_id, values in outcome["counts"].items():
+                counts[m_id].update(values)
+            for m_id, (n, total, squares, low, high) in outcome["numeric"].items():
+                if m_id in numeric:
+                    merged = numeric[m_id]
+                    numeric[m_id] = [merged[0] + n, merged[1] + total, merged[2] + squares,
+                                     min(merged[3], low), max(merged[4], high)]
+                else:
+                    numeric[m_id] = [n, total, squares, low, high]
+
+        distributions = {}
+        for m_id in self.metrics:
+            summary = None
+            if m_id in numeric:
+                n, total, squares, low, high = numeric[m_id]
+                mean = total / n
+                summary = {"count": n, "mean": mean, "min": low, "max": high,
+                           "std": max(squares / n - mean * mean, 0) ** 0.5}
+            distributions[m_id] = {"counts": dict(counts.get(m_id, {})), "numeric": summary}
+
+        return {
+            "iterations": iterations,
+            "shards": len(outcomes),
+            "seed": self.seed,
+            "rule_usage": branch_usage.rule_usage(),
+            "branch_usage": branch_usage,
+            "metric_usage": branch_usage.per_metric(),
+            "distributions": distributions,
+            "last_results": outcomes[-1]["last_results"] if outcomes else {}
+        }
+
+
+# ------------------------
+# Run Aggregated Analysis
+# ------------------------
+if __name__ == "__main__":
+    rule_config = {
+        "metrics": {
+            "K": {"type": "custom", "dependencies": ["J"], "expression": "lambda J: abs(J)"},
+            "L": {"type": "custom", "dependencies": ["K"], "expression": "lambda K: K > 0"},
+            "M": {"type": "threshold", "dependencies": ["L"], "expression": [50000000, 200000000, 800000000]},
+            "O": {"type": "custom", "dependencies": ["N"], "expression": "lambda N: abs(N)"},
+            "O1": {"type": "custom", "dependencies": ["O"], "expression": "lambda O: O > 0"},
+            "P": {"type": "threshold", "dependencies": ["O1"], "expression": [800000000, 5000000000, 10000000000]},
+            "S": {"type": "custom", "dependencies": ["N", "Q", "R"], "expression": "lambda N, Q, R: abs((N - Q) - (R - Q)) / 2 if N != 'N/A' and Q != 'N/A' and R != 'N/A' else 'N/A'"},
+            "T": {"type": "threshold", "dependencies": ["S"], "expression": [500000000, 800000000, 5000000000]},
+            "U": {"type": "custom", "dependencies": ["Q"], "expression": "lambda Q: abs(Q) > 0"},
+            "V": {"type": "custom", "dependencies": ["T", "P", "S", "O"], "expression": "lambda T, P, S, O: S if lookup(T, P) == T else O"},
+            "W": {"type": "custom", "dependencies": ["T", "P", "S", "V"], "expression": "lambda T, P, S, V: T if V == S else P"},
+            "X": {"type": "custom", "dependencies": ["M", "W"], "expression": "lambda M, W: 'GMS' if lookup(M, W) == M else 'NII' if lookup(M, W) == W else 'N/A'"},
+            "AB": {"type": "custom", "dependencies": ["X", "M", "W"], "expression": "lambda X, M, W: M if X == 'GMS' else W if X == 'NII' else 'N/A'"}
+        }
+    }
+
+    driver = MonteCarloDriver(rule_config["metrics"], {
+        "J": ("randint", -300000000, 300000000),
+        "N": ("randint", 500000000, 3000000000),
+        "Q": ("randint", 200000000, 2000000000),
+        "R": ("randint", 400000000, 2500000000)
+    }, seed=42)
+    simulation = driver.run(10000)
+
+    generate_decision_tree(rule_config["metrics"], simulation["last_results"], simulation["branch_usage"])
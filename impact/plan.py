@@ -0,0 +1,674 @@
+"""Compiled execution plans"""
+import heapq
+import logging
+import operator
+import time
+from collections import OrderedDict
+from math import copysign
+from typing import Dict, Any, List, Union, Optional, Callable, Iterable, Iterator, Tuple
+
+from .expressions import CONDITION_FUNCTIONS, CONDITION_OPERATORS
+from .profiling import MetricProfiler
+from .ratings import RatingScale, STANDARD_RATING_SCALE, rating_scale
+
+logger = logging.getLogger(__name__)
+
+
+class _MissingType:
+    """Marks an optional name that was absent from the input dict"""
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        # Unpickle to the module singleton so identity checks survive workers
+        return "_MISSING"
+
+    def __repr__(self):
+        return "<missing>"
+
+
+_MISSING = _MissingType()
+
+
+# Metric types memoized by compile(memoize=True): pure types whose work
+# outweighs a dictionary lookup. Other built-in types can be named explicitly.
+DEFAULT_MEMO_TYPES = frozenset({
+    "map_rating", "map_score", "lookup", "weighted_sum", "custom", "conditional",
+    "conditional_rating", "worst_of", "best_of", "rating_worst", "rating_best",
+    "if_then_else", "fallback", "coalesce", "priority_select"
+})
+
+
+class MemoCache:
+    """
+    Bounded LRU memo of one metric's results, keyed by the values it reads
+
+    Keys hold each value together with its type, so 1, 1.0 and True never
+    share an entry, and float zeros also with their sign, so 0.0 and -0.0
+    do not either. Unhashable inputs and errors are not cached. Results
+    are shared between hits, so memoized metrics should return immutable
+    values.
+    """
+
+    __slots__ = ("maxsize", "hits", "misses", "evictions", "entries")
+
+    def __init__(self, maxsize: int = 4096):
+        if maxsize < 1:
+            raise ValueError("MemoCache maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entries: "OrderedDict[Tuple[Any, ...], Any]" = OrderedDict()
+
+    def wrap(self, evaluate: Callable[[List[Any]], Any],
+             read_slots: Tuple[int, ...]) -> Callable[[List[Any]], Any]:
+        """Memoized version of a plan closure reading read_slots"""
+        entries = self.entries
+        getter = operator.itemgetter(*read_slots) if read_slots else (lambda values: ())
+        single = len(read_slots) == 1
+
+        def memoized(values):
+            args = getter(values)
+            if single:
+                key = (args, type(args))
+                if key[1] is float and args == 0:
+                    key = (args, float, copysign(1, args))
+            else:
+                types = tuple(map(type, args))
+                key = (args, types)
+                if float in types and any(t is float and a == 0 for a, t in zip(args, types)):
+                    key = (args, types, tuple(copysign(1, a) if t is float else 0 for a, t in zip(args, types)))
+            try:
+                result = entries[key]
+            except KeyError:
+                pass
+            except TypeError:
+                return evaluate(values)
+            else:
+                self.hits += 1
+                try:
+                    entries.move_to_end(key)
+                except KeyError:
+                    pass
+                return result
+
+            self.misses += 1
+            result = evaluate(values)
+            entries[key] = result
+            if len(entries) > self.maxsize:
+                try:
+                    entries.popitem(last=False)
+                    self.evictions += 1
+                except KeyError:
+                    pass
+            return result
+        return memoized
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+class ExecutionPlan:
+    """
+    Frozen evaluation plan compiled from a metric configuration
+
+    Evaluation order, metric parameters and dependency lookups are resolved
+    once by PlanCompiler. Every metric becomes a closure that reads its
+    dependencies from integer slots in a flat value list, so running the plan
+    against another input dict is a single pass with no dict or dispatch
+    lookups per metric.
+
+    Slot layout: [metrics in evaluation order | input names]
+    """
+
+    __slots__ = ("order", "types", "input_spec", "metric_slots", "input_slots", "dependency_slots",
+                 "read_slots", "dependents", "memos", "_steps", "_size")
+
+    def __init__(self, order: List[str], input_spec: List[Tuple[str, bool]],
+                 steps: List[Tuple[int, Callable[[List[Any]], Any]]],
+                 dependency_slots: List[Tuple[int, ...]], read_slots: List[Tuple[int, ...]],
+                 types: Optional[List[str]] = None, memos: Optional[Dict[str, MemoCache]] = None):
+        self.order = tuple(order)
+        self.types = tuple(types) if types is not None else ("",) * len(self.order)
+        self.memos = memos or {}
+        self.input_spec = tuple(input_spec)  # (name, required) per input slot
+        self.metric_slots = {m_id: slot for slot, m_id in enumerate(self.order)}
+        # Per metric: slots of its declared dependencies, in declaration order,
+        # and every slot its closure may read (including literal-or-name refs)
+        self.dependency_slots = tuple(dependency_slots)
+        self.read_slots = tuple(read_slots)
+        self._steps = tuple(steps)
+        self._size = len(self.order)
+        self.input_slots = {name: self._size + i for i, (name, _) in enumerate(self.input_spec)}
+
+        # Reverse index: for every slot, the metric slots that read it
+        dependents: List[List[int]] = [[] for _ in range(self._size + len(self.input_spec))]
+        for metric_slot, reads in enumerate(self.read_slots):
+            for slot in reads:
+                dependents[slot].append(metric_slot)
+        self.dependents = tuple(tuple(d) for d in dependents)
+
+    @property
+    def steps(self) -> Tuple[Tuple[int, Callable[[List[Any]], Any]], ...]:
+        """(slot, evaluate) per metric in evaluation order"""
+        return self._steps
+
+    @property
+    def input_names(self) -> List[str]:
+        """Inputs that must be present in every input dict"""
+        return [name for name, required in self.input_spec if required]
+
+    def memo_stats(self) -> Dict[str, Any]:
+        """Per-metric memo statistics plus totals (empty when nothing is memoized)"""
+        if not self.memos:
+            return {}
+        per_metric = {m_id: memo.stats() for m_id, memo in self.memos.items()}
+        hits = sum(s["hits"] for s in per_metric.values())
+        lookups = hits + sum(s["misses"] for s in per_metric.values())
+        return {
+            "metrics": per_metric,
+            "hits": hits,
+            "lookups": lookups,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+    def clear_memos(self):
+        for memo in self.memos.values():
+            memo.clear()
+
+    def _load_inputs(self, input_values: Dict[str, Any]) -> List[Any]:
+        values = [None] * self._size
+        try:
+            values.extend([input_values[name] if required else input_values.get(name, _MISSING)
+                           for name, required in self.input_spec])
+        except KeyError as e:
+            raise ValueError(f"Dependency '{e.args[0]}' not found in results or inputs") from None
+        return values
+
+    def run_values(self, input_values: Dict[str, Any],
+                   profiler: Optional[MetricProfiler] = None) -> List[Any]:
+        """Evaluate every metric and return the raw slot list"""
+        values = self._load_inputs(input_values)
+        if profiler is not None:
+            return self._run_timed(values, profiler)[0]
+        slot = 0
+        try:
+            for slot, evaluate in self._steps:
+                values[slot] = evaluate(values)
+        except Exception as e:
+            logger.error(f"Error evaluating metric {self.order[slot]}: {e}")
+            raise
+        return values
+
+    def _run_timed(self, values: List[Any],
+                   profiler: Optional[MetricProfiler]) -> Tuple[List[Any], List[int]]:
+        """run_values() loop that also returns per-metric nanosecond timings"""
+        order, types = self.order, self.types
+        clock = time.perf_counter_ns
+        timings = []
+        for slot, evaluate in self._steps:
+            if profiler is not None:
+                profiler.before(order[slot], types[slot])
+            start_ns = clock()
+            try:
+                values[slot] = evaluate(values)
+            except Exception as e:
+                if profiler is not None:
+                    profiler.after(order[slot], types[slot], clock() - start_ns, e)
+                logger.error(f"Error evaluating metric {order[slot]}: {e}")
+                raise
+            elapsed_ns = clock() - start_ns
+            timings.append(elapsed_ns)
+            if profiler is not None:
+                profiler.after(order[slot], types[slot], elapsed_ns, None)
+        return values, timings
+
+    def run(self, input_values: Dict[str, Any],
+            profiler: Optional[MetricProfiler] = None) -> Dict[str, Any]:
+        """Evaluate every metric in the plan for one input dict"""
+        return dict(zip(self.order, self.run_values(input_values, profiler)))
+
+    def propagate(self, baseline: List[Any], changes: Dict[str, Any]) -> Tuple[List[Any], List[int]]:
+        """
+        Re-evaluate only the metrics downstream of changed inputs
+
+        Starts from a run_values() slot list, recomputes dirty metrics in
+        evaluation order and stops following a branch as soon as a metric
+        comes out identical (same type and equal, and for float zeros the
+        same sign) to its baseline value.
+
+        Returns:
+            The updated slot list and the metric slots that were recomputed
+        """
+        values = list(baseline)
+        pending: List[int] = []
+        for name, value in changes.items():
+            slot = self.input_slots.get(name)
+            if slot is not None:
+                values[slot] = value
+                pending.extend(self.dependents[slot])
+        heapq.heapify(pending)
+
+        recomputed: List[int] = []
+        slot = -1
+        try:
+            while pending:
+                slot = heapq.heappop(pending)
+                if recomputed and recomputed[-1] == slot:
+                    continue
+                recomputed.append(slot)
+                value = self._steps[slot][1](values)
+                old = baseline[slot]
+                if value is old or (type(value) is type(old) and value == old
+                                    and (value != 0 or type(value) is not float
+                                         or copysign(1, value) == copysign(1, old))):
+                    continue
+                values[slot] = value
+                for dependent in self.dependents[slot]:
+                    heapq.heappush(pending, dependent)
+        except Exception as e:
+            logger.error(f"Error evaluating metric {self.order[slot]}: {e}")
+            raise
+        return values, recomputed
+
+    def run_many(self, rows: Iterable[Dict[str, Any]],
+                 profiler: Optional[MetricProfiler] = None) -> Iterator[Dict[str, Any]]:
+        """Evaluate the plan lazily for each input dict in rows"""
+        for input_values in rows:
+            yield self.run(input_values, profiler)
+
+    def run_table(self, rows: Iterable[Dict[str, Any]], table: Optional["ResultTable"] = None,
+                  timings: bool = False, profiler: Optional[MetricProfiler] = None) -> "ResultTable":
+        """
+        Evaluate each input dict in rows into a compact ResultTable
+
+        With timings=True (or a table that records timings) every metric's
+        latency is stored alongside its value.
+        """
+        if table is None:
+            from .table import ResultTable
+            table = ResultTable(self.order, timings=timings)
+        elif table.names != self.order:
+            raise ValueError("Result table columns do not match the plan's metrics")
+        if table.timings is None and profiler is None:
+            for input_values in rows:
+                table.append(self.run_values(input_values))
+            return table
+        for input_values in rows:
+            values, elapsed = self._run_timed(self._load_inputs(input_values), profiler)
+            table.append(values, elapsed if table.timings is not None else None)
+        return table
+
+
+class PlanCompiler:
+    """
+    Builds an ExecutionPlan from an EnhancedMetricEvaluator configuration
+
+    Each compile_* method mirrors the matching evaluate_* method on the
+    evaluator, but reads its parameters once and returns a closure over
+    dependency slots instead of re-reading the metric dict per call.
+    """
+
+    def __init__(self, evaluator: "EnhancedMetricEvaluator",
+                 memoize: Union[bool, Iterable[str]] = False, memo_size: int = 4096):
+        self.evaluator = evaluator
+        self.memoize = True if memoize is True else frozenset(memoize or ())
+        self.memo_size = memo_size
+        self._metric_slots: Dict[str, int] = {}
+        self._input_slots: Dict[str, int] = {}
+        self._input_required: Dict[str, bool] = {}
+        self._order: List[str] = []
+        self._reads: List[int] = []
+
+        self.compile_map = {
+            "threshold": self.compile_threshold,
+            "map_rating": self.compile_map_rating,
+            "map_score": self.compile_map_score,
+            "max": self.compile_max,
+            "min": self.compile_min,
+            "avg": self.compile_avg,
+            "sum": self.compile_sum,
+            "custom": self.compile_custom,
+            "conditional": self.compile_conditional,
+            "weighted_sum": self.compile_weighted_sum,
+            "percentage": self.compile_percentage,
+            "lookup": self.compile_lookup,
+            "fallback": self.compile_fallback,
+            "worst_of": self.compile_worst_of,
+            "best_of": self.compile_best_of,
+            "if_then_else": self.compile_if_then_else,
+            "coalesce": self.compile_coalesce,
+            "priority_select": self.compile_coalesce,
+            "rating_worst": self.compile_rating_worst,
+            "rating_best": self.compile_rating_best,
+            "conditional_rating": self.compile_conditional_rating
+        }
+
+    def compile(self, eval_order: List[str]) -> ExecutionPlan:
+        """Compile the metrics in eval_order into a plan"""
+        metrics = self.evaluator.metrics
+        self._order = list(eval_order)
+        steps = []
+        dependency_slots = []
+        read_slots = []
+        memos: Dict[str, MemoCache] = {}
+
+        for slot, m_id in enumerate(self._order):
+            metric = metrics[m_id]
+            mtype = metric["type"]
+            if mtype not in self.compile_map:
+                raise ValueError(f"Unknown metric type: {mtype}")
+            self._reads = []
+            dependency_slots.append(self.slots(metric.get("dependencies", [])))
+            evaluate = self.compile_map[mtype](m_id, metric)
+            reads = tuple(sorted(set(self._reads)))
+            if self._memoized(m_id, metric):
+                memo = memos[m_id] = MemoCache(self.memo_size)
+                evaluate = memo.wrap(evaluate, reads)
+            steps.append((slot, evaluate))
+            read_slots.append(reads)
+            # Only metrics earlier in the order are visible as results
+            self._metric_slots[m_id] = slot
+
+        input_spec = sorted(self._input_slots, key=self._input_slots.get)
+        return ExecutionPlan(
+            self._order,
+            [(name, self._input_required[name]) for name in input_spec],
+            steps,
+            dependency_slots,
+            read_slots,
+            [metrics[m_id]["type"] for m_id in self._order],
+            memos
+        )
+
+    def _memoized(self, m_id: str, metric: Dict[str, Any]) -> bool:
+        flag = metric.get("memoize")
+        if flag is not None:
+            return bool(flag)
+        if self.memoize is True:
+            return metric["type"] in DEFAULT_MEMO_TYPES
+        return bool(self.memoize) and (m_id in self.memoize or metric["type"] in self.memoize)
+
+    # -----------------------------------------------------------------
+    # Slot resolution
+    # -----------------------------------------------------------------
+
+    def _input_slot(self, name: str, required: bool) -> int:
+        if name not in self._input_slots:
+            self._input_slots[name] = len(self._order) + len(self._input_slots)
+            self._input_required[name] = required
+        elif required:
+            self._input_required[name] = True
+        return self._input_slots[name]
+
+    def slot(self, dep_id: str) -> int:
+        """Slot of a dependency: an earlier metric result, else a required input"""
+        if dep_id in self._metric_slots:
+            slot = self._metric_slots[dep_id]
+        else:
+            slot = self._input_slot(dep_id, required=True)
+        self._reads.append(slot)
+        return slot
+
+    def slots(self, dependencies: List[str]) -> Tuple[int, ...]:
+        return tuple(self.slot(dep) for dep in dependencies)
+
+    def reference(self, name: Any) -> Callable[[List[Any]], Any]:
+        """Resolve a value that is either a dependency name or a literal"""
+        try:
+            if name in self._metric_slots:
+                slot = self._metric_slots[name]
+                self._reads.append(slot)
+                return lambda values: values[slot]
+        except TypeError:
+            # Unhashable values can only be literals
+            return lambda values: name
+
+        slot = self._input_slot(name, required=False)
+        self._reads.append(slot)
+
+        def resolve(values):
+            value = values[slot]
+            return name if value is _MISSING else value
+        return resolve
+
+    def condition(self, condition_expr: str, dependencies: List[str]) -> Callable[[List[Any]], bool]:
+        """Compile a condition the same way _evaluate_condition evaluates it"""
+        positions = dict(zip(dependencies, self.slots(dependencies)))
+        expression = self.evaluator.expression_cache.parse(condition_expr)
+        evaluate = expression.closure(positions, CONDITION_FUNCTIONS, CONDITION_OPERATORS)
+
+        def test(values):
+            try:
+                return bool(evaluate(values))
+            except Exception as e:
+                logger.error(f"Error evaluating condition '{condition_expr}': {e}")
+                return False
+        return test
+
+    # -----------------------------------------------------------------
+    # Metric compilers
+    # -----------------------------------------------------------------
+
+    def compile_threshold(self, m_id: str, metric: Dict[str, Any]):
+        slot = self.slot(metric["dependencies"][0])
+        thresholds = metric["expression"]
+        labels = list(metric.get("labels", ["Low", "Moderate", "High", "Critical"]))
+
+        if not isinstance(thresholds, list) or len(thresholds) < 1:
+            raise ValueError(f"Metric {m_id}: Invalid thresholds format")
+
+        if len(thresholds) == 3:
+            low, moderate, high = thresholds
+
+            def evaluate(values):
+                value = values[slot]
+                if value < low:
+                    return labels[0]
+                elif value < moderate:
+                    return labels[1]
+                elif value < high:
+                    return labels[2]
+                else:
+                    return labels[3]
+            return evaluate
+
+        levels = tuple((threshold, labels[i] if i < len(labels) else f"Level_{i}")
+                       for i, threshold in enumerate(thresholds))
+        top = labels[-1] if labels else f"Level_{len(thresholds)}"
+
+        def evaluate(values):
+            value = values[slot]
+            for threshold, label in levels:
+                if value < threshold:
+                    return label
+            return top
+        return evaluate
+
+    def compile_map_rating(self, m_id: str, metric: Dict[str, Any]):
+        slot = self.slot(metric["dependencies"][0])
+        lookup = dict(metric["expression"]).get
+        default_value = metric.get("default", 0)
+        return lambda values: lookup(values[slot], default_value)
+
+    def compile_map_score(self, m_id: str, metric: Dict[str, Any]):
+        slot = self.slot(metric["dependencies"][0])
+        lookup = dict(metric["expression"]).get
+        default_value = metric.get("default", "NR")
+        return lambda values: lookup(str(values[slot]), default_value)
+
+    def _compile_extreme(self, metric: Dict[str, Any], pick: Callable):
+        slots = self.slots(metric["dependencies"])
+
+        if metric.get("numeric_only", False):
+            def evaluate(values):
+                selected = [values[s] for s in slots if isinstance(values[s], (int, float))]
+                return pick(selected) if selected else None
+        else:
+            def evaluate(values):
+                selected = [values[s] for s in slots]
+                return pick(selected) if selected else None
+        return evaluate
+
+    def compile_max(self, m_id: str, metric: Dict[str, Any]):
+        return self._compile_extreme(metric, max)
+
+    def compile_min(self, m_id: str, metric: Dict[str, Any]):
+        return self._compile_extreme(metric, min)
+
+    def compile_avg(self, m_id: str, metric: Dict[str, Any]):
+        slots = self.slots(metric["dependencies"])
+        precision = metric.get("precision", 2)
+
+        def evaluate(values):
+            numeric_values = [values[s] for s in slots if isinstance(values[s], (int, float))]
+            if not numeric_values:
+                return 0
+            return round(sum(numeric_values) / len(numeric_values), precision)
+        return evaluate
+
+    def compile_sum(self, m_id: str, metric: Dict[str, Any]):
+        slots = self.slots(metric["dependencies"])
+        return lambda values: sum([values[s] for s in slots if isinstance(values[s], (int, float))])
+
+    def compile_weighted_sum(self, m_id: str, metric: Dict[str, Any]):
+        dependencies = metric["dependencies"]
+        weights = metric["expression"]["weights"]
+
+        if len(dependencies) != len(weights):
+            raise ValueError(f"Metric {m_id}: Number of dependencies must match number of weights")
+
+        pairs = tuple(zip(self.slots(dependencies), weights))
+        precision = metric.get("precision", 2)
+        return lambda values: round(sum(values[s] * weight for s, weight in pairs), precision)
+
+    def compile_percentage(self, m_id: str, metric: Dict[str, Any]):
+        numerator_slot = self.slot(metric["dependencies"][0])
+        denominator_slot = self.slot(metric["dependencies"][1])
+        precision = metric.get("precision", 1)
+
+        def evaluate(values):
+            denominator = values[denominator_slot]
+            if denominator == 0:
+                return 0
+            return round((values[numerator_slot] / denominator) * 100, precision)
+        return evaluate
+
+    def compile_conditional(self, m_id: str, metric: Dict[str, Any]):
+        dependencies = metric["dependencies"]
+        branches = tuple((self.condition(condition["if"], dependencies), condition["then"])
+                         for condition in metric["expression"]["conditions"])
+        default_value = metric["expression"].get("default", None)
+
+        def evaluate(values):
+            for test, then in branches:
+                if test(values):
+                    return then
+            return default_value
+        return evaluate
+
+    def compile_lookup(self, m_id: str, metric: Dict[str, Any]):
+        slot = self.slot(metric["dependencies"][0])
+        lookup = dict(metric["expression"]["table"]).get
+        default_value = metric.get("default", None)
+        return lambda values: lookup(str(values[slot]), default_value)
+
+    def compile_custom(self, m_id: str, metric: Dict[str, Any]):
+        dependencies = metric["dependencies"]
+        positions = dict(zip(dependencies, self.slots(dependencies)))
+        namespace = self.evaluator.custom_namespace
+        expression = metric["expression"]
+        cache = self.evaluator.expression_cache
+        if isinstance(expression, str):
+            parsed = cache.parse_lambda(expression)
+        else:
+            parsed = cache.parse(str(expression))
+        # Reads straight from the dependency slots
+        compute = parsed.closure(positions, namespace, namespace)
+
+        def evaluate(values):
+            try:
+                return compute(values)
+            except Exception as e:
+                logger.error(f"Error in custom metric {m_id}: {e}")
+                raise ValueError(f"Custom metric evaluation failed for {m_id}: {e}")
+        return evaluate
+
+    def compile_fallback(self, m_id: str, metric: Dict[str, Any]):
+        primary_slot = self.slot(metric["dependencies"][0])
+        fallback_slot = self.slot(metric["dependencies"][1])
+        na_values = list(metric.get("expression", {}).get("na_values", ["N/A", None, ""]))
+
+        def evaluate(values):
+            primary_val = values[primary_slot]
+            return values[fallback_slot] if primary_val in na_values else primary_val
+        return evaluate
+
+    def compile_coalesce(self, m_id: str, metric: Dict[str, Any]):
+        """Shared by coalesce and priority_select, which differ only in intent"""
+        slots = self.slots(metric["dependencies"])
+        na_values = list(metric.get("expression", {}).get("na_values", ["N/A", None, ""]))
+        default_value = metric.get("expression", {}).get("default", "N/A")
+
+        def evaluate(values):
+            for s in slots:
+                value = values[s]
+                if value not in na_values:
+                    return value
+            return default_value
+        return evaluate
+
+    def compile_if_then_else(self, m_id: str, metric: Dict[str, Any]):
+        test = self.condition(metric["expression"]["condition"], metric["dependencies"])
+        if_true = self.reference(metric["expression"]["if_true"])
+        if_false = self.reference(metric["expression"]["if_false"])
+        return lambda values: if_true(values) if test(values) else if_false(values)
+
+    def _compile_ranked(self, metric: Dict[str, Any], scale: RatingScale,
+                        exclude_na: bool, worst: bool):
+        slots = self.slots(metric["dependencies"])
+        select = scale.worst if worst else scale.best
+
+        def evaluate(values):
+            return select([values[s] for s in slots], exclude_na)
+        return evaluate
+
+    def compile_worst_of(self, m_id: str, metric: Dict[str, Any]):
+        return self._compile_ranked(metric, rating_scale(metric["expression"]["rating_order"]),
+                                    metric.get("expression", {}).get("exclude_na", True), worst=True)
+
+    def compile_best_of(self, m_id: str, metric: Dict[str, Any]):
+        return self._compile_ranked(metric, rating_scale(metric["expression"]["rating_order"]),
+                                    metric.get("expression", {}).get("exclude_na", True), worst=False)
+
+    def compile_rating_worst(self, m_id: str, metric: Dict[str, Any]):
+        return self._compile_ranked(metric, STANDARD_RATING_SCALE, True, worst=True)
+
+    def compile_rating_best(self, m_id: str, metric: Dict[str, Any]):
+        return self._compile_ranked(metric, STANDARD_RATING_SCALE, True, worst=False)
+
+    def compile_conditional_rating(self, m_id: str, metric: Dict[str, Any]):
+        dependencies = metric["dependencies"]
+        rules = tuple((self.condition(rule["condition"], dependencies), self.reference(rule["return"]))
+                      for rule in metric["expression"]["rules"])
+        default_value = metric["expression"].get("default", "N/A")
+
+        def evaluate(values):
+            for test, resolve in rules:
+                if test(values):
+                    return resolve(values)
+            return default_value
+        return evaluate
@@ -0,0 +1,135 @@
+"""Versioned plan files for fast worker start-up"""
+import importlib.util
+import logging
+import marshal
+import os
+import struct
+from typing import Dict, Any, List, Union, Optional, Iterable, Tuple
+
+from .config import _identical, _metric_expressions, config_fingerprint, config_registry
+from .evaluator import EnhancedMetricEvaluator
+from .expressions import ExpressionCache, shared_expression_cache
+from .plan import ExecutionPlan
+
+logger = logging.getLogger(__name__)
+
+
+# Bump whenever the payload layout or plan semantics change
+PLAN_FORMAT_VERSION = 3
+PLAN_FILE_MAGIC = b"IMPPLAN\0"
+# magic, format version, bytecode magic of the writing interpreter, config fingerprint
+_PLAN_HEADER = struct.Struct("<8sH4s64s")
+
+
+def _placeholder_inputs(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """None for every external input, enough to construct an evaluator for compiling"""
+    return {dep: None for config in metrics.values()
+            for dep in config.get("dependencies", []) if dep not in metrics}
+
+
+def save_plan(evaluator: "EnhancedMetricEvaluator", path: str,
+              eval_order: Optional[List[str]] = None,
+              memoize: Union[bool, Iterable[str]] = False, memo_size: int = 4096,
+              targets: Optional[Iterable[str]] = None) -> ExecutionPlan:
+    """
+    Compile the evaluator's configuration and write it to a plan file
+
+    The file holds the validated config, its evaluation order, the compile
+    settings and the parsed tree of every expression, so load_plan() only
+    has to rebuild the closures. The payload is marshalled, which ties the
+    file to the interpreter version. The file is replaced atomically, so
+    workers never see a partial write.
+
+    Returns:
+        The compiled plan
+    """
+    plan = evaluator.compile(eval_order, memoize, memo_size, targets)
+    metrics = evaluator.metrics
+    if targets is None:
+        targets = evaluator.targets
+    try:
+        order: Optional[Tuple[str, ...]] = evaluator.config.eval_order()
+    except ValueError:
+        order = None
+
+    expressions = evaluator.expression_cache.entries(dict.fromkeys(
+        pair for m_id in plan.order for pair in _metric_expressions(metrics[m_id])))
+
+    payload = marshal.dumps({
+        "metrics": evaluator.config._metrics,
+        "order": order,
+        "plan_order": plan.order,
+        "targets": tuple(targets) if targets is not None else None,
+        "memoize": memoize if isinstance(memoize, bool) else tuple(sorted(memoize)),
+        "memo_size": memo_size,
+        "expressions": tuple(expressions)
+    })
+    header = _PLAN_HEADER.pack(PLAN_FILE_MAGIC, PLAN_FORMAT_VERSION, importlib.util.MAGIC_NUMBER,
+                               evaluator.config.fingerprint.encode("ascii"))
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(header)
+        handle.write(payload)
+    os.replace(temp_path, path)
+    return plan
+
+
+def load_plan(path: str, metrics: Optional[Dict[str, Any]] = None,
+              expression_cache: Optional[ExpressionCache] = None) -> ExecutionPlan:
+    """
+    Load a plan written by save_plan() without recompiling expression sources
+
+    The stored evaluation order and parsed expressions are reused, so no
+    topological sort or parsing happens. The plan is still built through an
+    evaluator, which runs the configuration checks once, against the
+    already-parsed expressions.
+
+    Raises ValueError if the file is not a plan file, was written by another
+    format version or Python bytecode version, or (when metrics is given)
+    was compiled from a different configuration.
+    """
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if len(data) < _PLAN_HEADER.size:
+        raise ValueError(f"Plan file {path} is truncated")
+    magic, version, python_magic, fingerprint = _PLAN_HEADER.unpack_from(data)
+    if magic != PLAN_FILE_MAGIC:
+        raise ValueError(f"{path} is not a plan file")
+    if version != PLAN_FORMAT_VERSION:
+        raise ValueError(f"Plan file {path} has format version {version}, expected {PLAN_FORMAT_VERSION}")
+    if python_magic != importlib.util.MAGIC_NUMBER:
+        raise ValueError(f"Plan file {path} was written by a different Python version")
+    fingerprint = fingerprint.decode("ascii")
+    if metrics is not None and config_fingerprint(metrics) != fingerprint:
+        raise ValueError(f"Plan file {path} was compiled from a different configuration")
+    try:
+        payload = marshal.loads(memoryview(data)[_PLAN_HEADER.size:])
+    except (EOFError, ValueError, TypeError) as e:
+        raise ValueError(f"Plan file {path} is corrupt: {e}") from None
+    if metrics is not None and not _identical(metrics, payload["metrics"]):
+        raise ValueError(f"Plan file {path} was compiled from a different configuration")
+
+    cache = expression_cache if expression_cache is not None else shared_expression_cache
+    cache.preload(payload["expressions"])
+    config_metrics = config_registry.preload(fingerprint, payload["metrics"], payload["order"])._metrics
+    targets = payload["targets"]
+    evaluator = EnhancedMetricEvaluator(config_metrics, _placeholder_inputs(config_metrics),
+                                        expression_cache=cache, targets=targets)
+    return evaluator.compile(list(payload["plan_order"]), payload["memoize"], payload["memo_size"], targets)
+
+
+def load_or_compile_plan(path: str, metrics: Dict[str, Any],
+                         expression_cache: Optional[ExpressionCache] = None,
+                         **compile_options) -> ExecutionPlan:
+    """
+    Load the plan file for metrics, recompiling and rewriting it if it is
+    missing, stale or unreadable; compile_options are passed to save_plan()
+    """
+    try:
+        return load_plan(path, metrics, expression_cache)
+    except (OSError, ValueError) as e:
+        logger.info(f"Recompiling plan file {path}: {e}")
+    evaluator = EnhancedMetricEvaluator(metrics, _placeholder_inputs(metrics),
+                                        expression_cache=expression_cache,
+                                        targets=compile_options.get("targets"))
+    return save_plan(evaluator, path, **compile_options)
@@ -0,0 +1,125 @@
+"""Per-metric latency statistics and profiling hooks"""
+import threading
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+
+class LatencyStats:
+    """Call count, error count and log2-bucketed latency histogram"""
+
+    __slots__ = ("calls", "errors", "total_ns", "max_ns", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        # Bucket b counts latencies in [2**(b-1), 2**b) ns
+        self.histogram = [0] * 65
+
+    def record(self, elapsed_ns: int, error: Optional[BaseException] = None):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        if error is not None:
+            self.errors += 1
+        self.histogram[min(elapsed_ns.bit_length(), 64)] += 1
+
+    def percentile_ns(self, q: float) -> int:
+        """Upper bound of the histogram bucket holding the q-th percentile"""
+        if not self.calls:
+            return 0
+        rank = q / 100 * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= rank:
+                return min(1 << bucket, self.max_ns) if bucket else 0
+        return self.max_ns
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": self.total_ns / 1e6,
+            "mean_us": self.total_ns / self.calls / 1e3 if self.calls else 0.0,
+            "p50_us": self.percentile_ns(50) / 1e3,
+            "p99_us": self.percentile_ns(99) / 1e3,
+            "max_us": self.max_ns / 1e3
+        }
+
+
+class MetricProfiler:
+    """
+    Profiling hooks for metric evaluation
+
+    When a profiler is attached, evaluators and plans call
+    before(m_id, metric_type) and after(m_id, metric_type, elapsed_ns, error)
+    around every metric; any object with those two methods can stand in for
+    this one. MetricProfiler keeps LatencyStats per metric and per metric
+    type, and runs extra callbacks registered with add_hook(). With no
+    profiler attached the evaluation loops do not read the clock at all.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._before: Dict[Tuple[str, Optional[str]], List[Callable]] = {}
+        self._after: Dict[Tuple[str, Optional[str]], List[Callable]] = {}
+        self.reset()
+
+    def reset(self):
+        """Clear the collected statistics (registered hooks are kept)"""
+        with self._lock:
+            self.by_metric: Dict[str, LatencyStats] = {}
+            self.by_type: Dict[str, LatencyStats] = {}
+
+    def add_hook(self, before: Optional[Callable[[str, str], None]] = None,
+                 after: Optional[Callable[[str, str, int, Optional[BaseException]], None]] = None,
+                 metric: Optional[str] = None, metric_type: Optional[str] = None):
+        """Register callbacks for one metric, one metric type, or every metric"""
+        if metric is not None and metric_type is not None:
+            raise ValueError("add_hook takes a metric or a metric_type, not both")
+        if metric is not None:
+            key = ("metric", metric)
+        elif metric_type is not None:
+            key = ("type", metric_type)
+        else:
+            key = ("all", None)
+        if before is not None:
+            self._before.setdefault(key, []).append(before)
+        if after is not None:
+            self._after.setdefault(key, []).append(after)
+
+    @staticmethod
+    def _callbacks(table: Dict[Tuple[str, Optional[str]], List[Callable]],
+                   m_id: str, metric_type: str) -> List[Callable]:
+        if not table:
+            return []
+        return (table.get(("all", None), []) + table.get(("metric", m_id), [])
+                + table.get(("type", metric_type), []))
+
+    def before(self, m_id: str, metric_type: str):
+        for callback in self._callbacks(self._before, m_id, metric_type):
+            callback(m_id, metric_type)
+
+    def after(self, m_id: str, metric_type: str, elapsed_ns: int,
+              error: Optional[BaseException] = None):
+        with self._lock:
+            stats = self.by_metric.get(m_id)
+            if stats is None:
+                stats = self.by_metric[m_id] = LatencyStats()
+            stats.record(elapsed_ns, error)
+            stats = self.by_type.get(metric_type)
+            if stats is None:
+                stats = self.by_type[metric_type] = LatencyStats()
+            stats.record(elapsed_ns, error)
+        for callback in self._callbacks(self._after, m_id, metric_type):
+            callback(m_id, metric_type, elapsed_ns, error)
+
+    def report(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Summaries per metric and per type, most total time first"""
+        with self._lock:
+            def ranked(stats: Dict[str, LatencyStats]) -> Dict[str, Dict[str, Any]]:
+                order = sorted(stats, key=lambda key: stats[key].total_ns, reverse=True)
+                return {key: stats[key].summary() for key in order}
+            return {"metrics": ranked(self.by_metric), "types": ranked(self.by_type)}
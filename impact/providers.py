@@ -0,0 +1,242 @@
+"""Asynchronous input providers and per-entity evaluation as inputs arrive"""
+import asyncio
+import sqlite3
+from typing import Dict, Any, List, Optional, Iterable, AsyncIterator, FrozenSet, Tuple, Union
+
+
+class InputProvider:
+    """
+    Asynchronous source of input values for many entities at once
+
+    Subclasses list the input names they can supply in `inputs` and
+    implement fetch(). AsyncEntityPipeline asks each provider only for the
+    inputs the compiled metrics read, in batches of at most batch_size
+    entities with no more than max_concurrency fetches in flight.
+    """
+
+    inputs: FrozenSet[str] = frozenset()
+    batch_size: int = 500
+    max_concurrency: int = 4
+
+    async def fetch(self, entity_ids: List[Any], names: List[str]) -> Dict[Any, Dict[str, Any]]:
+        """
+        Values of names for each entity
+
+        Returns:
+            {entity_id: {name: value}}; entities the source does not know may
+            be left out, and so may names it has no value for
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        """Release pooled resources"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class SQLiteInputProvider(InputProvider):
+    """
+    Reference provider reading one row per entity from a SQLite table
+
+    Each batch is a single "WHERE key IN (...)" query selecting only the
+    requested columns. Queries run on worker threads, each on a connection
+    from a pool of pool_size read-only connections that are opened on first
+    use and reused afterwards, so at most pool_size queries run at a time.
+    NULL columns arrive as None.
+
+    Example:
+        async with SQLiteInputProvider("entities.db", "g_values") as provider:
+            # The evaluator must know the provider to accept its inputs as present
+            evaluator = EnhancedMetricEvaluator(metrics, {}, providers=[provider])
+            results = await evaluator.evaluate_entities(ids)
+    """
+
+    def __init__(self, path: str, table: str, key: str = "entity_id",
+                 columns: Optional[Union[Dict[str, str], Iterable[str]]] = None,
+                 pool_size: int = 4, batch_size: int = 500):
+        """
+        Args:
+            path: SQLite database file
+            table: Table with one row per entity
+            key: Column holding the entity id
+            columns: Input name -> column, or column names used as input
+                names; defaults to every column but the key
+            pool_size: Connections kept, and queries run at once
+            batch_size: Entities per query (SQLite caps bound parameters)
+        """
+        if pool_size < 1 or batch_size < 1:
+            raise ValueError("pool_size and batch_size must be at least 1")
+        self.path = path
+        self.table = table
+        self.key = key
+        if columns is None:
+            columns = [column for column in self._table_columns() if column != key]
+        self.columns = dict(columns) if isinstance(columns, dict) else {column: column for column in columns}
+        self.inputs = frozenset(self.columns)
+        self.batch_size = batch_size
+        self.max_concurrency = pool_size
+        self._idle: List[sqlite3.Connection] = []
+        self._slots: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+    def _table_columns(self) -> List[str]:
+        connection = self._connect()
+        try:
+            columns = [row[1] for row in connection.execute(f"PRAGMA table_info({_quote(self.table)})")]
+        finally:
+            connection.close()
+        if not columns:
+            raise ValueError(f"Table '{self.table}' not found in {self.path}")
+        return columns
+
+    def _connect(self) -> sqlite3.Connection:
+        # Pooled connections move between worker threads, one query at a time
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA query_only = ON")
+        return connection
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Pool size limit for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots[0] is not loop:
+            self._slots = (loop, asyncio.Semaphore(self.max_concurrency))
+        return self._slots[1]
+
+    async def fetch(self, entity_ids: List[Any], names: List[str]) -> Dict[Any, Dict[str, Any]]:
+        unknown = [name for name in names if name not in self.columns]
+        if unknown:
+            raise ValueError(f"{self.table} does not provide {unknown}")
+        async with self._semaphore():
+            connection = self._idle.pop() if self._idle else None
+            try:
+                if connection is None:
+                    connection = await asyncio.to_thread(self._connect)
+                return await asyncio.to_thread(self._query, connection, entity_ids, names)
+            finally:
+                if connection is not None:
+                    self._idle.append(connection)
+
+    def _query(self, connection: sqlite3.Connection, entity_ids: List[Any],
+               names: List[str]) -> Dict[Any, Dict[str, Any]]:
+        key = _quote(self.key)
+        selected = ", ".join(_quote(self.columns[name]) for name in names)
+        placeholders = ", ".join("?" * len(entity_ids))
+        sql = f"SELECT {key}, {selected} FROM {_quote(self.table)} WHERE {key} IN ({placeholders})"
+        return {row[0]: dict(zip(names, row[1:])) for row in connection.execute(sql, entity_ids)}
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class AsyncEntityPipeline:
+    """
+    Fetches every entity's inputs from providers and evaluates each entity
+    as soon as all of them have arrived
+
+    The compiled plan declares which inputs the (target) metrics read; each
+    is routed to the first provider listing it, and inputs no provider
+    lists come from evaluator.input_values, shared by all entities. For
+    every provider the entities are split into batches of its batch_size,
+    and all batches of all providers are fetched concurrently, with at most
+    max_concurrency fetches in flight overall and at most each provider's
+    own max_concurrency against it. Fetched values override input_values.
+
+    An entity is evaluated on the event loop the moment its last batch
+    lands, while other fetches are still in flight, and stream() yields it
+    right away, so results arrive in completion order. A failed fetch or
+    evaluation cancels the outstanding fetches and is raised from stream().
+    """
+
+    def __init__(self, evaluator: "EnhancedMetricEvaluator", providers: Iterable[InputProvider],
+                 targets: Optional[Iterable[str]] = None, max_concurrency: int = 8):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.plan = evaluator.compile(targets=targets)
+        self.defaults = dict(evaluator.input_values)
+        self.providers = list(providers)
+        self.max_concurrency = max_concurrency
+
+        # Provider -> input names it is asked for
+        routed: Dict[int, List[str]] = {}
+        for name, required in self.plan.input_spec:
+            provider = next((p for p in self.providers if name in p.inputs), None)
+            if provider is not None:
+                routed.setdefault(id(provider), []).append(name)
+            elif required and name not in self.defaults:
+                raise ValueError(f"Input '{name}' has no provider and no value in input_values")
+        self.requests: List[Tuple[InputProvider, List[str]]] = [
+            (p, routed[id(p)]) for p in self.providers if id(p) in routed]
+
+    async def stream(self, entity_ids: Iterable[Any]) -> AsyncIterator[Tuple[Any, Dict[str, Any]]]:
+        """
+        Yield (entity_id, results) for every distinct entity, as each completes
+
+        Outstanding fetches are cancelled when the stream is closed; wrap it
+        in contextlib.aclosing() when leaving the loop early.
+        """
+        entity_ids = list(dict.fromkeys(entity_ids))
+        plan = self.plan
+        values = {entity: dict(self.defaults) for entity in entity_ids}
+        waiting = {entity: len(self.requests) for entity in entity_ids}
+        finished: asyncio.Queue = asyncio.Queue()
+        limit = asyncio.Semaphore(self.max_concurrency)
+        provider_limits = {id(p): asyncio.Semaphore(p.max_concurrency) for p, _ in self.requests}
+
+        def complete(entity):
+            try:
+                finished.put_nowait((entity, plan.run(values.pop(entity))))
+            except Exception as e:
+                raise ValueError(f"Entity {entity!r}: {e}") from e
+
+        async def load(provider, batch, names):
+            try:
+                async with limit, provider_limits[id(provider)]:
+                    rows = await provider.fetch(batch, names)
+                for entity in batch:
+                    row = rows.get(entity)
+                    if row:
+                        values[entity].update(row)
+                    waiting[entity] -= 1
+                    if not waiting[entity]:
+                        complete(entity)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                finished.put_nowait((None, e))
+
+        tasks = []
+        if self.requests:
+            for provider, names in self.requests:
+                size = provider.batch_size
+                for start in range(0, len(entity_ids), size):
+                    batch = entity_ids[start:start + size]
+                    tasks.append(asyncio.create_task(load(provider, batch, names)))
+        else:
+            for entity in entity_ids:
+                complete(entity)
+
+        try:
+            for _ in entity_ids:
+                entity, result = await finished.get()
+                if isinstance(result, Exception):
+                    raise result
+                yield entity, result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def evaluate(self, entity_ids: Iterable[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Results for every entity, keyed by entity id in the order given"""
+        entity_ids = list(dict.fromkeys(entity_ids))
+        results = {entity: result async for entity, result in self.stream(entity_ids)}
+        return {entity: results[entity] for entity in entity_ids}
@@ -0,0 +1,88 @@
+"""Ordinal rating scales used by the worst/best metric types"""
+from typing import Dict, Any, Optional, Iterable, Tuple
+
+
+# Values treated as "no rating" by the worst/best metric types
+NA_VALUES = ["N/A", None, ""]
+
+# No candidate seen yet (None is a valid candidate when NA values are kept)
+_NOTHING = object()
+
+
+class RatingScale:
+    """
+    Ordinal rating scale with labels interned to small integer codes
+
+    Codes follow the position of each label in the rating order (first
+    occurrence wins, like list.index), so worst/best reduce to an integer
+    max/min; the result is the first candidate holding the winning code.
+    Values outside the scale have no code. Row values stay labels: they
+    are encoded when compared, not when inputs are loaded.
+    """
+
+    def __init__(self, labels: Iterable[Any]):
+        self.labels = tuple(labels)
+        self.codes: Dict[Any, int] = {}
+        for code, label in enumerate(self.labels):
+            self.codes.setdefault(label, code)
+        self.top = len(self.labels) - 1
+
+    def encode(self, value: Any) -> Optional[int]:
+        """Code of a rating, or None when it is not on the scale"""
+        try:
+            return self.codes.get(value)
+        except TypeError:
+            return None
+
+    def _select(self, values: Iterable[Any], exclude_na: bool, worst: bool) -> Any:
+        # Stops at the first value on the extreme end of the scale, so a lazy
+        # iterable of values is only consumed as far as needed
+        # The winning candidate itself is returned, not its label, so 3.0
+        # on a [1, 2, 3] scale stays 3.0
+        extreme = self.top if worst else 0
+        first = _NOTHING
+        picked = None
+        picked_value = None
+        for value in values:
+            if exclude_na and value in NA_VALUES:
+                continue
+            if first is _NOTHING:
+                first = value
+            code = self.encode(value)
+            if code is None:
+                continue
+            if code == extreme:
+                return value
+            if picked is None or (code > picked if worst else code < picked):
+                picked = code
+                picked_value = value
+        if first is _NOTHING:
+            return "N/A"
+        if picked is None:
+            # Nothing on the scale: the first candidate is returned unchanged
+            return first
+        return picked_value
+
+    def worst(self, values: Iterable[Any], exclude_na: bool = True) -> Any:
+        """Highest rating on the scale among values"""
+        return self._select(values, exclude_na, worst=True)
+
+    def best(self, values: Iterable[Any], exclude_na: bool = True) -> Any:
+        """Lowest rating on the scale among values"""
+        return self._select(values, exclude_na, worst=False)
+
+
+STANDARD_RATING_ORDER = ("Low", "Moderate", "High", "Critical")
+_rating_scales: Dict[Tuple[Any, ...], RatingScale] = {}
+
+
+def rating_scale(rating_order: Iterable[Any]) -> RatingScale:
+    """Shared RatingScale for a rating order, built once per distinct order"""
+    key = tuple(rating_order)
+    scale = _rating_scales.get(key)
+    if scale is None:
+        scale = _rating_scales.setdefault(key, RatingScale(key))
+    return scale
+
+
+STANDARD_RATING_SCALE = rating_scale(STANDARD_RATING_ORDER)
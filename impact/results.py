@@ -0,0 +1,93 @@
+"""Per-metric evaluation results"""
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterator
+
+
+class EvaluationResult:
+    """
+    Stores evaluation results with metadata
+
+    Written out by hand rather than as a dataclass: dataclasses imports
+    inspect, which costs more at import time than the rest of this module.
+    """
+
+    __slots__ = ("value", "timestamp", "dependencies_used", "computation_time_ms")
+
+    def __init__(self, value: Any, timestamp: datetime, dependencies_used: List[str],
+                 computation_time_ms: float = 0.0):
+        self.value = value
+        self.timestamp = timestamp
+        self.dependencies_used = dependencies_used
+        self.computation_time_ms = computation_time_ms
+
+    def _fields(self) -> tuple:
+        return (self.value, self.timestamp, self.dependencies_used, self.computation_time_ms)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (f"EvaluationResult(value={self.value!r}, timestamp={self.timestamp!r}, "
+                f"dependencies_used={self.dependencies_used!r}, "
+                f"computation_time_ms={self.computation_time_ms!r})")
+
+
+class EvaluationResults(MutableMapping):
+    """
+    Results of an evaluator, keyed by metric id
+
+    Stores plain values plus optional per-metric timings and a single
+    timestamp for the run; EvaluationResult objects are only built when an
+    entry is read, so evaluation itself allocates nothing per metric.
+    The raw values are available as .values for hot paths.
+    """
+
+    def __init__(self, metrics: Dict[str, Any]):
+        self.metrics = metrics
+        self.values: Dict[str, Any] = {}
+        self.times_ms: Dict[str, float] = {}
+        self.timestamp: Optional[datetime] = None
+        self._timestamps: Dict[str, datetime] = {}
+
+    def set(self, m_id: str, value: Any, time_ms: Optional[float] = None):
+        """Record a metric value without building an EvaluationResult"""
+        self.values[m_id] = value
+        if time_ms is not None:
+            self.times_ms[m_id] = time_ms
+        elif self.times_ms:
+            self.times_ms.pop(m_id, None)
+
+    def __getitem__(self, m_id: str) -> EvaluationResult:
+        value = self.values[m_id]
+        metric = self.metrics.get(m_id, {})
+        timestamp = self._timestamps.get(m_id) or self.timestamp or datetime.now()
+        return EvaluationResult(
+            value=value,
+            timestamp=timestamp,
+            dependencies_used=metric.get("dependencies", []),
+            computation_time_ms=self.times_ms.get(m_id, 0.0)
+        )
+
+    def __setitem__(self, m_id: str, result: EvaluationResult):
+        self.values[m_id] = result.value
+        self.times_ms[m_id] = result.computation_time_ms
+        self._timestamps[m_id] = result.timestamp
+
+    def __delitem__(self, m_id: str):
+        del self.values[m_id]
+        self.times_ms.pop(m_id, None)
+        self._timestamps.pop(m_id, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __contains__(self, m_id: object) -> bool:
+        return m_id in self.values
@@ -0,0 +1,191 @@
+"""Rule-branch coverage counting for the original rule types"""
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+THRESHOLD_BRANCHES = ("<low", "<moderate", "<high", ">=high")
+
+class BranchCounters:
+    """
+    Rule-branch coverage counters kept in preassigned integer slots
+
+    Every (metric, branch) pair gets a slot when the counters are built, so
+    counting a hit is a single list increment. Lookup-matrix branches are
+    preassigned for every cell of the matrix; value pairs outside it get a
+    slot on first use. Counters merge by (metric, branch) label, so shards
+    built in other processes can be combined, and per_metric() rolls up
+    by the owning metric rather than by key prefix.
+    """
+
+    def __init__(self, metrics, lookup_matrices=None):
+        lookup_matrices = lookup_matrices or {}
+        self.branches = []  # slot -> (metric id, branch)
+        self.slots = {}     # (metric id, branch) -> slot
+        self.counts = []    # slot -> hits
+        self.base = {}      # metric id -> first slot
+        for m_id, metric in metrics.items():
+            self.base[m_id] = len(self.branches)
+            mtype = metric.get("type")
+            if mtype == "threshold":
+                branches = THRESHOLD_BRANCHES
+            elif mtype == "lookup_matrix":
+                matrix = lookup_matrices.get(metric.get("matrix_ref"), {})
+                branches = [f"{val1}_{val2}_lookup" for val1, row in matrix.items() for val2 in row]
+            elif mtype in ("map_value", "max", "custom"):
+                branches = [mtype]
+            else:
+                branches = []
+            for branch in branches:
+                self.slot(m_id, branch)
+
+    def slot(self, m_id, branch):
+        """Slot of a branch, assigned on first use if it was not preassigned"""
+        key = (m_id, branch)
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = len(self.branches)
+            self.branches.append(key)
+            self.counts.append(0)
+        return slot
+
+    def export(self):
+        """Non-zero counts as picklable (metric id, branch, hits) triples"""
+        return [(m_id, branch, hits) for (m_id, branch), hits in zip(self.branches, self.counts) if hits]
+
+    def merge(self, other):
+        """Add another BranchCounters (or its export()) into this one"""
+        entries = other.export() if isinstance(other, BranchCounters) else other
+        for m_id, branch, hits in entries:
+            self.counts[self.slot(m_id, branch)] += hits
+        return self
+
+    def per_metric(self):
+        """Exact hit totals per metric"""
+        totals = dict.fromkeys(self.base, 0)
+        for (m_id, _), hits in zip(self.branches, self.counts):
+            totals[m_id] = totals.get(m_id, 0) + hits
+        return totals
+
+    def rule_usage(self):
+        """Counts under the legacy "{metric}_{branch}" string keys"""
+        return {f"{m_id}_{branch}": hits for m_id, branch, hits in self.export()}
+
+class RuleUsageMetricEvaluator:
+    def __init__(self, metrics, input_values, lookup_matrices=None):
+        self.metrics = metrics
+        self.input_values = input_values
+        self.results = {}
+        self.lookup_matrices = lookup_matrices or {}
+        self.branch_counters = BranchCounters(metrics, self.lookup_matrices)
+        self._counts = self.branch_counters.counts
+        self._base = self.branch_counters.base
+        self._lookup_slots = defaultdict(dict)  # metric id -> (val1, val2) -> slot
+        self.custom_functions = {}  # expression -> built lambda, reused across runs
+
+        self.dispatch_map = {
+            "threshold": self.evaluate_threshold,
+            "map_value": self.evaluate_map_value,
+            "max": self.evaluate_max,
+            "custom": self.evaluate_custom,
+            "lookup_matrix": self.evaluate_lookup_matrix
+        }
+
+    def evaluate_metric(self, m_id):
+        metric = self.metrics[m_id]
+        mtype = metric["type"]
+
+        if mtype not in self.dispatch_map:
+            raise ValueError(f"Unknown metric type: {mtype}")
+
+        return self.dispatch_map[mtype](m_id, metric)
+
+    def evaluate_threshold(self, m_id, metric):
+        value = self.input_values.get(metric["dependencies"][0], self.results.get(metric["dependencies"][0]))
+        thresholds = metric["expression"]
+        base = self._base[m_id]
+        if value < thresholds[0]:
+            self._counts[base] += 1
+            return "Low"
+        elif value < thresholds[1]:
+            self._counts[base + 1] += 1
+            return "Moderate"
+        elif value < thresholds[2]:
+            self._counts[base + 2] += 1
+            return "High"
+        else:
+            self._counts[base + 3] += 1
+            return "Critical"
+
+    def evaluate_map_value(self, m_id, metric):
+        value = self.results.get(metric["dependencies"][0])
+        self._counts[self._base[m_id]] += 1
+        return metric["expression"].get(str(value), "NR")
+
+    def evaluate_max(self, m_id, metric):
+        values = [self.results[dep] for dep in metric["dependencies"]]
+        self._counts[self._base[m_id]] += 1
+        return max(values)
+
+    def evaluate_custom(self, m_id, metric):
+        local_vars = {dep: self.results.get(dep, self.input_values.get(dep)) for dep in metric["dependencies"]}
+        expr = metric["expression"]
+        func = self.custom_functions.get(expr)
+        if func is None:
+            func = self.custom_functions[expr] = eval(expr, {"lookup": self.lookup})  # Inject lookup here
+        self._counts[self._base[m_id]] += 1
+        return func(**local_vars)
+
+    def lookup(self, a, b):
+        return a if a == b else b
+
+    def evaluate_lookup_matrix(self, m_id, metric):
+        matrix = self.lookup_matrices[metric["matrix_ref"]]
+        val1 = self.results.get(metric["dependencies"][0])
+        val2 = self.results.get(metric["dependencies"][1])
+        slots = self._lookup_slots[m_id]
+        try:
+            slot = slots[(val1, val2)]
+        except KeyError:
+            slot = slots[(val1, val2)] = self.branch_counters.slot(m_id, f"{val1}_{val2}_lookup")
+        except TypeError:
+            slot = self.branch_counters.slot(m_id, f"{val1}_{val2}_lookup")
+        self._counts[slot] += 1
+        return matrix.get(val1, {}).get(val2, "N/A")
+
+    def run_evaluation(self, eval_order):
+        for m_id in eval_order:
+            self.results[m_id] = self.evaluate_metric(m_id)
+        return self.results
+
+    @property
+    def rule_usage(self):
+        """Branch counts under the legacy string keys"""
+        return self.branch_counters.rule_usage()
+
+
+def _usage_per_metric(metrics, usage):
+    """Per-metric hit totals from BranchCounters or a legacy rule_usage dict"""
+    if isinstance(usage, BranchCounters):
+        return usage.per_metric()
+    # Legacy keys are "{metric}_{branch}": credit each to the longest matching metric id
+    totals = dict.fromkeys(metrics, 0)
+    by_length = sorted(metrics, key=len, reverse=True)
+    for key, hits in usage.items():
+        for metric_id in by_length:
+            if key.startswith(metric_id + "_"):
+                totals[metric_id] += hits
+                break
+    return totals
+
+def generate_decision_tree(metrics, results, aggregated_rule_usage, focus=None, direction="both",
+                           background=False):
+    from .decision_tree import decision_tree_renderer
+    renderer = decision_tree_renderer(metrics, "Aggregated Decision Tree")
+    usage = _usage_per_metric(metrics, aggregated_rule_usage)
+    output = renderer.render("decision_tree_usage", background=background, results=results,
+                             usage=usage, focus=focus, direction=direction)
+    if not background:
+        logger.info("Aggregated decision tree written to decision_tree_usage.png")
+    return output
@@ -0,0 +1,520 @@
+"""Breakpoint sensitivity analysis: input ranges over which metrics keep their value"""
+import math
+from typing import Dict, Any, List, Optional, Callable, Iterable, Tuple
+
+from .plan import ExecutionPlan, _MISSING
+
+
+class _Marker:
+    """Named sentinel"""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return f"<{self.name}>"
+
+
+# Shape of a metric on a piece of the input range: _CONSTANT, a linear form
+# (slope, intercept, precision) of the input before round(.., precision), or
+# None when it is not modelled and has to be sampled
+_CONSTANT = _Marker("constant")
+_IDENTITY = (1, 0, None)
+
+# Reported value of a stretch where a metric changes continuously
+_VARIES = _Marker("varies")
+
+# Kinds of point on the input axis while assembling a metric's ranges
+_EXACT = _Marker("exact")        # breakpoint where values change exactly at the point
+_BOUNDARY = _Marker("boundary")  # computed breakpoint the real change is only near
+_WHOLE = _Marker("whole")        # value that holds on the whole open piece
+_SAMPLE = _Marker("sample")      # swept value that holds at the point only
+
+Form = Any
+Shape = Tuple[List[Tuple[float, bool]], Callable[["_Piece"], Form]]
+
+
+class _Piece:
+    """Open interval of the input between two breakpoints"""
+
+    __slots__ = ("low", "high", "forms", "values")
+
+    def __init__(self, low: float, high: float, forms: Dict[int, Form]):
+        self.low = low
+        self.high = high
+        self.forms = forms  # slot -> form; slots not listed are constant
+        self.values: Optional[List[Any]] = None
+
+
+def _interior(low: float, high: float) -> float:
+    """A point strictly inside (low, high), which may be unbounded"""
+    if low == -math.inf:
+        return 0.0 if high == math.inf else high - 1 - abs(high)
+    if high == math.inf:
+        return low + 1 + abs(low)
+    return low + (high - low) / 2
+
+
+def _rounding_edge(threshold: float, precision: int) -> float:
+    """Smallest y with round(y, precision) >= threshold, up to float error"""
+    scale = 10 ** precision
+    return math.ceil(threshold * scale) / scale - 0.5 / scale
+
+
+def _same(first: Any, second: Any) -> bool:
+    return first is second or first == second
+
+
+def _contains(value_range: Dict[str, Any], x: float) -> bool:
+    low, high = value_range["low"], value_range["high"]
+    return ((low < x or (value_range["low_inclusive"] and low == x))
+            and (x < high or (value_range["high_inclusive"] and high == x)))
+
+
+class SensitivityAnalyzer:
+    """
+    Finds where each metric changes value as one numeric input moves
+
+    The input range is cut into pieces at breakpoints, and each metric is
+    described on every piece as constant or as a linear function of the
+    input:
+
+    - threshold cuts at every threshold its (linear) value crosses, with
+      weighted_sum/avg rounding accounted for, and is constant in between
+    - max/min cut where their linear dependencies cross and follow the
+      upper/lower envelope
+    - weighted_sum, sum and avg combine linear dependencies
+    - map_rating of a varying number is constant when no key is numeric
+    - any metric whose reads are all constant on a piece is constant there,
+      which carries map_rating/map_score chains and ratings through
+
+    Other metrics of a varying value (custom lambdas, conditions, map_score
+    of a varying score) are sampled by one vectorized BatchEvaluator sweep
+    of sweep_points values across the range; they need a bounded range, and
+    a change between two samples that reverts before the next one is
+    missed. A swept metric that changes between more than half of its
+    neighbouring samples is treated as varying continuously.
+
+    Breakpoints that are exact (thresholds of the input itself, crossings
+    of the input with a constant) are evaluated at the point. Every other
+    change is bisected against the plan down to adjacent floats, so range
+    bounds always agree with evaluating the plan at those inputs.
+    """
+
+    def __init__(self, evaluator: "EnhancedMetricEvaluator", plan: Optional[ExecutionPlan] = None,
+                 baseline: Optional[List[Any]] = None, sweep_points: int = 257):
+        if sweep_points < 2:
+            raise ValueError("sweep_points must be at least 2")
+        self.evaluator = evaluator
+        self.plan = plan if plan is not None else evaluator._compiled_plan()
+        self.baseline = baseline if baseline is not None else evaluator._baseline_values()
+        self.sweep_points = sweep_points
+        # Plan evaluations so far: propagated points plus swept rows
+        self.evaluations = 0
+        self._input: Optional[str] = None
+        self._points: Dict[float, List[Any]] = {}
+
+        self.model_map = {
+            "threshold": self.model_threshold,
+            "map_rating": self.model_map_rating,
+            "max": self.model_max,
+            "min": self.model_min,
+            "sum": self.model_sum,
+            "avg": self.model_avg,
+            "weighted_sum": self.model_weighted_sum
+        }
+
+    def analyze(self, input_name: str, low: Optional[float] = None, high: Optional[float] = None,
+                targets: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Ranges of every target metric as input_name moves over [low, high]; see
+        EnhancedMetricEvaluator.sensitivity_analysis"""
+        plan = self.plan
+        input_slot = plan.input_slots.get(input_name)
+        if input_slot is None:
+            raise ValueError(f"Input '{input_name}' is not read by any metric")
+        current = self.baseline[input_slot]
+        if not isinstance(current, (int, float)) or isinstance(current, bool):
+            raise ValueError(f"Input '{input_name}' is not numeric: {current!r}")
+        low = -math.inf if low is None else low
+        high = math.inf if high is None else high
+        if not low < high:
+            raise ValueError(f"Sensitivity range for '{input_name}' needs low < high")
+        self._input = input_name
+        self._points = {}
+
+        downstream = self._downstream(input_slot)
+        if targets is None:
+            report = sorted(downstream)
+        else:
+            report = []
+            for m_id in targets:
+                if m_id not in plan.metric_slots:
+                    raise ValueError(f"Unknown target metric: {m_id}")
+                report.append(plan.metric_slots[m_id])
+
+        pieces = [_Piece(low, high, {input_slot: _IDENTITY})]
+        exact_cuts: Dict[float, bool] = {}
+        for slot in self._needed(report, downstream):
+            pieces = self._shape(slot, pieces, exact_cuts)
+        samples = self._sweep(pieces, report)
+
+        metrics = {}
+        for slot in report:
+            ranges = self._ranges(self._steps(slot, pieces, exact_cuts, samples, low), high)
+            stable = next((r for r in ranges if _contains(r, current)), None)
+            metrics[plan.order[slot]] = {
+                "baseline": self.baseline[slot],
+                "stable": stable if stable is not None and stable["value"] is not _VARIES else None,
+                "ranges": [r for r in ranges if r["value"] is not _VARIES],
+                "swept": any(piece.forms.get(slot, _CONSTANT) is None for piece in pieces)
+            }
+        return {
+            "input": input_name,
+            "baseline": current,
+            "low": low,
+            "high": high,
+            "metrics": metrics,
+            "evaluations": self.evaluations
+        }
+
+    # -----------------------------------------------------------------
+    # Plan access
+    # -----------------------------------------------------------------
+
+    def _evaluate(self, x: float) -> List[Any]:
+        """Slot values with the input at x, every other input at baseline"""
+        values = self._points.get(x)
+        if values is None:
+            self.evaluations += 1
+            values = self._points[x] = self.plan.propagate(self.baseline, {self._input: x})[0]
+        return values
+
+    def _sample(self, piece: _Piece) -> List[Any]:
+        if piece.values is None:
+            piece.values = self._evaluate(_interior(piece.low, piece.high))
+        return piece.values
+
+    def _downstream(self, input_slot: int) -> set:
+        dependents = self.plan.dependents
+        seen = set()
+        stack = [input_slot]
+        while stack:
+            for slot in dependents[stack.pop()]:
+                if slot not in seen:
+                    seen.add(slot)
+                    stack.append(slot)
+        return seen
+
+    def _needed(self, report: List[int], downstream: set) -> List[int]:
+        """Downstream metrics the reported ones read, in evaluation order"""
+        read_slots = self.plan.read_slots
+        needed = set()
+        stack = [slot for slot in report if slot in downstream]
+        while stack:
+            slot = stack.pop()
+            if slot not in needed:
+                needed.add(slot)
+                stack.extend(s for s in read_slots[slot] if s in downstream)
+        return sorted(needed)
+
+    # -----------------------------------------------------------------
+    # Piecewise shapes
+    # -----------------------------------------------------------------
+
+    def _shape(self, slot: int, pieces: List[_Piece], exact_cuts: Dict[float, bool]) -> List[_Piece]:
+        """Describe one metric on every piece, splitting pieces at its breakpoints"""
+        plan = self.plan
+        metric = self.evaluator.metrics[plan.order[slot]]
+        reads = plan.read_slots[slot]
+        dependencies = plan.dependency_slots[slot]
+        model = self.model_map.get(metric["type"])
+        shaped = []
+        for piece in pieces:
+            forms = piece.forms
+            if all(forms.get(s, _CONSTANT) is _CONSTANT for s in reads):
+                forms[slot] = _CONSTANT
+                shaped.append(piece)
+                continue
+            modelled = model(metric, piece, dependencies) if model is not None else None
+            if modelled is None:
+                forms[slot] = None
+                shaped.append(piece)
+                continue
+
+            cuts, shape = modelled
+            inside = {}
+            for x, exact in cuts:
+                if piece.low < x < piece.high:
+                    inside[x] = inside.get(x, True) and exact
+            if not inside:
+                forms[slot] = shape(piece)
+                shaped.append(piece)
+                continue
+            bounds = [piece.low, *sorted(inside), piece.high]
+            for x, exact in inside.items():
+                exact_cuts[x] = exact_cuts.get(x, True) and exact
+            for child_low, child_high in zip(bounds, bounds[1:]):
+                child = _Piece(child_low, child_high, dict(forms))
+                child.forms[slot] = shape(child)
+                shaped.append(child)
+        return shaped
+
+    def _linear(self, piece: _Piece, slot: int) -> Form:
+        """Linear form of a slot on a piece, _CONSTANT for a non-numeric constant, or None"""
+        form = piece.forms.get(slot, _CONSTANT)
+        if form is _CONSTANT:
+            value = self._sample(piece)[slot]
+            return (0, value, None) if isinstance(value, (int, float)) else _CONSTANT
+        return form
+
+    def _linear_forms(self, piece: _Piece, slots: Iterable[int], skip_constant: bool) -> Optional[List[Form]]:
+        """Linear forms of slots; non-numeric constants are skipped or make it None"""
+        forms = []
+        for slot in slots:
+            form = self._linear(piece, slot)
+            if form is None or (form is _CONSTANT and not skip_constant):
+                return None
+            if form is not _CONSTANT:
+                forms.append(form)
+        return forms
+
+    @staticmethod
+    def _fixed(slope: float, intercept: float, precision: Optional[int]) -> Shape:
+        form = _CONSTANT if slope == 0 else (slope, intercept, precision)
+        return [], lambda child: form
+
+    def model_threshold(self, metric: Dict[str, Any], piece: _Piece, dependencies: Tuple[int, ...]):
+        form = self._linear(piece, dependencies[0])
+        if form is None or form is _CONSTANT:
+            return None
+        slope, intercept, precision = form
+        cuts = []
+        for threshold in metric["expression"]:
+            if not isinstance(threshold, (int, float)):
+                return None
+            edge = threshold if precision is None else _rounding_edge(threshold, precision)
+            cuts.append(((edge - intercept) / slope, form == _IDENTITY))
+        return cuts, lambda child: _CONSTANT
+
+    def model_map_rating(self, metric: Dict[str, Any], piece: _Piece, dependencies: Tuple[int, ...]):
+        # A varying number only ever finds numeric keys
+        if any(isinstance(key, (int, float)) for key in metric["expression"]):
+            return None
+        if self._linear(piece, dependencies[0]) is None:
+            return None
+        return [], lambda child: _CONSTANT
+
+    def _model_extreme(self, metric: Dict[str, Any], piece: _Piece,
+                       dependencies: Tuple[int, ...], pick: Callable) -> Optional[Shape]:
+        forms = self._linear_forms(piece, dependencies, metric.get("numeric_only", False))
+        if forms is None:
+            return None
+        if not forms:
+            return [], lambda child: _CONSTANT
+        cuts = []
+        for i, first in enumerate(forms):
+            for second in forms[i + 1:]:
+                if first[0] != second[0]:
+                    crossing = (second[1] - first[1]) / (first[0] - second[0])
+                    # The input against a constant crosses exactly at the constant
+                    exact = ((first == _IDENTITY and second[0] == 0 and second[2] is None)
+                             or (second == _IDENTITY and first[0] == 0 and first[2] is None))
+                    cuts.append((crossing, exact))
+
+        def shape(child):
+            x = _interior(child.low, child.high)
+            selected = pick(forms, key=lambda form: form[0] * x + form[1])
+            return _CONSTANT if selected[0] == 0 else selected
+        return cuts, shape
+
+    def model_max(self, metric: Dict[str, Any], piece: _Piece, dependencies: Tuple[int, ...]):
+        return self._model_extreme(metric, piece, dependencies, max)
+
+    def model_min(self, metric: Dict[str, Any], piece: _Piece, dependencies: Tuple[int, ...]):
+        return self._model_extreme(metric, piece, dependencies, min)
+
+    def model_sum(self, metric: Dict[str, Any], piece: _Piece, dependencies: Tuple[int, ...]):
+        forms = self._linear_forms(piece, dependencies, skip_constant=True)
+        if forms is None:
+            return None
+        return self._fixed(sum(form[0] for form in forms), sum(form[1] for form in forms), None)
+
+    def model_avg(self, metric: Dict[str, Any], piece: _Piece, dependencies: Tuple[int, ...]):
+        forms = self._linear_forms(piece, dependencies, skip_constant=True)
+        if forms is None:
+            return None
+        if not forms:
+            return [], lambda child: _CONSTANT
+        return self._fixed(sum(form[0] for form in forms) / len(forms),
+                           sum(form[1] for form in forms) / len(forms), metric.get("precision", 2))
+
+    def model_weighted_sum(self, metric: Dict[str, Any], piece: _Piece, dependencies: Tuple[int, ...]):
+        forms = self._linear_forms(piece, dependencies, skip_constant=False)
+        if forms is None:
+            return None
+        # Rounding of the dependencies themselves is left to bisection
+        weights = metric["expression"]["weights"]
+        return self._fixed(sum(weight * form[0] for weight, form in zip(weights, forms)),
+                           sum(weight * form[1] for weight, form in zip(weights, forms)),
+                           metric.get("precision", 2))
+
+    # -----------------------------------------------------------------
+    # Sampling and ranges
+    # -----------------------------------------------------------------
+
+    def _sweep(self, pieces: List[_Piece], report: List[int]) -> Dict[Tuple[int, int], Any]:
+        """
+        Sampled values of unmodelled reported metrics per piece, from one
+        batch run over an even grid of the range (plus the midpoint of any
+        piece the grid misses); None for a metric that varies continuously
+        """
+        plan = self.plan
+        swept = {index: [slot for slot in report if piece.forms.get(slot, _CONSTANT) is None]
+                 for index, piece in enumerate(pieces)}
+        swept = {index: slots for index, slots in swept.items() if slots}
+        if not swept:
+            return {}
+        low, high = pieces[0].low, pieces[-1].high
+        if not (math.isfinite(low) and math.isfinite(high)):
+            slot = next(iter(swept.values()))[0]
+            raise ValueError(f"Metric {plan.order[slot]} is sampled over '{self._input}' "
+                             f"and needs a finite low and high")
+
+        count = self.sweep_points
+        grid = [low + (high - low) * k / (count - 1) for k in range(count)]
+        by_piece: Dict[int, List[float]] = {}
+        position = 0
+        for index, piece in enumerate(pieces):
+            while position < count and grid[position] <= piece.low:
+                position += 1
+            xs = []
+            while position < count and grid[position] < piece.high:
+                xs.append(grid[position])
+                position += 1
+            if index in swept:
+                by_piece[index] = xs or [_interior(piece.low, piece.high)]
+        xs = [x for index in sorted(by_piece) for x in by_piece[index]]
+
+        from .batch import BatchEvaluator
+        results = BatchEvaluator(self.evaluator, plan).run(self._sweep_columns(xs))
+        self.evaluations += len(xs)
+
+        samples = {}
+        for slot in {slot for slots in swept.values() for slot in slots}:
+            column = iter(results[plan.order[slot]].tolist())
+            changes = gaps = 0
+            for index, piece_xs in by_piece.items():
+                values = [next(column) for _ in piece_xs]
+                if slot in swept[index]:
+                    samples[index, slot] = list(zip(piece_xs, values))
+                    gaps += len(values) - 1
+                    changes += sum(1 for a, b in zip(values, values[1:]) if not _same(a, b))
+            if changes > gaps // 2:
+                for index in by_piece:
+                    if slot in swept[index]:
+                        samples[index, slot] = None
+        return samples
+
+    def _sweep_columns(self, xs: List[float]) -> Dict[str, Any]:
+        columns = {}
+        for name, _ in self.plan.input_spec:
+            if name == self._input:
+                columns[name] = xs
+            else:
+                value = self.baseline[self.plan.input_slots[name]]
+                if value is not _MISSING:
+                    columns[name] = [value] * len(xs)
+        return columns
+
+    def _steps(self, slot: int, pieces: List[_Piece], exact_cuts: Dict[float, bool],
+               samples: Dict[Tuple[int, int], List[Tuple[float, Any]]], low: float) -> List[Tuple[float, bool, Any]]:
+        """A metric as a step function: (start, start inclusive, value) per stretch"""
+        points = []  # (x, value, kind) in input order
+        if math.isfinite(low):
+            points.append((low, self._evaluate(low)[slot], _EXACT))
+        for index, piece in enumerate(pieces):
+            if index:
+                x = piece.low
+                points.append((x, self._evaluate(x)[slot], _EXACT if exact_cuts[x] else _BOUNDARY))
+            form = piece.forms.get(slot, _CONSTANT)
+            x = _interior(piece.low, piece.high)
+            if form is _CONSTANT:
+                points.append((x, self._sample(piece)[slot], _WHOLE))
+            elif form is None:
+                swept = samples[index, slot]
+                if swept is None:
+                    points.append((x, _VARIES, _WHOLE))
+                else:
+                    points.extend((x, value, _SAMPLE) for x, value in swept)
+            else:
+                points.append((x, _VARIES, _WHOLE))
+        if math.isfinite(pieces[-1].high):
+            x = pieces[-1].high
+            points.append((x, self._evaluate(x)[slot], _EXACT))
+
+        # A breakpoint next to a varying stretch belongs to it, unless it
+        # extends the constant stretch on its other side
+        for i, (x, value, kind) in enumerate(points):
+            if kind is _EXACT or kind is _BOUNDARY:
+                before = points[i - 1] if i else None
+                after = points[i + 1] if i + 1 < len(points) else None
+                if before is not None and before[1] is _VARIES:
+                    before, after = after, before
+                if after is not None and after[1] is _VARIES and (before is None or not _same(before[1], value)):
+                    points[i] = (x, _VARIES, kind)
+
+        steps = [(low, math.isfinite(low), points[0][1])]
+        for (x0, v0, kind0), (x1, v1, kind1) in zip(points, points[1:]):
+            if _same(v0, v1):
+                continue
+            varies = v0 is _VARIES or v1 is _VARIES
+            if kind0 is _WHOLE and (kind1 is _EXACT or varies):
+                steps.append((x1, True, v1))
+            elif kind1 is _WHOLE and (kind0 is _EXACT or varies):
+                steps.append((x0, False, v1))
+            else:
+                # The change is only known to lie in (x0, x1]; a computed
+                # breakpoint is usually within float error of it
+                if kind1 is _BOUNDARY:
+                    near = x1 - 1e-9 * max(1.0, abs(x1))
+                    if x0 < near and _same(self._evaluate(near)[slot], v0):
+                        x0 = near
+                elif kind0 is _BOUNDARY:
+                    near = x0 + 1e-9 * max(1.0, abs(x0))
+                    if near < x1 and _same(self._evaluate(near)[slot], v1):
+                        x1 = near
+                steps.extend(self._refine(slot, x0, v0, x1, v1))
+        return steps
+
+    def _refine(self, slot: int, x0: float, v0: Any, x1: float, v1: Any) -> List[Tuple[float, bool, Any]]:
+        """Bisect (x0, x1] down to adjacent floats at each change of a metric's value"""
+        steps = []
+        while True:
+            low, high = x0, x1
+            while True:
+                mid = low + (high - low) / 2
+                if mid <= low or mid >= high:
+                    break
+                if _same(self._evaluate(mid)[slot], v0):
+                    low = mid
+                else:
+                    high = mid
+            value = self._evaluate(high)[slot]
+            steps.append((low, False, value))
+            if high >= x1 or _same(value, v1):
+                return steps
+            x0, v0 = high, value
+
+    @staticmethod
+    def _ranges(steps: List[Tuple[float, bool, Any]], high: float) -> List[Dict[str, Any]]:
+        ranges = []
+        for i, (start, inclusive, value) in enumerate(steps):
+            if i + 1 < len(steps):
+                end, end_inclusive = steps[i + 1][0], not steps[i + 1][1]
+            else:
+                end, end_inclusive = high, math.isfinite(high)
+            ranges.append({"low": start, "high": end, "low_inclusive": inclusive,
+                           "high_inclusive": end_inclusive, "value": value})
+        return ranges
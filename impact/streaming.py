@@ -0,0 +1,191 @@
+"""Chunked evaluation of CSV/JSONL entity files"""
+import csv
+import json
+import logging
+import os
+import re
+import time
+from itertools import islice
+from typing import Dict, Any, List, Union, Optional, Callable, Iterable, Iterator
+
+from .batch import BatchEvaluator
+
+logger = logging.getLogger(__name__)
+
+
+_NUMBER_PATTERN = re.compile(r"^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$")
+
+
+def _parse_csv_value(text: str) -> Any:
+    """CSV cells arrive as text; numeric-looking cells become int or float"""
+    if _NUMBER_PATTERN.match(text):
+        try:
+            return int(text)
+        except ValueError:
+            return float(text)
+    return text
+
+
+class StreamingPipeline:
+    """
+    Evaluate entity rows from CSV/JSONL files in fixed-size chunks
+
+    Rows are read lazily, evaluated chunk by chunk against one compiled plan
+    and written out as they are produced, so memory is bounded by chunk_size
+    rather than file size. Each output row carries "_row", its zero-based
+    offset in the input file, and run() can resume from any offset.
+
+    CSV cells of the plan's inputs that look numeric become int or float;
+    other columns stay text, so IDs such as "007" pass through unchanged.
+    An input column that must stay text needs a converter (str will do).
+    Cells missing from a short CSV row are left out of it and cells beyond
+    the header of a long row are dropped; both are logged and counted in
+    stats["ragged_rows"] rather than stopping the stream.
+
+    Example:
+        pipeline = StreamingPipeline(evaluator, chunk_size=5000)
+        stats = pipeline.run("entities.csv", "scored.jsonl")
+        pipeline.run("entities.csv", "scored.jsonl", start_row=stats["next_row"])
+    """
+
+    def __init__(self, evaluator: "EnhancedMetricEvaluator", chunk_size: int = 10000,
+                 columnar: bool = False, passthrough: Optional[List[str]] = None,
+                 converters: Optional[Dict[str, Callable[[str], Any]]] = None,
+                 on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 memoize: Union[bool, Iterable[str]] = False):
+        """
+        Args:
+            evaluator: Supplies the metric configuration
+            chunk_size: Rows evaluated (and held in memory) at a time
+            columnar: Evaluate each chunk with evaluate_batch (needs numpy)
+            passthrough: Input fields copied to the output; None copies all
+            converters: Per-column parsers for CSV text, overriding numeric
+                detection (which only applies to the plan's inputs)
+            on_chunk: Called with the running stats after every chunk
+            memoize: Memoize row-wise metrics across rows, as for compile()
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.evaluator = evaluator
+        self.plan = evaluator.compile(memoize=memoize)
+        self.chunk_size = chunk_size
+        self.columnar = columnar
+        self.passthrough = passthrough
+        self.converters = converters or {}
+        self.on_chunk = on_chunk
+        self.stats = self._new_stats(0)
+
+    @staticmethod
+    def _format(path: str) -> str:
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".csv":
+            return "csv"
+        if extension in (".jsonl", ".ndjson"):
+            return "jsonl"
+        raise ValueError(f"Unsupported file format: {extension or path}")
+
+    @staticmethod
+    def _new_stats(start_row: int) -> Dict[str, Any]:
+        return {"rows": 0, "next_row": start_row, "elapsed_s": 0.0, "rows_per_sec": 0.0, "ragged_rows": 0}
+
+    def read(self, path: str, start_row: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield input rows lazily, skipping the first start_row rows"""
+        with open(path, newline="", encoding="utf-8") as handle:
+            if self._format(path) == "csv":
+                reader = csv.DictReader(handle)
+                converters = self.converters
+                numeric = self.plan.input_slots
+                for offset, row in enumerate(islice(reader, start_row, None), start_row):
+                    # DictReader fills short rows with None and puts extra cells under None
+                    extra = row.pop(None, None) or []
+                    missing = [key for key, text in row.items() if text is None]
+                    if extra or missing:
+                        self.stats["ragged_rows"] += 1
+                        logger.warning(f"{path}: row {offset} has {len(extra)} extra cells "
+                                       f"and is missing {missing}")
+                        row = {key: text for key, text in row.items() if text is not None}
+                    yield {key: converters[key](text) if key in converters
+                           else _parse_csv_value(text) if key in numeric else text
+                           for key, text in row.items()}
+            else:
+                lines = (line for line in handle if line.strip())
+                for line in islice(lines, start_row, None):
+                    yield json.loads(line)
+
+    def evaluate(self, rows: Iterable[Dict[str, Any]], start_row: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield one output row per input row, evaluating chunk_size rows at a time"""
+        self.stats = stats = self._new_stats(start_row)
+        started = time.perf_counter()
+        rows = iter(rows)
+
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            results = self._evaluate_chunk(chunk)
+            for offset, (row, result) in enumerate(zip(chunk, results)):
+                output = {"_row": stats["next_row"] + offset}
+                if self.passthrough is None:
+                    output.update(row)
+                else:
+                    output.update((key, row.get(key)) for key in self.passthrough)
+                output.update(result)
+                yield output
+
+            stats["rows"] += len(chunk)
+            stats["next_row"] += len(chunk)
+            stats["elapsed_s"] = time.perf_counter() - started
+            stats["rows_per_sec"] = stats["rows"] / stats["elapsed_s"] if stats["elapsed_s"] else 0.0
+            if self.evaluator.debug:
+                logger.info(f"Streamed {stats['rows']} rows ({stats['rows_per_sec']:.0f} rows/sec)")
+            if self.on_chunk:
+                self.on_chunk(dict(stats))
+
+    def _evaluate_chunk(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self.columnar:
+            return [self.plan.run(row) for row in chunk]
+
+        columns = {}
+        for name, required in self.plan.input_spec:
+            if required or all(name in row for row in chunk):
+                try:
+                    columns[name] = [row[name] for row in chunk]
+                except KeyError:
+                    raise ValueError(f"Dependency '{name}' not found in results or inputs") from None
+        arrays = BatchEvaluator(self.evaluator, self.plan).run(columns)
+        decoded = {m_id: column.tolist() for m_id, column in arrays.items()}
+        return [{m_id: decoded[m_id][i] for m_id in self.plan.order} for i in range(len(chunk))]
+
+    def write(self, results: Iterable[Dict[str, Any]], path: str, append: bool = False) -> int:
+        """Write output rows as they arrive; returns the number written"""
+        written = 0
+        file_format = self._format(path)
+        has_header = append and os.path.exists(path) and os.path.getsize(path) > 0
+
+        with open(path, "a" if append else "w", newline="", encoding="utf-8") as handle:
+            writer = None
+            for result in results:
+                if file_format == "jsonl":
+                    handle.write(json.dumps(result, default=str) + "\n")
+                else:
+                    if writer is None:
+                        writer = csv.DictWriter(handle, fieldnames=list(result), extrasaction="ignore")
+                        if not has_header:
+                            writer.writeheader()
+                    writer.writerow(result)
+                written += 1
+                if written % self.chunk_size == 0:
+                    handle.flush()
+        return written
+
+    def run(self, input_path: str, output_path: str, start_row: int = 0) -> Dict[str, Any]:
+        """
+        Stream input_path through the plan into output_path
+        
+        A non-zero start_row resumes: earlier rows are skipped and results
+        are appended. Returns stats including rows_per_sec and next_row,
+        the offset to resume from.
+        """
+        rows = self.read(input_path, start_row)
+        self.write(self.evaluate(rows, start_row), output_path, append=start_row > 0)
+        return dict(self.stats)
@@ -0,0 +1,255 @@
+"""Compact columnar result tables"""
+import sys
+from array import array
+from math import copysign
+from collections.abc import Mapping
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple
+
+from .batch import _import_numpy
+
+
+# Code widths a categorical column grows through as categories are added
+_CODE_TYPES = (("B", 1 << 8), ("H", 1 << 16), ("I", 1 << 32))
+
+
+class ResultColumn:
+    """
+    One metric's values across entities, stored compactly
+
+    The first value picks the storage: an int64 or float64 array for plain
+    numbers, otherwise small integer codes into a list of distinct values
+    (ratings, strings, None, bools). Values that do not fit go to a sparse
+    side table; a numeric column collecting many of them is recoded as
+    categorical. Values read back are the objects that were stored, type
+    included.
+    """
+
+    __slots__ = ("kind", "data", "categories", "other", "_index", "_limit")
+
+    def __init__(self):
+        self.kind: Optional[str] = None
+        self.data: Optional[array] = None
+        self.categories: List[Any] = []
+        self.other: Dict[int, Any] = {}
+        self._index: Dict[Tuple[Any, ...], int] = {}
+        self._limit = 0
+
+    def _start(self, value: Any):
+        value_type = type(value)
+        if value_type is int:
+            self.kind, self.data = "int", array("q")
+        elif value_type is float:
+            self.kind, self.data = "float", array("d")
+        else:
+            self.kind = "codes"
+            typecode, self._limit = _CODE_TYPES[0]
+            self.data = array(typecode)
+
+    def append(self, value: Any):
+        if self.kind is None:
+            self._start(value)
+        data = self.data
+        value_type = type(value)
+
+        if self.kind == "codes":
+            # Keyed with the type so 1, 1.0 and True stay distinct, and
+            # with the sign of floats so 0.0 and -0.0 do
+            key = (value_type, value)
+            if value_type is float:
+                key += (copysign(1, value),)
+            try:
+                code = self._index.get(key)
+                if code is None:
+                    code = self._add_category(key, value)
+                self.data.append(code)
+                return
+            except TypeError:
+                pass
+        elif value_type is (int if self.kind == "int" else float):
+            try:
+                data.append(value)
+                return
+            except OverflowError:
+                pass
+
+        self.other[len(data)] = value
+        data.append(0)
+        if self.kind != "codes" and len(self.other) > 64 and len(self.other) * 8 > len(data):
+            self._recode()
+
+    def _add_category(self, key: Tuple[Any, ...], value: Any) -> int:
+        code = self._index[key] = len(self.categories)
+        self.categories.append(value)
+        if len(self.categories) > self._limit:
+            for typecode, limit in _CODE_TYPES:
+                if len(self.categories) <= limit:
+                    break
+            self.data = array(typecode, self.data)
+            self._limit = limit
+        return code
+
+    def _recode(self):
+        """Switch a numeric column with many misfit values to categorical codes"""
+        values = self.tolist()
+        self.kind = "codes"
+        typecode, self._limit = _CODE_TYPES[0]
+        self.data = array(typecode)
+        self.categories, self.other, self._index = [], {}, {}
+        for value in values:
+            self.append(value)
+
+    def __len__(self) -> int:
+        return len(self.data) if self.data is not None else 0
+
+    def __getitem__(self, row: int) -> Any:
+        if self.other and row in self.other:
+            return self.other[row]
+        if self.kind == "codes":
+            return self.categories[self.data[row]]
+        return self.data[row]
+
+    def tolist(self) -> List[Any]:
+        if self.data is None:
+            return []
+        if self.kind == "codes":
+            values = list(map(self.categories.__getitem__, self.data))
+        else:
+            values = self.data.tolist()
+        for row, value in self.other.items():
+            values[row] = value
+        return values
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the column"""
+        size = sys.getsizeof(self.data) if self.data is not None else 0
+        if self.categories:
+            size += sys.getsizeof(self.categories) + sys.getsizeof(self._index)
+            size += sum(sys.getsizeof(value) for value in self.categories)
+        if self.other:
+            size += sys.getsizeof(self.other) + sum(sys.getsizeof(value) for value in self.other.values())
+        return size
+
+
+class ResultRow(Mapping):
+    """Read-only dict-like view of one entity's results in a ResultTable"""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "ResultTable", row: int):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, m_id: str) -> Any:
+        return self._table.columns[self._table.index[m_id]][self._row]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.names)
+
+    def __len__(self) -> int:
+        return len(self._table.names)
+
+    def __repr__(self) -> str:
+        return f"ResultRow({dict(self)!r})"
+
+
+class ResultTable:
+    """
+    Column-oriented store for the results of many entities
+
+    One ResultColumn per metric, indexed by the metric's slot in the plan
+    order, plus an optional int64 column of nanosecond timings per metric.
+    table[i] gives a dict-like ResultRow, table.column(m_id) a list of
+    values and table.to_numpy(m_id) an array, so code written against
+    per-entity result dicts keeps working.
+    """
+
+    def __init__(self, names: Iterable[str], timings: bool = False):
+        self.names = tuple(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.columns = [ResultColumn() for _ in self.names]
+        self.timings: Optional[List[array]] = [array("q") for _ in self.names] if timings else None
+        self._size = 0
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Iterable[Any]]) -> "ResultTable":
+        """Build a table from per-metric sequences, e.g. evaluate_batch output"""
+        table = cls(columns)
+        sizes = set()
+        for column, values in zip(table.columns, columns.values()):
+            if hasattr(values, "tolist"):
+                values = values.tolist()
+            for value in values:
+                column.append(value)
+            sizes.add(len(column))
+        if len(sizes) > 1:
+            raise ValueError("Result columns have different lengths")
+        table._size = sizes.pop() if sizes else 0
+        return table
+
+    def append(self, values: Iterable[Any], timings_ns: Optional[Iterable[int]] = None):
+        """Add one entity from values in column order (extra trailing values are ignored)"""
+        appended = 0
+        for column, value in zip(self.columns, values):
+            column.append(value)
+            appended += 1
+        if appended != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} values, got {appended}")
+        if self.timings is not None:
+            if timings_ns is None:
+                raise ValueError("This table records timings; timings_ns is required")
+            for column, elapsed in zip(self.timings, timings_ns):
+                column.append(elapsed)
+        self._size += 1
+
+    def append_row(self, results: Dict[str, Any]):
+        """Add one entity from a metric -> value dict"""
+        self.append([results[name] for name in self.names])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, row: int) -> ResultRow:
+        if row < 0:
+            row += self._size
+        if not 0 <= row < self._size:
+            raise IndexError("result row out of range")
+        return ResultRow(self, row)
+
+    def __iter__(self) -> Iterator[ResultRow]:
+        for row in range(self._size):
+            yield ResultRow(self, row)
+
+    def value(self, row: int, m_id: str) -> Any:
+        return self.columns[self.index[m_id]][row]
+
+    def column(self, m_id: str) -> List[Any]:
+        """All values of one metric, in row order"""
+        return self.columns[self.index[m_id]].tolist()
+
+    def timing_ms(self, row: int, m_id: str) -> float:
+        if self.timings is None:
+            raise ValueError("This table does not record timings")
+        return self.timings[self.index[m_id]][row] / 1e6
+
+    def to_numpy(self, m_id: str):
+        """One metric as a NumPy array: typed for numeric columns, else object"""
+        np = _import_numpy()
+        column = self.columns[self.index[m_id]]
+        if column.kind in ("int", "float") and not column.other:
+            return np.frombuffer(column.data, dtype=np.int64 if column.kind == "int" else np.float64).copy()
+        values = column.tolist()
+        result = np.empty(len(values), dtype=object)
+        result[:] = values
+        return result
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materialize every row as a plain dict"""
+        columns = [column.tolist() for column in self.columns]
+        return [dict(zip(self.names, row)) for row in zip(*columns)]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the table"""
+        size = sum(column.nbytes() for column in self.columns)
+        if self.timings is not None:
+            size += sum(sys.getsizeof(column) for column in self.timings)
+        return size
@@ -0,0 +1,147 @@
+"""Concurrent evaluation of independent expensive metrics"""
+import logging
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Optional, Callable
+
+from .evaluator import EnhancedMetricEvaluator
+from .plan import ExecutionPlan
+
+logger = logging.getLogger(__name__)
+
+
+# Default cost per metric type; metrics may override with "cost_hint"
+DEFAULT_COST_HINTS = {"custom": 10}
+
+# Per-process plan for WavefrontScheduler process pools
+_wavefront_plan: Optional[ExecutionPlan] = None
+
+
+def _init_wavefront_worker(metrics: Dict[str, Any], input_values: Dict[str, Any], eval_order: List[str]):
+    global _wavefront_plan
+    _wavefront_plan = EnhancedMetricEvaluator(metrics, input_values).compile(eval_order)
+
+
+def _run_wavefront_metric(slot: int, size: int, reads: Dict[int, Any]) -> Any:
+    values: List[Any] = [None] * size
+    for read_slot, value in reads.items():
+        values[read_slot] = value
+    return _wavefront_plan.steps[slot][1](values)
+
+
+class WavefrontScheduler:
+    """
+    Evaluates a compiled plan by dispatching metrics as soon as they are ready
+
+    Independent metrics (e.g. G1_Rating, G2_Rating, G3_Rating) no longer wait
+    for each other. Metrics whose cost hint reaches cost_threshold run on a
+    thread or process pool; cheaper ones run inline on the calling thread,
+    since shipping them to a worker would cost more than evaluating them.
+    A metric's cost is its "cost_hint" entry, else DEFAULT_COST_HINTS for its
+    type, else 1.
+
+    Use as a context manager to keep the pool across runs:
+
+        with WavefrontScheduler(evaluator, max_workers=8) as scheduler:
+            for row in rows:
+                scheduler.run(row)
+    """
+
+    def __init__(self, evaluator: "EnhancedMetricEvaluator", executor: str = "thread",
+                 max_workers: Optional[int] = None, cost_threshold: float = 10,
+                 eval_order: Optional[List[str]] = None):
+        if executor not in ("thread", "process", "serial"):
+            raise ValueError(f"Unsupported executor: {executor}")
+        self.evaluator = evaluator
+        self.plan = evaluator.compile(eval_order)
+        self.executor = executor
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        metrics = evaluator.metrics
+        self.offloaded = tuple(
+            self._cost(metrics[m_id]) >= cost_threshold for m_id in self.plan.order
+        )
+        # Metric dependencies only; inputs are available from the start
+        size = len(self.plan.order)
+        self._waiting_on = tuple(
+            len([s for s in reads if s < size]) for reads in self.plan.read_slots
+        )
+        self._pool = None
+
+    @staticmethod
+    def _cost(metric: Dict[str, Any]) -> float:
+        return metric.get("cost_hint", DEFAULT_COST_HINTS.get(metric["type"], 1))
+
+    def __enter__(self):
+        self._start_pool()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _start_pool(self):
+        if self._pool is not None or self.executor == "serial" or not any(self.offloaded):
+            return
+        if self.executor == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        else:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_init_wavefront_worker,
+                initargs=(self.evaluator.metrics, dict(self.evaluator.input_values), list(self.plan.order))
+            )
+
+    def close(self):
+        """Shut down the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _submit(self, slot: int, evaluate: Callable[[List[Any]], Any], values: List[Any]):
+        if self.executor == "thread":
+            return self._pool.submit(evaluate, values)
+        reads = {s: values[s] for s in self.plan.read_slots[slot]}
+        return self._pool.submit(_run_wavefront_metric, slot, len(values), reads)
+
+    def run(self, input_values: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Evaluate every metric for one input dict (defaults to the evaluator's inputs)"""
+        plan = self.plan
+        values = plan._load_inputs(self.evaluator.input_values if input_values is None else input_values)
+        self._start_pool()
+        pool = self._pool
+
+        waiting_on = list(self._waiting_on)
+        ready = deque(slot for slot, count in enumerate(waiting_on) if count == 0)
+        in_flight: Dict[Any, int] = {}
+        slot = -1
+
+        try:
+            while ready or in_flight:
+                while ready:
+                    slot = ready.popleft()
+                    evaluate = plan.steps[slot][1]
+                    if pool is not None and self.offloaded[slot]:
+                        in_flight[self._submit(slot, evaluate, values)] = slot
+                        continue
+                    values[slot] = evaluate(values)
+                    self._release(slot, waiting_on, ready)
+
+                if in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        slot = in_flight.pop(future)
+                        values[slot] = future.result()
+                        self._release(slot, waiting_on, ready)
+        except Exception as e:
+            for future in in_flight:
+                future.cancel()
+            logger.error(f"Error evaluating metric {plan.order[slot]}: {e}")
+            raise
+
+        return dict(zip(plan.order, values))
+
+    def _release(self, slot: int, waiting_on: List[int], ready: deque):
+        for dependent in self.plan.dependents[slot]:
+            waiting_on[dependent] -= 1
+            if waiting_on[dependent] == 0:
+                ready.append(dependent)
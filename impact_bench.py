@@ -0,0 +1,606 @@
+"""
+Synthetic rule graphs and benchmarks for the metric evaluators
+
+    python impact_bench.py --sizes 50,200,1000 --entities 2000 --output baseline.json
+    python impact_bench.py --sizes 200 --compare baseline.json
+
+Generates layered metric configs with a controllable size, depth, fan-in
+and metric-type mix, plus matching input populations, and measures every
+evaluator that supports the generated types: evaluations/sec, cost per
+metric type, memory per stored entity, impact_analysis latency and
+get_eval_order time. Results are written as a JSON baseline; --compare
+reports figures that got worse than a saved baseline by more than the
+tolerance.
+
+The import time of the evaluation core is checked against a fixed budget:
+
+    python impact_bench.py --import-only
+"""
+
+import argparse
+import compileall
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+import impact
+
+RATINGS = ["Low", "Moderate", "High", "Critical"]
+RATING_TO_SCORE = {"Low": 1, "Moderate": 2, "High": 3, "Critical": 4}
+SCORE_TO_RATING = {"1": "Low", "2": "Moderate", "3": "High", "4": "Critical"}
+THRESHOLDS = [10, 20, 30]
+RISK_MATRIX = {a: {b: RATINGS[max(i, j)] for j, b in enumerate(RATINGS)} for i, a in enumerate(RATINGS)}
+
+# Per type: (kind of dependencies, kind of output, min dependencies, max dependencies)
+# Kinds are "input" (raw number), "rating", "score" (int 1-4) and "number";
+# a max of None means up to the fan-in.
+TYPE_SPECS = {
+    "threshold": ("input", "rating", 1, 1),
+    "map_rating": ("rating", "score", 1, 1),
+    "map_score": ("score", "rating", 1, 1),
+    "map_value": ("rating", "score", 1, 1),
+    "lookup": ("rating", "score", 1, 1),
+    "max": ("score", "score", 2, None),
+    "min": ("score", "score", 2, None),
+    "sum": ("score", "number", 2, None),
+    "avg": ("score", "number", 2, None),
+    "weighted_sum": ("score", "number", 2, None),
+    "percentage": ("score", "number", 2, 2),
+    "custom": ("score", "score", 1, None),
+    "conditional_rating": ("rating", "rating", 2, None),
+    "if_then_else": ("rating", "rating", 2, 2),
+    "worst_of": ("rating", "rating", 2, None),
+    "best_of": ("rating", "rating", 2, None),
+    "rating_worst": ("rating", "rating", 2, None),
+    "rating_best": ("rating", "rating", 2, None),
+    "lookup_matrix": ("rating", "rating", 2, 2),
+}
+
+DEFAULT_MIX = {
+    "threshold": 2, "map_rating": 3, "map_score": 2, "map_value": 2, "lookup": 1,
+    "max": 2, "min": 1, "sum": 1, "avg": 1, "weighted_sum": 2, "percentage": 1,
+    "custom": 2, "conditional_rating": 2, "if_then_else": 1, "worst_of": 1,
+    "best_of": 1, "rating_worst": 1, "rating_best": 1, "lookup_matrix": 1
+}
+
+# Metric types each suite's configs are generated from, and the evaluators run on them
+SUITES = {
+    "original": (("threshold", "map_rating", "map_score", "max", "custom"),
+                 ("original", "enhanced", "compiled", "batch")),
+    "rule_usage": (("threshold", "map_value", "max", "custom", "lookup_matrix"),
+                   ("rule_usage",)),
+    "enhanced": (tuple(t for t in TYPE_SPECS if t not in ("map_value", "lookup_matrix")),
+                 ("enhanced", "compiled", "batch")),
+}
+
+# Figures where a smaller value is better; everything else is better when larger
+LOWER_IS_BETTER = ("us_per_entity", "bytes_per_entity", "mean_us", "p50_us", "p99_us",
+                   "cold_us", "cached_us", "import_ms")
+
+# Median milliseconds `import impact` may take in a fresh interpreter with
+# bytecode compiled, and modules the evaluation core must never pull in
+CORE_IMPORT_BUDGET_MS = 60.0
+CORE_FORBIDDEN_MODULES = ("numpy", "graphviz", "csv", "multiprocessing",
+                          "concurrent.futures.process", "dataclasses", "inspect")
+
+
+# =================================================================
+# SYNTHETIC CONFIGS AND INPUTS
+# =================================================================
+
+def _build_metric(mtype: str, deps: List[str], rng: random.Random) -> Dict[str, Any]:
+    metric: Dict[str, Any] = {"type": mtype, "dependencies": deps}
+    if mtype == "threshold":
+        metric["expression"] = list(THRESHOLDS)
+    elif mtype in ("map_rating", "map_value"):
+        metric["expression"] = dict(RATING_TO_SCORE)
+    elif mtype == "map_score":
+        metric["expression"] = dict(SCORE_TO_RATING)
+    elif mtype == "lookup":
+        metric["expression"] = {"table": dict(RATING_TO_SCORE)}
+        metric["default"] = 0
+    elif mtype == "weighted_sum":
+        weights = [rng.random() + 0.1 for _ in deps]
+        metric["expression"] = {"weights": [round(w / sum(weights), 3) for w in weights]}
+    elif mtype == "custom":
+        metric["expression"] = f"lambda {', '.join(deps)}: ({' + '.join(deps)}) // {len(deps)}"
+    elif mtype == "conditional_rating":
+        first, second = deps[0], deps[1]
+        metric["expression"] = {
+            "rules": [
+                {"condition": f"{first} == 'Critical' or {second} == 'Critical'", "return": "Critical"},
+                {"condition": f"{first} == {second}", "return": first}
+            ],
+            "default": deps[-1]
+        }
+    elif mtype == "if_then_else":
+        metric["expression"] = {"condition": f"{deps[0]} == 'High'", "if_true": deps[0], "if_false": deps[1]}
+    elif mtype in ("worst_of", "best_of"):
+        metric["expression"] = {"rating_order": list(RATINGS)}
+    elif mtype == "lookup_matrix":
+        metric["matrix_ref"] = "risk"
+    return metric
+
+
+def generate_config(size: int = 200, depth: int = 8, fan_in: int = 3,
+                    type_mix: Optional[Dict[str, float]] = None, n_inputs: Optional[int] = None,
+                    seed: int = 0) -> Dict[str, Any]:
+    """
+    Layered synthetic metric config
+
+    Metrics are spread over depth layers; the first layer thresholds raw
+    inputs and every later metric takes one dependency from the previous
+    layer (when one of the right kind exists) plus up to fan_in - 1 from
+    any earlier layer. Types are drawn from type_mix weights among those
+    whose dependency kind is available.
+
+    Returns:
+        {"metrics": ..., "inputs": [...], "lookup_matrices": {...}}
+    """
+    if size < 1 or depth < 1 or fan_in < 1:
+        raise ValueError("size, depth and fan_in must be at least 1")
+    mix = {t: w for t, w in (type_mix or DEFAULT_MIX).items() if w > 0}
+    unknown = set(mix) - set(TYPE_SPECS)
+    if unknown:
+        raise ValueError(f"Unknown metric types in mix: {sorted(unknown)}")
+
+    rng = random.Random(seed)
+    inputs = [f"in{i}" for i in range(n_inputs or max(4, size // 10))]
+    metrics: Dict[str, Any] = {}
+    by_kind: Dict[str, List[str]] = {"input": inputs, "rating": [], "score": [], "number": []}
+    previous: Dict[str, List[str]] = {}
+    current: Dict[str, List[str]] = {}
+    layer = 0
+
+    for i in range(size):
+        metric_layer = min(i * depth // size, depth - 1)
+        if metric_layer != layer:
+            layer, previous, current = metric_layer, current, {}
+
+        candidates = []
+        for mtype, weight in mix.items():
+            dep_kind, _, min_deps, _ = TYPE_SPECS[mtype]
+            if (layer == 0) != (dep_kind == "input"):
+                continue
+            if len(by_kind[dep_kind]) >= min_deps:
+                candidates.append((mtype, weight))
+        if not candidates:
+            candidates = [("threshold", 1)]
+        mtype = rng.choices([c[0] for c in candidates], [c[1] for c in candidates])[0]
+
+        dep_kind, out_kind, min_deps, max_deps = TYPE_SPECS[mtype]
+        pool = by_kind[dep_kind]
+        count = min(rng.randint(min_deps, max(min_deps, max_deps or fan_in)), len(pool))
+        deps: List[str] = []
+        recent = previous.get(dep_kind)
+        if recent:
+            deps.append(rng.choice(recent))
+        while len(deps) < count:
+            dep = rng.choice(pool)
+            if dep not in deps:
+                deps.append(dep)
+
+        m_id = f"m{i}"
+        metrics[m_id] = _build_metric(mtype, deps, rng)
+        by_kind[out_kind].append(m_id)
+        current.setdefault(out_kind, []).append(m_id)
+
+    used = {dep for metric in metrics.values() for dep in metric["dependencies"]}
+    return {
+        "metrics": metrics,
+        "inputs": [name for name in inputs if name in used],
+        "lookup_matrices": {"risk": RISK_MATRIX}
+    }
+
+
+def generate_inputs(config: Dict[str, Any], n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Input population for a generated config; values spread over every threshold band"""
+    rng = random.Random(seed)
+    names = config["inputs"]
+    return [{name: rng.randint(0, 40) for name in names} for _ in range(n)]
+
+
+def graph_depth(metrics: Dict[str, Any]) -> int:
+    """Longest dependency chain, counted in metrics"""
+    levels: Dict[str, int] = {}
+    for m_id in impact.get_eval_order(metrics):
+        deps = [levels[d] for d in metrics[m_id].get("dependencies", []) if d in levels]
+        levels[m_id] = 1 + max(deps, default=0)
+    return max(levels.values(), default=0)
+
+
+# =================================================================
+# EVALUATOR RUNNERS
+# =================================================================
+
+def _plan(config: Dict[str, Any]) -> "impact.ExecutionPlan":
+    """Compiled plan for a generated config (validated against placeholder inputs)"""
+    placeholders = dict.fromkeys(config["inputs"], 0)
+    return impact.EnhancedMetricEvaluator(config["metrics"], placeholders).compile()
+
+
+def _runner(name: str, config: Dict[str, Any]) -> Callable[[Dict[str, Any]], Any]:
+    """One-entity evaluation function for the named evaluator"""
+    metrics = config["metrics"]
+    order = impact.get_eval_order(metrics)
+    if name == "original":
+        return lambda inputs: impact.MetricEvaluator(metrics, inputs).run_evaluation(order)
+    if name == "rule_usage":
+        matrices = config["lookup_matrices"]
+        return lambda inputs: impact.RuleUsageMetricEvaluator(metrics, inputs, matrices).run_evaluation(order)
+    if name == "enhanced":
+        return lambda inputs: impact.EnhancedMetricEvaluator(metrics, inputs).run_evaluation()
+    if name == "compiled":
+        plan = _plan(config)
+        return plan.run_values
+    raise ValueError(f"Unknown evaluator: {name}")
+
+
+def _columns(population: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    return {name: [row[name] for row in population] for name in population[0]}
+
+
+def measure_throughput(name: str, config: Dict[str, Any],
+                       population: List[Dict[str, Any]], repeat: int = 5) -> Dict[str, float]:
+    """Evaluations/sec over the whole population, best of repeat passes"""
+    with _gc_paused():
+        elapsed = min(_passes(name, config, population, repeat))
+    return {
+        "evals_per_sec": len(population) / elapsed,
+        "us_per_entity": elapsed / len(population) * 1e6
+    }
+
+
+@contextmanager
+def _gc_paused():
+    """Keep the cyclic collector out of timed loops, as timeit does"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _passes(name: str, config: Dict[str, Any], population: List[Dict[str, Any]],
+            repeat: int) -> List[float]:
+    timings = []
+    if name == "batch":
+        evaluator = impact.EnhancedMetricEvaluator(config["metrics"], dict(population[0]))
+        columns = _columns(population)
+        evaluator.evaluate_batch(_columns(population[:10]))
+        for _ in range(repeat):
+            start = time.perf_counter()
+            evaluator.evaluate_batch(columns)
+            timings.append(time.perf_counter() - start)
+    else:
+        run = _runner(name, config)
+        for inputs in population[:10]:
+            run(dict(inputs))
+        for _ in range(repeat):
+            rows = [dict(inputs) for inputs in population]
+            start = time.perf_counter()
+            for inputs in rows:
+                run(inputs)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def measure_type_costs(name: str, config: Dict[str, Any],
+                       population: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Mean nanoseconds per call for each metric type"""
+    metrics = config["metrics"]
+    if name in ("enhanced", "compiled"):
+        profiler = impact.MetricProfiler()
+        if name == "enhanced":
+            for inputs in population:
+                impact.EnhancedMetricEvaluator(metrics, dict(inputs), profiler=profiler).run_evaluation()
+        else:
+            plan = _plan(config)
+            for inputs in population:
+                plan.run_values(inputs, profiler)
+        return {t: s.total_ns / s.calls for t, s in profiler.by_type.items() if s.calls}
+
+    if name not in ("original", "rule_usage"):
+        return {}
+    totals: Dict[str, List[int]] = {}
+    order = impact.get_eval_order(metrics)
+    for inputs in population:
+        if name == "original":
+            evaluator = impact.MetricEvaluator(metrics, dict(inputs))
+        else:
+            evaluator = impact.RuleUsageMetricEvaluator(metrics, dict(inputs), config["lookup_matrices"])
+        for mtype, evaluate in list(evaluator.dispatch_map.items()):
+            evaluator.dispatch_map[mtype] = _timed(evaluate, totals.setdefault(mtype, [0, 0]))
+        evaluator.run_evaluation(order)
+    return {t: total / calls for t, (total, calls) in totals.items() if calls}
+
+
+def _timed(evaluate: Callable, total: List[int]) -> Callable:
+    def wrapper(m_id, metric):
+        start = time.perf_counter_ns()
+        try:
+            return evaluate(m_id, metric)
+        finally:
+            total[0] += time.perf_counter_ns() - start
+            total[1] += 1
+    return wrapper
+
+
+def measure_memory(name: str, config: Dict[str, Any],
+                   population: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Bytes per entity to keep every entity's results in memory"""
+    metrics = config["metrics"]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        if name == "batch":
+            evaluator = impact.EnhancedMetricEvaluator(metrics, dict(population[0]))
+            before = tracemalloc.get_traced_memory()[0]
+            kept: Any = evaluator.evaluate_batch(_columns(population))
+        elif name == "compiled":
+            plan = _plan(config)
+            before = tracemalloc.get_traced_memory()[0]
+            kept = plan.run_table(population)
+        else:
+            run = _runner(name, config)
+            rows = [dict(inputs) for inputs in population]
+            before = tracemalloc.get_traced_memory()[0]
+            kept = [run(inputs) for inputs in rows]
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return {"bytes_per_entity": (after - before) / len(population)}
+
+
+def measure_impact_analysis(config: Dict[str, Any], population: List[Dict[str, Any]],
+                            queries: int = 200, seed: int = 0) -> Dict[str, float]:
+    """Latency of single-input what-if queries against one entity"""
+    rng = random.Random(seed)
+    evaluator = impact.EnhancedMetricEvaluator(config["metrics"], dict(population[0]))
+    evaluator.impact_analysis({})
+    with _gc_paused():
+        latencies = _impact_latencies(evaluator, config, rng, queries)
+    latencies.sort()
+    return {
+        "mean_us": sum(latencies) / len(latencies) / 1e3,
+        "p50_us": latencies[len(latencies) // 2] / 1e3,
+        "p99_us": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] / 1e3
+    }
+
+
+def _impact_latencies(evaluator: "impact.EnhancedMetricEvaluator", config: Dict[str, Any],
+                      rng: random.Random, queries: int) -> List[int]:
+    latencies = []
+    for _ in range(queries):
+        changes = {rng.choice(config["inputs"]): rng.randint(0, 40)}
+        start = time.perf_counter_ns()
+        evaluator.impact_analysis(changes)
+        latencies.append(time.perf_counter_ns() - start)
+    return latencies
+
+
+def measure_eval_order(config: Dict[str, Any], repeat: int = 51) -> Dict[str, float]:
+    """Median time of the uncached topological sort vs the memoized get_eval_order"""
+    metrics = config["metrics"]
+    impact.get_eval_order(metrics)
+    figures = {}
+    for figure, sort in (("cold_us", impact.config._compute_eval_order), ("cached_us", impact.get_eval_order)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            sort(metrics)
+            timings.append(time.perf_counter_ns() - start)
+        figures[figure] = sorted(timings)[repeat // 2] / 1e3
+    return figures
+
+
+def measure_import_time(module: str = "impact", repeat: int = 11) -> Dict[str, Any]:
+    """
+    Median and best time of importing module in fresh interpreters
+
+    The package is byte-compiled first, so this measures a warm worker
+    start rather than source compilation. Also lists any
+    CORE_FORBIDDEN_MODULES the import loaded.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    compileall.compile_dir(os.path.join(root, module), quiet=1)
+    code = ("import sys, time\n"
+            "before = set(sys.modules)\n"
+            "start = time.perf_counter()\n"
+            f"import {module}\n"
+            "print((time.perf_counter() - start) * 1e3)\n"
+            "print(','.join(sorted(set(sys.modules) - before)))")
+    timings = []
+    loaded = set()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.splitlines()
+        timings.append(float(output[0]))
+        loaded.update(output[1].split(",") if len(output) > 1 else ())
+    heavy = sorted(name for name in loaded
+                   if any(name == f or name.startswith(f + ".") for f in CORE_FORBIDDEN_MODULES))
+    return {"import_ms": sorted(timings)[repeat // 2], "best_import_ms": min(timings),
+            "budget_ms": CORE_IMPORT_BUDGET_MS, "heavy_modules": heavy}
+
+
+def check_import_budget(figures: Dict[str, Any], budget_ms: float = CORE_IMPORT_BUDGET_MS) -> List[str]:
+    """Problems with a measure_import_time() result; empty when within budget"""
+    problems = []
+    if figures["import_ms"] > budget_ms:
+        problems.append(f"import took {figures['import_ms']:.1f}ms, budget {budget_ms:.1f}ms")
+    if figures["heavy_modules"]:
+        problems.append("import loaded " + ", ".join(figures["heavy_modules"]))
+    return problems
+
+
+# =================================================================
+# SUITE, BASELINES AND COMPARISON
+# =================================================================
+
+def run_suite(sizes: List[int], depth: int = 8, fan_in: int = 3, entities: int = 2000,
+              suites: Optional[List[str]] = None, type_mix: Optional[Dict[str, float]] = None,
+              seed: int = 0, sample: int = 300, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Benchmark every suite at every size
+
+    Returns:
+        {"meta": {...}, "results": {"suite/size/evaluator": {figure: value}}}
+        where the "impact_analysis" and "eval_order" evaluators hold those
+        measurements.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    mix = type_mix or DEFAULT_MIX
+    for suite in suites or list(SUITES):
+        allowed, evaluators = SUITES[suite]
+        suite_mix = {t: w for t, w in mix.items() if t in allowed}
+        for size in sizes:
+            config = generate_config(size, depth, fan_in, suite_mix, seed=seed)
+            population = generate_inputs(config, entities, seed)
+            shape = {"metrics": size, "inputs": len(config["inputs"]),
+                     "depth": graph_depth(config["metrics"]), "entities": entities,
+                     "types": dict(Counter(m["type"] for m in config["metrics"].values()))}
+            for name in evaluators:
+                figures = dict(shape)
+                figures.update(measure_throughput(name, config, population, repeat))
+                figures.update(measure_memory(name, config, population[:sample]))
+                costs = measure_type_costs(name, config, population[:sample])
+                if costs:
+                    figures["type_cost_ns"] = costs
+                results[f"{suite}/{size}/{name}"] = figures
+            if "enhanced" in evaluators:
+                results[f"{suite}/{size}/impact_analysis"] = dict(shape, **measure_impact_analysis(config, population, seed=seed))
+            results[f"{suite}/{size}/eval_order"] = dict(shape, **measure_eval_order(config))
+    results["import/impact"] = measure_import_time()
+
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": sizes, "depth": depth, "fan_in": fan_in,
+            "entities": entities, "seed": seed, "repeat": repeat, "type_mix": mix
+        },
+        "results": results
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float = 0.3) -> List[Tuple[str, str, float, float]]:
+    """(key, figure, baseline, current) for each figure that regressed past tolerance"""
+    regressions = []
+    for key, figures in current["results"].items():
+        old_figures = baseline.get("results", {}).get(key)
+        if not old_figures:
+            continue
+        for figure, value in figures.items():
+            old = old_figures.get(figure)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            if figure not in ("evals_per_sec",) + LOWER_IS_BETTER:
+                continue
+            if figure in LOWER_IS_BETTER:
+                worse = value > old * (1 + tolerance)
+            else:
+                worse = value < old * (1 - tolerance)
+            if worse:
+                regressions.append((key, figure, old, value))
+    return regressions
+
+
+def _print_report(report: Dict[str, Any]):
+    print(f"{'benchmark':<36} {'evals/s':>12} {'us/entity':>11} {'bytes/entity':>13}")
+    for key, figures in report["results"].items():
+        if "evals_per_sec" in figures:
+            print(f"{key:<36} {figures['evals_per_sec']:>12,.0f} {figures['us_per_entity']:>11.1f} "
+                  f"{figures['bytes_per_entity']:>13,.0f}")
+        elif "import_ms" in figures:
+            print(f"{key:<36} median {figures['import_ms']:.1f}ms  best {figures['best_import_ms']:.1f}ms  "
+                  f"budget {figures['budget_ms']:.1f}ms")
+        elif "mean_us" in figures:
+            print(f"{key:<36} mean {figures['mean_us']:.1f}us  p50 {figures['p50_us']:.1f}us  "
+                  f"p99 {figures['p99_us']:.1f}us")
+        else:
+            print(f"{key:<36} cold {figures['cold_us']:.1f}us  cached {figures['cached_us']:.2f}us")
+
+
+def _parse_mix(text: Optional[str]) -> Optional[Dict[str, float]]:
+    if not text:
+        return None
+    mix = {}
+    for part in text.split(","):
+        mtype, _, weight = part.partition("=")
+        mix[mtype.strip()] = float(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the metric evaluators on synthetic rule graphs")
+    parser.add_argument("--sizes", default="50,200,1000", help="comma-separated metric counts")
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--fan-in", type=int, default=3)
+    parser.add_argument("--entities", type=int, default=2000)
+    parser.add_argument("--suites", default=",".join(SUITES), help="comma-separated: " + ", ".join(SUITES))
+    parser.add_argument("--mix", help="type weights, e.g. threshold=2,custom=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes per benchmark; the best is kept")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="relative change treated as a regression")
+    parser.add_argument("--import-budget", type=float, default=CORE_IMPORT_BUDGET_MS,
+                        help="milliseconds `import impact` may take")
+    parser.add_argument("--import-only", action="store_true",
+                        help="only check the import-time budget")
+    args = parser.parse_args(argv)
+
+    if args.import_only:
+        figures = measure_import_time()
+        print(f"import impact: median {figures['import_ms']:.1f}ms, best {figures['best_import_ms']:.1f}ms, "
+              f"budget {args.import_budget:.1f}ms")
+        problems = check_import_budget(figures, args.import_budget)
+        for problem in problems:
+            print(f"IMPORT BUDGET {problem}")
+        return 1 if problems else 0
+
+    import logging
+    logging.getLogger("impact").setLevel(logging.WARNING)
+
+    report = run_suite([int(s) for s in args.sizes.split(",")], args.depth, args.fan_in,
+                       args.entities, args.suites.split(","), _parse_mix(args.mix), args.seed,
+                       repeat=args.repeat)
+    _print_report(report)
+    budget_problems = check_import_budget(report["results"]["import/impact"], args.import_budget)
+    for problem in budget_problems:
+        print(f"IMPORT BUDGET {problem}")
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Baseline written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(report, json.load(handle), args.tolerance)
+        for key, figure, old, new in regressions:
+            print(f"REGRESSION {key} {figure}: {old:.2f} -> {new:.2f}")
+        if regressions:
+            return 1
+        print("No regressions")
+    return 1 if budget_problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
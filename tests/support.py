@@ -0,0 +1,116 @@
+"""Shared configuration, random inputs and reference evaluation for the tests"""
+import copy
+import math
+import random
+from typing import Dict, Any, List
+
+from impact import EnhancedMetricEvaluator
+
+RATING_SCORES = {"Low": 1, "Moderate": 2, "High": 3, "Critical": 4}
+
+# The example configuration of python -m impact plus one metric of every
+# other type, so each suite covers the whole dispatch map
+METRICS: Dict[str, Any] = {
+    "G1_Rating": {"type": "threshold", "dependencies": ["G1"], "expression": [10, 20, 30],
+                  "labels": ["Low", "Moderate", "High", "Critical"]},
+    "G2_Rating": {"type": "threshold", "dependencies": ["G2"], "expression": [15, 25, 35]},
+    "G3_Rating": {"type": "threshold", "dependencies": ["G3"], "expression": [10, 20, 30]},
+    "Primary_Rating": {"type": "fallback", "dependencies": ["G1_Rating", "G2_Rating"],
+                       "expression": {"na_values": ["N/A", None, ""]}},
+    "Backup_Rating": {"type": "coalesce", "dependencies": ["High_Priority_Rating", "G3_Rating"],
+                      "expression": {"default": "Low"}},
+    "Status_Based_Rating": {"type": "if_then_else", "dependencies": ["Status", "G1_Rating", "G2_Rating"],
+                            "expression": {"condition": "Status == 'Active'",
+                                           "if_true": "G1_Rating", "if_false": "G2_Rating"}},
+    "Worst_Case_Rating": {"type": "rating_worst", "dependencies": ["G1_Rating", "G2_Rating", "G3_Rating"]},
+    "Best_Case_Rating": {"type": "rating_best", "dependencies": ["High_Priority_Rating", "G2_Rating"]},
+    "Priority_Rating": {"type": "priority_select",
+                        "dependencies": ["High_Priority_Rating", "Medium_Priority_Rating", "Low_Priority_Rating"],
+                        "expression": {"default": "Low"}},
+    "Complex_Logic_Rating": {"type": "conditional_rating",
+                             "dependencies": ["Status", "Category", "G1_Rating", "G2_Rating"],
+                             "expression": {"rules": [
+                                 {"condition": "Status == 'Critical' and Category == 'A'", "return": "Critical"},
+                                 {"condition": "Status == 'Active'", "return": "G1_Rating"},
+                                 {"condition": "Category == 'B'", "return": "G2_Rating"}
+                             ], "default": "Low"}},
+    "G1_Score": {"type": "map_rating", "dependencies": ["G1_Rating"], "expression": RATING_SCORES},
+    "G2_Score": {"type": "map_rating", "dependencies": ["G2_Rating"], "expression": RATING_SCORES},
+    "G3_Score": {"type": "map_rating", "dependencies": ["G3_Rating"], "expression": RATING_SCORES},
+    "Average_Score": {"type": "avg", "dependencies": ["G1_Score", "G2_Score", "G3_Score"], "precision": 1},
+    "Weighted_Risk": {"type": "weighted_sum", "dependencies": ["G1_Score", "G2_Score", "G3_Score"],
+                      "expression": {"weights": [0.4, 0.35, 0.25]}, "precision": 2},
+    "Risk_Level": {"type": "conditional", "dependencies": ["Weighted_Risk", "G1_Score"],
+                   "expression": {"conditions": [
+                       {"if": "Weighted_Risk >= 3.5", "then": "Critical"},
+                       {"if": "Weighted_Risk >= 2.5", "then": "High"},
+                       {"if": "Weighted_Risk >= 1.5", "then": "Moderate"}
+                   ], "default": "Low"}},
+    "Final_Score": {"type": "max", "dependencies": ["G1_Score", "G2_Score", "G3_Score"]},
+    "Final_Rating": {"type": "map_score", "dependencies": ["Final_Score"],
+                     "expression": {"1": "Low", "2": "Moderate", "3": "High", "4": "Critical"}},
+    "Custom_Sum": {"type": "custom", "dependencies": ["G1", "G2"],
+                   "expression": "lambda G1, G2: G1 + G2 * 2 if G1 > G2 else G2 - G1"},
+    "Pct": {"type": "percentage", "dependencies": ["G1", "G2"]},
+    "Score_Sum": {"type": "sum", "dependencies": ["G1_Score", "G2_Score"]},
+    "Min_Score": {"type": "min", "dependencies": ["G1_Score", "G2_Score"]},
+    "Worst_Of": {"type": "worst_of", "dependencies": ["G1_Rating", "High_Priority_Rating"],
+                 "expression": {"rating_order": ["Low", "Moderate", "High", "Critical"]}},
+    "Best_Of": {"type": "best_of", "dependencies": ["G1_Rating", "G3_Rating"],
+                "expression": {"rating_order": ["Low", "Moderate", "High", "Critical"], "exclude_na": False}},
+    "Numeric_Worst": {"type": "worst_of", "dependencies": ["G3_Score", "Level"],
+                      "expression": {"rating_order": [1, 2, 3, 4]}},
+    "Category_Weight": {"type": "lookup", "dependencies": ["Category"],
+                        "expression": {"table": {"A": 1, "B": 2}}, "default": 9},
+}
+
+INPUT_NAMES = ["G1", "G2", "G3", "Status", "Category", "Level",
+               "High_Priority_Rating", "Medium_Priority_Rating", "Low_Priority_Rating"]
+
+
+def config() -> Dict[str, Any]:
+    """A private copy of METRICS"""
+    return copy.deepcopy(METRICS)
+
+
+def random_inputs(rng: random.Random) -> Dict[str, Any]:
+    """One entity, with values on and between every threshold and N/A-like ratings"""
+    return {
+        "G1": rng.choice([rng.randint(0, 40), rng.randint(0, 40) + 0.5, 10, 20, 30]),
+        "G2": rng.choice([rng.randint(0, 45), 0, 15, 25, 35]),
+        "G3": rng.randint(0, 40),
+        "Status": rng.choice(["Active", "Critical", "Idle"]),
+        "Category": rng.choice(["A", "B", "C"]),
+        "Level": rng.choice([1, 2.0, 3, 3.0, 4, "x", None]),
+        "High_Priority_Rating": rng.choice(["N/A", "High", None, "", "Critical"]),
+        "Medium_Priority_Rating": rng.choice(["High", "N/A"]),
+        "Low_Priority_Rating": "Moderate",
+    }
+
+
+def random_rows(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [random_inputs(rng) for _ in range(count)]
+
+
+def reference(metrics: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Plain row-wise run_evaluation on a fresh evaluator"""
+    return EnhancedMetricEvaluator(metrics, dict(inputs)).run_evaluation()
+
+
+def same(first: Any, second: Any) -> bool:
+    """Equal and of the same type (so 3 and 3.0 differ), with NaN equal to NaN"""
+    if type(first) is not type(second):
+        return False
+    if isinstance(first, float) and math.isnan(first):
+        return math.isnan(second)
+    if isinstance(first, float) and first == 0:
+        return math.copysign(1, first) == math.copysign(1, second)
+    return first == second
+
+
+def assert_same_results(actual: Dict[str, Any], expected: Dict[str, Any]):
+    assert list(actual) == list(expected)
+    mismatched = {m_id: (actual[m_id], expected[m_id]) for m_id in expected
+                  if not same(actual[m_id], expected[m_id])}
+    assert not mismatched
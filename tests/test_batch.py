@@ -0,0 +1,79 @@
+"""Columnar evaluate_batch against plain row-wise evaluation"""
+import pytest
+
+from impact import EnhancedMetricEvaluator
+from support import INPUT_NAMES, config, random_rows, reference, same
+
+np = pytest.importorskip("numpy")
+
+
+def _check(metrics, rows, columns):
+    results = EnhancedMetricEvaluator(metrics, dict(rows[0])).evaluate_batch(columns)
+    for i, row in enumerate(rows):
+        expected = reference(metrics, row)
+        mismatched = {m_id: (results[m_id][i], value) for m_id, value in expected.items()
+                      if not same(results[m_id].tolist()[i], value)}
+        assert not mismatched, f"row {i}: {mismatched}"
+
+
+def test_list_columns_match_run_evaluation():
+    rows = random_rows(400, seed=1)
+    _check(config(), rows, {name: [row[name] for row in rows] for name in INPUT_NAMES})
+
+
+def test_numpy_columns_match_run_evaluation():
+    rows = random_rows(400, seed=2)
+    for row in rows:
+        row["G1"] = float(row["G1"])
+    columns = {name: [row[name] for row in rows] for name in INPUT_NAMES}
+    columns["G1"] = np.array(columns["G1"], dtype=np.float64)
+    columns["G3"] = np.array(columns["G3"], dtype=np.int64)
+    columns["Status"] = np.array(columns["Status"])
+    _check(config(), rows, columns)
+
+
+def test_targets_limit_the_columns():
+    rows = random_rows(10)
+    evaluator = EnhancedMetricEvaluator(config(), dict(rows[0]))
+    results = evaluator.evaluate_batch({"G1": [row["G1"] for row in rows]}, targets=["G1_Score"])
+    assert list(results) == ["G1_Rating", "G1_Score"]
+
+
+def test_signed_zero_is_kept():
+    metrics = {
+        "Text": {"type": "custom", "dependencies": ["X"], "expression": "lambda X: str(X)"},
+        "Mixed": {"type": "custom", "dependencies": ["Y"], "expression": "lambda Y: str(Y)"},
+        "Avg": {"type": "avg", "dependencies": ["X", "X"]},
+        "Total": {"type": "sum", "dependencies": ["X", "Y"]},
+    }
+    xs = [0.0, -0.0, 1.5, -0.0, 0.0, -2.0]
+    ys = [-0.0, 0.0, "a", -0.0, 0.0, -0.0]
+    rows = [{"X": x, "Y": y} for x, y in zip(xs, ys)]
+    # Total is only defined where Y is a number
+    metrics_without_total = {m_id: m for m_id, m in metrics.items() if m_id != "Total"}
+    _check(metrics_without_total, rows, {"X": np.array(xs), "Y": ys})
+    numeric = [row for row in rows if row["Y"] != "a"]
+    _check(metrics, numeric, {"X": np.array([r["X"] for r in numeric]), "Y": np.array([r["Y"] for r in numeric])})
+
+
+def test_unequal_columns_raise():
+    evaluator = EnhancedMetricEvaluator(config(), random_rows(1)[0])
+    with pytest.raises(ValueError, match="rows, expected"):
+        evaluator.evaluate_batch({"G1": [1, 2], "G2": [1]})
+
+
+def test_signed_zero_extremes_match_run_evaluation():
+    metrics = {"M": {"type": "max", "dependencies": ["a", "b"]},
+               "N": {"type": "min", "dependencies": ["a", "b"]}}
+    a, b = [-0.0, 0.0, 1.5, -0.0], [0.0, -0.0, 1.5, -0.0]
+    _check(metrics, [{"a": x, "b": y} for x, y in zip(a, b)], {"a": np.array(a), "b": np.array(b)})
+
+
+def test_large_ints_do_not_overflow():
+    metrics = {"S": {"type": "sum", "dependencies": ["a", "b"]},
+               "A": {"type": "avg", "dependencies": ["a", "b"]},
+               "W": {"type": "weighted_sum", "dependencies": ["a", "b"], "expression": {"weights": [3, 1]}}}
+    for big in (2 ** 62, 2 ** 52 + 1, -(2 ** 62)):
+        a, b = [big, 1, big], [big, 2, -1]
+        _check(metrics, [{"a": x, "b": y} for x, y in zip(a, b)],
+               {"a": np.array(a, dtype=np.int64), "b": np.array(b, dtype=np.int64)})
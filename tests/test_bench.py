@@ -0,0 +1,76 @@
+"""Synthetic rule graphs from impact_bench against plain row-wise evaluation"""
+import pytest
+
+import impact
+import impact_bench
+from impact_bench import SUITES, TYPE_SPECS, compare, generate_config, generate_inputs, graph_depth
+from support import assert_same_results, reference
+
+
+def _suite_mix(suite):
+    allowed, _ = SUITES[suite]
+    return {mtype: weight for mtype, weight in impact_bench.DEFAULT_MIX.items() if mtype in allowed}
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_configs_are_seeded_layered_graphs(seed):
+    config = generate_config(120, depth=6, fan_in=4, seed=seed)
+    assert config == generate_config(120, depth=6, fan_in=4, seed=seed)
+    assert config != generate_config(120, depth=6, fan_in=4, seed=seed + 10)
+
+    metrics = config["metrics"]
+    assert len(metrics) == 120
+    seen = set(config["inputs"])
+    used = set()
+    for m_id, metric in metrics.items():
+        # Every dependency is an input or an earlier metric, so the graph is acyclic
+        assert set(metric["dependencies"]) <= seen, m_id
+        _, _, min_deps, max_deps = TYPE_SPECS[metric["type"]]
+        assert min_deps <= len(metric["dependencies"]) <= (max_deps or 4)
+        used.update(metric["dependencies"])
+        seen.add(m_id)
+    assert set(config["inputs"]) == used - set(metrics)
+    # Each layer takes a dependency from the one before, so chains cross every layer
+    assert graph_depth(metrics) >= 6
+    order = impact.get_eval_order(metrics)
+    position = {m_id: i for i, m_id in enumerate(order)}
+    assert sorted(order) == sorted(metrics)
+    assert all(position[dep] < position[m_id] for m_id, metric in metrics.items()
+               for dep in metric["dependencies"] if dep in metrics)
+
+
+def test_type_mix_is_respected():
+    config = generate_config(80, type_mix={"threshold": 1, "map_rating": 1, "custom": 1, "max": 0}, seed=3)
+    assert {metric["type"] for metric in config["metrics"].values()} == {"threshold", "map_rating", "custom"}
+    with pytest.raises(ValueError, match="Unknown metric types"):
+        generate_config(10, type_mix={"bogus": 1})
+
+
+@pytest.mark.parametrize("suite", ["original", "enhanced"])
+def test_runners_match_run_evaluation(suite):
+    config = generate_config(150, depth=8, fan_in=3, type_mix=_suite_mix(suite), seed=5)
+    population = generate_inputs(config, 40, seed=5)
+    assert population == generate_inputs(config, 40, seed=5)
+    _, evaluators = SUITES[suite]
+    runners = [impact_bench._runner(name, config) for name in evaluators if name in ("original", "enhanced")]
+    plan = impact_bench._plan(config)
+    for row in population:
+        expected = reference(config["metrics"], row)
+        assert_same_results(plan.run(row), expected)
+        for run in runners:
+            assert_same_results(dict(run(dict(row))), expected)
+
+
+def test_compare_flags_regressions_in_the_right_direction():
+    baseline = {"results": {"s/50/compiled": {"evals_per_sec": 1000.0, "us_per_entity": 10.0, "metrics": 50}}}
+    current = {"results": {"s/50/compiled": {"evals_per_sec": 600.0, "us_per_entity": 14.0, "metrics": 99},
+                           "s/200/compiled": {"evals_per_sec": 1.0}}}
+    assert compare(current, baseline) == [("s/50/compiled", "evals_per_sec", 1000.0, 600.0),
+                                          ("s/50/compiled", "us_per_entity", 10.0, 14.0)]
+    assert compare(current, baseline, tolerance=0.5) == []
+
+
+def test_import_budget_problems():
+    figures = {"import_ms": 80.0, "heavy_modules": ["numpy"]}
+    assert impact_bench.check_import_budget(figures, budget_ms=100.0) == ["import loaded numpy"]
+    assert len(impact_bench.check_import_budget(figures, budget_ms=50.0)) == 2
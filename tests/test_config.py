@@ -0,0 +1,64 @@
+"""Config fingerprints and the shared config registry"""
+import pytest
+
+from impact import EnhancedMetricEvaluator, config_fingerprint, get_eval_order
+from support import config, random_rows, same
+
+
+def test_fingerprint_follows_content_and_key_order():
+    metrics = config()
+    assert config_fingerprint(metrics) == config_fingerprint(config())
+    reordered = dict(reversed(list(metrics.items())))
+    assert config_fingerprint(reordered) != config_fingerprint(metrics)
+
+
+def test_equal_configs_share_an_entry():
+    row = random_rows(1)[0]
+    first = EnhancedMetricEvaluator(config(), dict(row))
+    second = EnhancedMetricEvaluator(config(), dict(row))
+    assert first.config is second.config
+
+
+def test_edits_in_place_are_seen():
+    metrics = {"A": {"type": "threshold", "dependencies": ["X"], "expression": [10, 20, 30]}}
+    EnhancedMetricEvaluator(metrics, {"X": 5}).run_evaluation()
+    assert get_eval_order(metrics) == ["A"]
+
+    metrics["B"] = {"type": "threshold", "dependencies": ["A2"], "expression": [1, 2, 3]}
+    with pytest.raises(ValueError, match="Unknown dependency 'A2'"):
+        EnhancedMetricEvaluator(metrics, {"X": 5})
+    assert get_eval_order(metrics) == ["A", "B"]
+
+    metrics["B"]["dependencies"] = ["X"]
+    metrics["A"]["expression"] = [1, 2, 3]
+    evaluator = EnhancedMetricEvaluator(metrics, {"X": 25})
+    assert evaluator.run_evaluation() == {"A": "Critical", "B": "Critical"}
+    assert evaluator.compile().run({"X": 25}) == {"A": "Critical", "B": "Critical"}
+
+
+def test_cycles_are_reported():
+    metrics = {"A": {"type": "max", "dependencies": ["B"]}, "B": {"type": "max", "dependencies": ["A"]}}
+    with pytest.raises(ValueError):
+        get_eval_order(metrics)
+
+
+def test_key_and_value_types_keep_configs_apart():
+    scores = {"type": "map_rating", "dependencies": ["x"], "default": 0}
+    by_text = {"R": {**scores, "expression": {"1": 10}}}
+    by_number = {"R": {**scores, "expression": {1: 10}}}
+    assert config_fingerprint(by_text) != config_fingerprint(by_number)
+    assert config_fingerprint({"R": {**scores, "expression": [1, 2]}}) != \
+        config_fingerprint({"R": {**scores, "expression": (1, 2)}})
+
+    for metrics in (by_text, by_number, by_text):
+        evaluator = EnhancedMetricEvaluator(metrics, {"x": 1})
+        assert evaluator.compile().run({"x": 1}) == evaluator.run_evaluation()
+
+
+@pytest.mark.parametrize("before, after", [(1, True), (1, 1.0), (0.0, -0.0)])
+def test_edits_that_compare_equal_are_seen(before, after):
+    metrics = {"K": {"type": "lookup", "dependencies": ["x"], "expression": {"table": {"a": before}}, "default": 0}}
+    assert EnhancedMetricEvaluator(metrics, {"x": "a"}).compile().run({"x": "a"})["K"] == before
+    metrics["K"]["expression"]["table"]["a"] = after
+    result = EnhancedMetricEvaluator(metrics, {"x": "a"}).compile().run({"x": "a"})["K"]
+    assert same(result, after)
@@ -0,0 +1,66 @@
+"""Ancestor/descendant bitset index against graph search and evaluation"""
+import random
+
+from impact import DependencyIndex, EnhancedMetricEvaluator, get_eval_order
+from support import INPUT_NAMES, config, random_inputs, random_rows, reference
+
+
+def _search(metrics, node):
+    """Everything upstream of node, by plain depth-first search"""
+    seen, stack = set(), list(metrics.get(node, {}).get("dependencies", []))
+    while stack:
+        dep = stack.pop()
+        if dep not in seen:
+            seen.add(dep)
+            stack.extend(metrics.get(dep, {}).get("dependencies", []))
+    return seen
+
+
+def _random_graph(rng, size, cyclic):
+    names = [f"M{i}" for i in range(size)]
+    metrics = {}
+    for i, name in enumerate(names):
+        pool = names if cyclic else names[:i]
+        deps = rng.sample(pool, min(len(pool), rng.randint(0, 3))) + rng.sample(["a", "b", "c"], rng.randint(0, 1))
+        metrics[name] = {"type": "max", "dependencies": deps or ["a"]}
+    return metrics
+
+
+def test_index_matches_graph_search():
+    rng = random.Random(10)
+    for trial in range(60):
+        cyclic = trial % 3 == 0
+        metrics = _random_graph(rng, rng.randint(1, 25), cyclic)
+        order = None if cyclic else tuple(get_eval_order(metrics))
+        index = DependencyIndex(metrics, order)
+        nodes = list(metrics) + ["a", "b", "c"]
+        for node in nodes:
+            upstream = _search(metrics, node)
+            assert set(index.upstream(node)) == upstream
+            assert set(index.downstream(node)) == {m for m in metrics if node in _search(metrics, m)}
+            other = rng.choice(nodes)
+            assert set(index.shared_upstream(node, other)) == upstream & _search(metrics, other)
+            assert index.depends_on(node, other) == (other in upstream)
+
+
+def test_deep_chains_do_not_recurse():
+    metrics = {"M0": {"type": "max", "dependencies": ["a"]}}
+    for i in range(1, 5000):
+        metrics[f"M{i}"] = {"type": "max", "dependencies": [f"M{i - 1}"]}
+    evaluator = EnhancedMetricEvaluator(metrics, {"a": 1})
+    assert len(evaluator.get_metric_dependencies("M4999")) == 5000
+    assert evaluator.get_metric_dependents("a")[-1] == "M4999"
+
+
+def test_metrics_only_read_their_upstream_inputs():
+    rng = random.Random(12)
+    evaluator = EnhancedMetricEvaluator(config(), random_rows(1)[0])
+    for row in random_rows(40, seed=12):
+        changed = random_inputs(rng)
+        before = reference(evaluator.metrics, row)
+        for name in INPUT_NAMES:
+            after = reference(evaluator.metrics, {**row, name: changed[name]})
+            moved = {m_id for m_id in before if before[m_id] != after[m_id]}
+            assert moved <= set(evaluator.get_metric_dependents(name))
+            for m_id in moved:
+                assert name in evaluator.get_metric_dependencies(m_id)
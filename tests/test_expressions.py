@@ -0,0 +1,110 @@
+"""The whitelisted expression language against Python semantics"""
+import random
+
+import pytest
+
+from impact import CONDITION_FUNCTIONS, CONDITION_OPERATORS, EnhancedMetricEvaluator, parse_expression
+from support import same
+
+NAMES = ["a", "b", "c", "s"]
+POSITIONS = {name: i for i, name in enumerate(NAMES)}
+
+
+def _random_expression(rng: random.Random, depth: int = 0) -> str:
+    if depth > 3 or rng.random() < 0.25:
+        return rng.choice(["a", "b", "c", "2", "-3", "0.5", "0", "True", "None"])
+    form = rng.randrange(9)
+    left, right = _random_expression(rng, depth + 1), _random_expression(rng, depth + 1)
+    if form == 0:
+        return f"({left} {rng.choice(['+', '-', '*', '/', '//', '%'])} {right})"
+    if form == 1:
+        return f"({left} ** {rng.choice(['2', '0', '-1'])})"
+    if form == 2:
+        return f"({left} {rng.choice(['==', '!=', '<', '<=', '>', '>='])} {right})"
+    if form == 3:
+        return f"({left} {rng.choice(['and', 'or'])} {right})"
+    if form == 4:
+        return f"({rng.choice(['not', '-', '+'])} {left})"
+    if form == 5:
+        return f"({left} if {_random_expression(rng, depth + 1)} else {right})"
+    if form == 6:
+        return f"{rng.choice(['abs', 'bool', 'str'])}({left})"
+    if form == 7:
+        return f"{rng.choice(['max', 'min'])}({left}, {right})"
+    return f"({left} {rng.choice(['in', 'not in'])} ({right}, 1, 'x'))"
+
+
+def _outcome(function, *args):
+    try:
+        return function(*args)
+    except Exception as e:
+        return type(e)
+
+
+def test_random_expressions_match_python():
+    rng = random.Random(21)
+    for _ in range(2000):
+        source = _random_expression(rng)
+        evaluate = parse_expression(source).closure(POSITIONS, CONDITION_FUNCTIONS, CONDITION_OPERATORS)
+        values = [rng.choice([0, 1, -2, 3.5, -0.0, True]) for _ in NAMES[:3]] + ["x"]
+        expected = _outcome(eval, source, {"__builtins__": {}, **CONDITION_FUNCTIONS}, dict(zip(NAMES, values)))
+        actual = _outcome(evaluate, values)
+        assert same(actual, expected), f"{source} with {values}: {actual!r} != {expected!r}"
+
+
+def test_custom_lambdas_match_python():
+    rng = random.Random(22)
+    namespace = EnhancedMetricEvaluator({}, {}).custom_namespace
+    for _ in range(300):
+        body = _random_expression(rng)
+        source = f"lambda a, b, c: {body}"
+        metrics = {"M": {"type": "custom", "dependencies": ["a", "b", "c"], "expression": source}}
+        inputs = {name: rng.choice([1, 2, -4, 2.5]) for name in "abc"}
+        actual = _outcome(lambda: EnhancedMetricEvaluator(metrics, inputs).run_evaluation()["M"])
+        if parse_expression(source, is_lambda=True).calls - namespace.keys():
+            # Checked up front, even on branches that would not run
+            assert actual is ValueError
+            continue
+        expected = _outcome(eval(source, {"__builtins__": {}, **namespace}), *inputs.values())
+        if isinstance(expected, type):
+            assert isinstance(actual, type)
+        else:
+            assert same(actual, expected), f"{source} with {inputs}: {actual!r} != {expected!r}"
+
+
+@pytest.mark.parametrize("source, message", [
+    ("X.real", "Attribute is not supported"),
+    ("X.__class__.__bases__", "Attribute is not supported"),
+    ("X[0]", "Subscript is not supported"),
+    ("[i for i in X]", "ListComp is not supported"),
+    ("(lambda: 1)()", "only named functions can be called"),
+    ("X @ X", "operator MatMult is not supported"),
+    ("X << 1", "operator LShift is not supported"),
+    ("max(X, key=abs)", "keyword arguments are not supported"),
+    ("X +", "Invalid expression"),
+])
+def test_unsupported_syntax_is_rejected(source, message):
+    with pytest.raises(ValueError, match=message):
+        parse_expression(source)
+
+
+@pytest.mark.parametrize("expression", [
+    "lambda X: open(X)",
+    "lambda X: __import__('os')",
+    "lambda X: eval('1')",
+    "lambda X: X.__class__",
+    "lambda X, Y: X",
+    "lambda X: Y",
+    "X + 1",
+])
+def test_unsafe_custom_expressions_fail_validation(expression):
+    metrics = {"M": {"type": "custom", "dependencies": ["X"], "expression": expression}}
+    with pytest.raises(ValueError, match="Configuration validation failed"):
+        EnhancedMetricEvaluator(metrics, {"X": 2})
+
+
+def test_unsafe_conditions_fail_validation():
+    metrics = {"M": {"type": "conditional", "dependencies": ["X"],
+                     "expression": {"conditions": [{"if": "X.__class__", "then": 1}], "default": 0}}}
+    with pytest.raises(ValueError, match="Attribute is not supported"):
+        EnhancedMetricEvaluator(metrics, {"X": 2})
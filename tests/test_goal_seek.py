@@ -0,0 +1,66 @@
+"""Goal-seek solutions against an exhaustive search of a small integer grid"""
+import itertools
+import random
+
+import pytest
+
+from impact import EnhancedMetricEvaluator
+from support import config, random_rows
+
+NAMES = ["G1", "G2", "G3"]
+GRID = range(0, 46)
+ORDER = ["Low", "Moderate", "High", "Critical"]
+GOALS = {
+    None: lambda reached, goal: reached == goal,
+    "at_least": lambda reached, goal: ORDER.index(reached) >= ORDER.index(goal),
+    "at_most": lambda reached, goal: ORDER.index(reached) <= ORDER.index(goal),
+}
+
+
+def _cheapest(plan, row, target, reaches, max_changes):
+    """(inputs changed, cost) of the cheapest grid solution with the fewest changes"""
+    for count in range(1, max_changes + 1):
+        costs = [sum(abs(value - row[name]) for name, value in zip(names, values))
+                 for names in itertools.combinations(NAMES, count)
+                 for values in itertools.product(GRID, repeat=count)
+                 if all(value != row[name] for name, value in zip(names, values))
+                 and reaches(plan.run({**row, **dict(zip(names, values))})[target])]
+        if costs:
+            return count, min(costs)
+    return None
+
+
+@pytest.mark.parametrize("target, direction, seed", [
+    ("Final_Rating", None, 1), ("Final_Rating", "at_most", 2), ("Worst_Case_Rating", "at_least", 3),
+    ("G2_Rating", None, 4)])
+def test_solutions_are_minimal(target, direction, seed):
+    rng = random.Random(seed)
+    for row in random_rows(8, seed=seed):
+        row.update({name: rng.choice(GRID) for name in NAMES})
+        evaluator = EnhancedMetricEvaluator(config(), dict(row))
+        plan = evaluator.compile()
+        goal = rng.choice(ORDER)
+        reaches = lambda reached: GOALS[direction](reached, goal)
+        report = evaluator.goal_seek(target, goal, direction, max_changes=2,
+                                     bounds={name: (GRID[0], GRID[-1]) for name in NAMES})
+        assert evaluator.input_values == row
+        solutions = report["solutions"]
+
+        if reaches(plan.run(row)[target]):
+            assert solutions[0]["changes"] == {}
+            continue
+        expected = _cheapest(plan, row, target, reaches, 2)
+        assert report["complete"]
+        found = (len(solutions[0]["changes"]), solutions[0]["cost"]) if solutions else None
+        assert found == expected, f"{row} -> {target} {direction or '=='} {goal}"
+        for solution in solutions:
+            assert reaches(plan.run({**row, **solution["changes"]})[target])
+            assert solution["value"] == plan.run({**row, **solution["changes"]})[target]
+        assert [(len(s["changes"]), s["cost"]) for s in solutions] == sorted(
+            (len(s["changes"]), s["cost"]) for s in solutions)
+
+
+def test_unknown_goal_raises():
+    evaluator = EnhancedMetricEvaluator(config(), random_rows(1)[0])
+    with pytest.raises(ValueError, match="not on the rating order"):
+        evaluator.goal_seek("Final_Rating", "Bogus", "at_least")
@@ -0,0 +1,78 @@
+"""Package layout: the light evaluation core and names loaded on first use"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+import impact
+import impact_bench
+from support import assert_same_results, config, random_rows, reference
+
+LAZY_MODULES = sorted({f"impact.{module}" for module in impact._LAZY_ATTRIBUTES.values()})
+HEAVY_MODULES = impact_bench.CORE_FORBIDDEN_MODULES + ("asyncio", "sqlite3")
+
+
+def _fresh_import(code):
+    """sys.modules added by `import impact` then code, in a fresh interpreter"""
+    script = ("import json, sys\n"
+              "before = set(sys.modules)\n"
+              "import impact\n"
+              f"{code}\n"
+              "print(json.dumps(sorted(set(sys.modules) - before)))")
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return set(json.loads(output.stdout.splitlines()[-1]))
+
+
+def test_core_import_stays_light():
+    loaded = _fresh_import("")
+    assert not [name for name in loaded if any(name == h or name.startswith(h + ".") for h in HEAVY_MODULES)]
+    assert not loaded & set(LAZY_MODULES)
+    # Importing does not configure logging; the check raises in the child otherwise
+    _fresh_import("import logging; assert not logging.getLogger().handlers")
+
+
+def test_lazy_names_load_only_their_module():
+    loaded = _fresh_import("impact.WavefrontScheduler")
+    assert "impact.wavefront" in loaded
+    assert not loaded & (set(LAZY_MODULES) - {"impact.wavefront"})
+
+
+@pytest.mark.parametrize("name", sorted(impact._LAZY_ATTRIBUTES))
+def test_lazy_names_resolve(name):
+    module = __import__(f"impact.{impact._LAZY_ATTRIBUTES[name]}", fromlist=[name])
+    assert getattr(impact, name) is getattr(module, name)
+    assert name in impact.__all__ and name in dir(impact)
+
+
+def test_unknown_names_raise():
+    with pytest.raises(AttributeError, match="has no attribute 'Bogus'"):
+        impact.Bogus
+    assert not hasattr(impact, "load_everything")
+
+
+def test_import_budget():
+    figures = impact_bench.measure_import_time(repeat=5)
+    # The best run is the steady figure; the median moves with machine load
+    assert impact_bench.check_import_budget(dict(figures, import_ms=figures["best_import_ms"])) == []
+
+
+def test_lazily_loaded_names_match_run_evaluation(tmp_path):
+    rows = random_rows(40, seed=20)
+    impact.save_plan(impact.EnhancedMetricEvaluator(config(), dict(rows[0])), str(tmp_path / "plan.bin"))
+    plan = impact.load_plan(str(tmp_path / "plan.bin"), config())
+    table = plan.run_table(rows)
+    for i, row in enumerate(rows):
+        expected = reference(config(), row)
+        assert_same_results(plan.run(row), expected)
+        assert_same_results(dict(table[i]), expected)
+
+
+def test_original_evaluator_matches_run_evaluation():
+    # The original evaluator only knows these types
+    metrics = {m_id: metric for m_id, metric in config().items()
+               if metric["type"] in ("threshold", "map_rating", "map_score", "max", "custom")}
+    order = impact.get_eval_order(metrics)
+    for row in random_rows(40, seed=21):
+        assert_same_results(impact.MetricEvaluator(metrics, dict(row)).run_evaluation(order),
+                            reference(metrics, row))
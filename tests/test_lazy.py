@@ -0,0 +1,64 @@
+"""Demand-driven evaluation against eager run_evaluation"""
+import random
+
+import pytest
+
+from impact import EnhancedMetricEvaluator
+from support import assert_same_results, config, random_rows, reference
+
+BROKEN = {"type": "custom", "dependencies": ["X"], "expression": "lambda X: X / 0"}
+
+
+def test_lazy_matches_eager():
+    rng = random.Random(22)
+    metrics = config()
+    for row in random_rows(200, seed=8):
+        targets = rng.choice([None, rng.sample(sorted(metrics), rng.randint(1, 4))])
+        full = reference(metrics, row)
+        expected = full if targets is None else {m_id: full[m_id] for m_id in full if m_id in targets}
+        evaluator = EnhancedMetricEvaluator(config(), dict(row), lazy=True)
+        assert_same_results(evaluator.run_evaluation(targets=targets), expected)
+
+
+@pytest.mark.parametrize("metric", [
+    {"type": "fallback", "dependencies": ["Fine", "Broken"]},
+    {"type": "coalesce", "dependencies": ["Fine", "Broken"]},
+    {"type": "priority_select", "dependencies": ["Fine", "Broken"]},
+    {"type": "if_then_else", "dependencies": ["X", "Fine", "Broken"],
+     "expression": {"condition": "X > 0", "if_true": "Fine", "if_false": "Broken"}},
+    {"type": "conditional_rating", "dependencies": ["X", "Fine", "Broken"],
+     "expression": {"rules": [{"condition": "X > 0", "return": "Fine"},
+                              {"condition": "X <= 0", "return": "Broken"}]}},
+    {"type": "rating_worst", "dependencies": ["Critical", "Broken"]},
+])
+def test_unselected_branches_are_not_evaluated(metric):
+    metrics = {
+        "Fine": {"type": "threshold", "dependencies": ["X"], "expression": [10, 20, 30]},
+        "Critical": {"type": "threshold", "dependencies": ["X"], "expression": [0, 0, 0]},
+        "Broken": BROKEN,
+        "Top": metric,
+    }
+    repaired = {**metrics, "Broken": {"type": "threshold", "dependencies": ["X"], "expression": [1, 2, 3]}}
+    evaluator = EnhancedMetricEvaluator(metrics, {"X": 5}, lazy=True)
+    assert evaluator.run_evaluation(targets=["Top"]) == {"Top": reference(repaired, {"X": 5})["Top"]}
+    assert "Broken" not in evaluator.results
+    with pytest.raises(ValueError):
+        EnhancedMetricEvaluator(metrics, {"X": 5}).run_evaluation(targets=["Top"])
+
+
+def test_stale_results_are_cleared():
+    metrics = config()
+    metrics["Status_Based_Rating"]["dependencies"] = ["Status", "G1_Score", "G2_Score"]
+    metrics["Status_Based_Rating"]["expression"].update(if_true="G1_Score", if_false="G2_Score")
+    row = random_rows(1)[0] | {"Status": "Active"}
+    evaluator = EnhancedMetricEvaluator(metrics, dict(row))
+    evaluator.run_evaluation()
+    assert "G2_Score" in evaluator.results
+
+    evaluator.input_values["Status"] = "Idle"
+    evaluator.input_values["G1"] = row["G1"] + 40
+    values = evaluator.run_evaluation(targets=["Status_Based_Rating"], lazy=True)
+    assert values == {"Status_Based_Rating": evaluator.results["G2_Score"].value}
+    assert "G1_Score" not in evaluator.results
+    assert "G1_Rating" not in evaluator.results
+    assert "Final_Score" in evaluator.results
@@ -0,0 +1,58 @@
+"""Per-metric memoization in compiled plans"""
+import pytest
+
+from impact import DEFAULT_MEMO_TYPES, EnhancedMetricEvaluator, MemoCache
+from support import assert_same_results, config, random_rows
+
+
+@pytest.fixture
+def evaluator():
+    return EnhancedMetricEvaluator(config(), random_rows(1)[0])
+
+
+def test_memoized_plan_matches_plain_plan(evaluator):
+    plain = evaluator.compile()
+    memoized = evaluator.compile(memoize=True, memo_size=64)
+    rows = random_rows(300, seed=2)
+    for row in rows + rows:
+        assert_same_results(memoized.run(row), plain.run(row))
+    stats = memoized.memo_stats()
+    assert stats["hits"] > 0
+    assert set(stats["metrics"]) == {m_id for m_id, metric in evaluator.metrics.items()
+                                     if metric["type"] in DEFAULT_MEMO_TYPES}
+    assert all(s["size"] <= 64 for s in stats["metrics"].values())
+
+
+def test_memoize_by_type_and_id(evaluator):
+    plan = evaluator.compile(memoize=["threshold", "Custom_Sum"])
+    assert set(plan.memos) == {"G1_Rating", "G2_Rating", "G3_Rating", "Custom_Sum"}
+    assert evaluator.compile().memo_stats() == {}
+
+
+def test_metric_setting_wins():
+    metrics = config()
+    metrics["G1_Score"]["memoize"] = False
+    metrics["Pct"]["memoize"] = True
+    plan = EnhancedMetricEvaluator(metrics, random_rows(1)[0]).compile(memoize=True)
+    assert "G1_Score" not in plan.memos
+    assert "Pct" in plan.memos
+
+
+def test_keys_keep_types_and_zero_signs():
+    metrics = {"Text": {"type": "custom", "dependencies": ["X"], "expression": "lambda X: str(X)"},
+               "Pair": {"type": "custom", "dependencies": ["X", "Y"], "expression": "lambda X, Y: str(X) + str(Y)"}}
+    plan = EnhancedMetricEvaluator(metrics, {"X": 0, "Y": 0}).compile(memoize=True)
+    for x, y in [(1, 0), (1.0, 0), (True, 0), (0.0, -0.0), (-0.0, 0.0), (-0.0, 0.0), (1, 0)]:
+        assert plan.run({"X": x, "Y": y}) == {"Text": str(x), "Pair": str(x) + str(y)}
+    assert plan.memo_stats()["hits"] == 4
+
+
+def test_memo_cache_is_bounded():
+    memo = MemoCache(maxsize=2)
+    square = memo.wrap(lambda values: values[0] ** 2, (0,))
+    for x in [1, 2, 3, 1]:
+        assert square([x]) == x * x
+    assert memo.stats()["evictions"] == 2
+    assert len(memo.entries) == 2
+    with pytest.raises(ValueError):
+        MemoCache(maxsize=0)
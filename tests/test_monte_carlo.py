@@ -0,0 +1,70 @@
+"""Seeded Monte Carlo runs against replayed plain row-wise evaluation"""
+import random
+from collections import Counter
+
+import pytest
+
+from impact import MonteCarloDriver
+from support import reference
+
+METRICS = {
+    "G1_Rating": {"type": "threshold", "dependencies": ["G1"], "expression": [10, 20, 30]},
+    "G2_Rating": {"type": "threshold", "dependencies": ["G2"], "expression": [15, 25, 35]},
+    "Spread": {"type": "custom", "dependencies": ["G1", "G2"], "expression": "lambda G1, G2: abs(G1 - G2)"},
+    "Doubled": {"type": "custom", "dependencies": ["G1"], "expression": "lambda G1: G1 * 2"},
+    "Spread_Rating": {"type": "threshold", "dependencies": ["Spread"], "expression": [5, 10, 20]},
+    "Top": {"type": "max", "dependencies": ["Spread", "Doubled"]},
+}
+DISTRIBUTIONS = {"G1": ("randint", 0, 40), "G2": ("randint", 0, 45)}
+BRANCHES = ("<low", "<moderate", "<high", ">=high")
+RATINGS = ("Low", "Moderate", "High", "Critical")
+
+
+def _replay(seed, iterations, shard_size):
+    """Results of every iteration, drawing inputs as the shards do"""
+    results = []
+    for shard, start in enumerate(range(0, iterations, shard_size)):
+        rng = random.Random(f"{seed}:{shard}")
+        for _ in range(min(shard_size, iterations - start)):
+            inputs = {name: rng.randint(low, high) for name, (_, low, high) in DISTRIBUTIONS.items()}
+            results.append(reference(METRICS, inputs))
+    return results
+
+
+def test_distributions_match_replayed_runs():
+    simulation = MonteCarloDriver(METRICS, DISTRIBUTIONS, seed=7, shard_size=300).run(1000, executor="serial")
+    results = _replay(7, 1000, 300)
+    assert simulation["shards"] == 4
+    assert simulation["last_results"] == results[-1]
+
+    for m_id in METRICS:
+        values = [result[m_id] for result in results]
+        distribution = simulation["distributions"][m_id]
+        if isinstance(values[0], str):
+            assert distribution["counts"] == dict(Counter(values))
+        else:
+            numeric = distribution["numeric"]
+            assert (numeric["count"], numeric["min"], numeric["max"]) == (1000, min(values), max(values))
+            assert numeric["mean"] == pytest.approx(sum(values) / 1000)
+
+    usage = simulation["rule_usage"]
+    for m_id in ("G1_Rating", "G2_Rating", "Spread_Rating"):
+        hits = Counter(result[m_id] for result in results)
+        assert {branch: usage.get(f"{m_id}_{branch}", 0) for branch in BRANCHES} == \
+            {branch: hits[rating] for branch, rating in zip(BRANCHES, RATINGS)}
+    assert simulation["metric_usage"] == dict.fromkeys(METRICS, 1000)
+
+
+def test_results_do_not_depend_on_workers():
+    driver = MonteCarloDriver(METRICS, DISTRIBUTIONS, seed=3, shard_size=250)
+    serial = driver.run(1000, executor="serial")
+    parallel = driver.run(1000, max_workers=2, executor="process")
+    for key in ("distributions", "rule_usage", "metric_usage", "last_results"):
+        assert parallel[key] == serial[key]
+    other = MonteCarloDriver(METRICS, DISTRIBUTIONS, seed=4, shard_size=250).run(1000, executor="serial")
+    assert other["distributions"] != serial["distributions"]
+
+
+def test_unknown_distribution_raises():
+    with pytest.raises(ValueError, match="Unknown distribution"):
+        MonteCarloDriver(METRICS, {"G1": ("poisson", 3), "G2": ("constant", 1)}).run(10, executor="serial")
@@ -0,0 +1,94 @@
+"""Compiled plans against plain row-wise evaluation"""
+import random
+
+import pytest
+
+from impact import EnhancedMetricEvaluator, ExecutionPlan
+from support import INPUT_NAMES, assert_same_results, config, random_inputs, random_rows, reference, same
+
+
+@pytest.fixture
+def evaluator():
+    return EnhancedMetricEvaluator(config(), random_rows(1)[0])
+
+
+def test_run_matches_run_evaluation(evaluator):
+    plan = evaluator.compile()
+    assert isinstance(plan, ExecutionPlan)
+    for row in random_rows(300):
+        assert_same_results(plan.run(row), reference(evaluator.metrics, row))
+
+
+def test_run_values_follow_plan_order(evaluator):
+    plan = evaluator.compile()
+    row = random_rows(1, seed=3)[0]
+    values = plan.run_values(row)
+    assert dict(zip(plan.order, values)) == plan.run(row)
+
+
+def test_run_many_matches_run(evaluator):
+    plan = evaluator.compile()
+    rows = random_rows(20, seed=5)
+    assert list(plan.run_many(rows)) == [plan.run(row) for row in rows]
+
+
+def test_compile_is_cached_per_configuration(evaluator):
+    other = EnhancedMetricEvaluator(config(), random_rows(1, seed=9)[0])
+    assert evaluator.compile() is other.compile()
+
+
+def test_custom_order_is_kept(evaluator):
+    # Category_Weight reads only an input, so it may come first
+    order = ["Category_Weight"] + [m_id for m_id in evaluator.compile().order if m_id != "Category_Weight"]
+    plan = evaluator.compile(order)
+    assert list(plan.order) == order
+    row = random_rows(1, seed=4)[0]
+    assert plan.run(row) == {m_id: evaluator.compile().run(row)[m_id] for m_id in order}
+
+
+def test_missing_input_raises(evaluator):
+    row = random_rows(1)[0]
+    del row["G1"]
+    with pytest.raises(ValueError, match="Dependency 'G1' not found"):
+        evaluator.compile().run(row)
+
+
+def test_propagate_matches_full_run(evaluator):
+    plan = evaluator.compile()
+    rng = random.Random(11)
+    for _ in range(300):
+        row = random_inputs(rng)
+        changed = random_inputs(rng)
+        names = rng.sample(INPUT_NAMES, rng.randint(1, 3))
+        changes = {name: changed[name] for name in names}
+        values, recomputed = plan.propagate(plan.run_values(row), changes)
+        expected = plan.run_values({**row, **changes})
+        assert all(same(a, b) for a, b in zip(values, expected))
+        assert recomputed == sorted(set(recomputed))
+
+
+def test_impact_analysis_matches_two_full_runs():
+    rng = random.Random(13)
+    for _ in range(100):
+        row = random_inputs(rng)
+        changes = {name: value for name, value in random_inputs(rng).items() if rng.random() < 0.3}
+        evaluator = EnhancedMetricEvaluator(config(), dict(row))
+        report = evaluator.impact_analysis(changes)
+
+        before = reference(evaluator.metrics, row)
+        after = reference(evaluator.metrics, {**row, **changes})
+        expected = {m_id: {"old_value": before[m_id], "new_value": after[m_id], "changed": True}
+                    for m_id in evaluator.metrics if before[m_id] != after[m_id]}
+        assert report["affected_metrics"] == expected
+        assert list(report["affected_metrics"]) == list(expected)
+        assert report["summary"]["affected_count"] == len(expected)
+        assert evaluator.input_values == row
+
+
+def test_propagate_passes_on_zero_sign_changes():
+    metrics = {"N": {"type": "custom", "dependencies": ["X"], "expression": "lambda X: X * 1.0"},
+               "T": {"type": "custom", "dependencies": ["N"], "expression": "lambda N: str(N)"}}
+    plan = EnhancedMetricEvaluator(metrics, {"X": 0.0}).compile()
+    values, recomputed = plan.propagate(plan.run_values({"X": 0.0}), {"X": -0.0})
+    assert values[plan.metric_slots["T"]] == "-0.0"
+    assert len(recomputed) == 2
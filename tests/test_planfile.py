@@ -0,0 +1,78 @@
+"""Plan files written by save_plan and read back by load_plan"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from impact import EnhancedMetricEvaluator, ExpressionCache, load_or_compile_plan, load_plan, save_plan
+from support import assert_same_results, config, random_rows
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def evaluator():
+    return EnhancedMetricEvaluator(config(), random_rows(1)[0])
+
+
+def test_round_trip_matches_compiled_plan(evaluator, tmp_path):
+    path = str(tmp_path / "metrics.plan")
+    compiled = save_plan(evaluator, path)
+    loaded = load_plan(path, config(), expression_cache=ExpressionCache())
+    assert loaded.order == compiled.order
+    for row in random_rows(200, seed=3):
+        assert_same_results(loaded.run(row), compiled.run(row))
+
+
+def test_round_trip_in_a_fresh_interpreter(evaluator, tmp_path):
+    path = str(tmp_path / "metrics.plan")
+    plan = evaluator.save_plan(path)
+    rows = random_rows(50, seed=4)
+    script = ("import sys; from impact import load_plan; from support import random_rows; "
+              "plan = load_plan(sys.argv[1]); print(repr([plan.run(row) for row in random_rows(50, seed=4)]))")
+    output = subprocess.run([sys.executable, "-c", script, path], cwd=ROOT, capture_output=True, text=True,
+                            env={**os.environ, "PYTHONPATH": os.pathsep.join([ROOT, os.path.join(ROOT, "tests")])},
+                            check=True).stdout
+    assert output.strip() == repr([plan.run(row) for row in rows])
+
+
+def test_settings_survive_the_round_trip(evaluator, tmp_path):
+    path = str(tmp_path / "metrics.plan")
+    save_plan(evaluator, path, memoize=["threshold"], memo_size=8, targets=["Final_Rating"])
+    loaded = load_plan(path)
+    assert set(loaded.memos) == {"G1_Rating", "G2_Rating", "G3_Rating"}
+    assert {name for name, _ in loaded.input_spec} == {"G1", "G2", "G3"}
+    assert loaded.order[-1] == "Final_Rating"
+
+
+def test_other_configuration_is_rejected(evaluator, tmp_path):
+    path = str(tmp_path / "metrics.plan")
+    save_plan(evaluator, path)
+    metrics = config()
+    metrics["G1_Rating"]["expression"] = [11, 20, 30]
+    with pytest.raises(ValueError, match="different configuration"):
+        load_plan(path, metrics)
+
+
+@pytest.mark.parametrize("damage, message", [
+    (lambda data: data[:20], "truncated"),
+    (lambda data: b"NOTAPLAN" + data[8:], "not a plan file"),
+    (lambda data: data[:-40], "corrupt"),
+])
+def test_damaged_files_are_rejected(evaluator, tmp_path, damage, message):
+    path = tmp_path / "metrics.plan"
+    save_plan(evaluator, str(path))
+    path.write_bytes(damage(path.read_bytes()))
+    with pytest.raises(ValueError, match=message):
+        load_plan(str(path))
+
+
+def test_load_or_compile_rewrites_stale_files(evaluator, tmp_path):
+    path = str(tmp_path / "metrics.plan")
+    save_plan(evaluator, path)
+    metrics = config()
+    metrics["G1_Rating"]["expression"] = [11, 20, 30]
+    plan = load_or_compile_plan(path, metrics)
+    assert plan.run(random_rows(1)[0] | {"G1": 10})["G1_Rating"] == "Low"
+    assert load_plan(path, metrics).run(random_rows(1)[0] | {"G1": 10})["G1_Rating"] == "Low"
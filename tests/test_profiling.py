@@ -0,0 +1,74 @@
+"""Timing and profiling hooks leave results unchanged and see every metric"""
+import pytest
+
+from impact import EnhancedMetricEvaluator, LatencyStats, MetricProfiler
+from support import assert_same_results, config, random_rows, reference
+
+
+def test_profiled_runs_match_run_evaluation():
+    rows = random_rows(30, seed=13)
+    profiler = MetricProfiler()
+    plan = EnhancedMetricEvaluator(config(), dict(rows[0])).compile()
+    for row in rows:
+        expected = reference(config(), row)
+        assert_same_results(plan.run(row, profiler), expected)
+        evaluator = EnhancedMetricEvaluator(config(), dict(row), profiler=profiler)
+        assert_same_results(evaluator.run_evaluation(), expected)
+
+    report = profiler.report()
+    assert set(report["metrics"]) == set(plan.order)
+    assert all(summary["calls"] == 60 and summary["errors"] == 0 for summary in report["metrics"].values())
+    assert report["types"]["threshold"]["calls"] == 3 * 60
+
+
+def test_timing_is_opt_in():
+    row = random_rows(1)[0]
+    plain = EnhancedMetricEvaluator(config(), dict(row))
+    plain.run_evaluation()
+    assert not plain.results.times_ms
+    timed = EnhancedMetricEvaluator(config(), dict(row), timing=True)
+    assert_same_results(timed.run_evaluation(), reference(timed.metrics, row))
+    assert set(timed.results.times_ms) == set(timed.metrics)
+
+
+def test_hooks_run_around_every_metric_in_order():
+    calls = []
+    profiler = MetricProfiler()
+    profiler.add_hook(before=lambda m_id, kind: calls.append(("before", m_id)),
+                      after=lambda m_id, kind, elapsed, error: calls.append(("after", m_id)))
+    profiler.add_hook(after=lambda m_id, kind, elapsed, error: calls.append(("threshold", m_id)),
+                      metric_type="threshold")
+    profiler.add_hook(before=lambda m_id, kind: calls.append(("pct", m_id)), metric="Pct")
+    plan = EnhancedMetricEvaluator(config(), random_rows(1)[0]).compile()
+    plan.run(random_rows(1)[0], profiler)
+
+    expected = []
+    for m_id in plan.order:
+        expected.append(("before", m_id))
+        if m_id == "Pct":
+            expected.append(("pct", m_id))
+        expected.append(("after", m_id))
+        if plan.types[plan.metric_slots[m_id]] == "threshold":
+            expected.append(("threshold", m_id))
+    assert calls == expected
+    with pytest.raises(ValueError):
+        profiler.add_hook(metric="Pct", metric_type="threshold")
+
+
+def test_errors_are_counted():
+    metrics = {"Bad": {"type": "custom", "dependencies": ["X"], "expression": "lambda X: 1 / X"}}
+    profiler = MetricProfiler()
+    evaluator = EnhancedMetricEvaluator(metrics, {"X": 0}, profiler=profiler)
+    with pytest.raises(ValueError):
+        evaluator.run_evaluation()
+    assert profiler.report()["metrics"]["Bad"]["errors"] == 1
+
+
+def test_latency_percentiles():
+    stats = LatencyStats()
+    for elapsed in [100] * 98 + [5000, 70000]:
+        stats.record(elapsed)
+    assert stats.percentile_ns(50) == 128
+    assert stats.percentile_ns(99) == 8192
+    assert stats.percentile_ns(100) == 70000
+    assert stats.summary()["calls"] == 100
@@ -0,0 +1,136 @@
+"""Per-entity evaluation with inputs fetched from async providers"""
+import asyncio
+import contextlib
+import sqlite3
+
+import pytest
+
+from impact import AsyncEntityPipeline, EnhancedMetricEvaluator, InputProvider, SQLiteInputProvider
+from support import INPUT_NAMES, assert_same_results, config, random_rows
+
+
+class DictProvider(InputProvider):
+    """Serves rows from a dict, recording every fetch and the fetches in flight"""
+
+    def __init__(self, rows, inputs, batch_size=500, max_concurrency=4, delay=0.0):
+        self.rows = rows
+        self.inputs = frozenset(inputs)
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.delay = delay
+        self.fetches = []
+        self.in_flight = 0
+        self.most_in_flight = 0
+
+    async def fetch(self, entity_ids, names):
+        self.fetches.append((list(entity_ids), list(names)))
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return {entity: {name: self.rows[entity][name] for name in names}
+                for entity in entity_ids if entity in self.rows}
+
+
+@pytest.fixture
+def rows():
+    return dict(enumerate(random_rows(120, seed=25)))
+
+
+def test_sqlite_results_match_plan(rows, tmp_path):
+    path = str(tmp_path / "entities.db")
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        # Untyped columns keep every value's own type
+        connection.execute(f"CREATE TABLE g_values (entity_id INTEGER PRIMARY KEY, {', '.join(INPUT_NAMES)})")
+        connection.executemany(f"INSERT INTO g_values VALUES ({', '.join('?' * (len(INPUT_NAMES) + 1))})",
+                               [(entity, *(row[name] for name in INPUT_NAMES)) for entity, row in rows.items()])
+        connection.commit()
+
+    async def evaluate():
+        async with SQLiteInputProvider(path, "g_values", pool_size=2, batch_size=25) as provider:
+            evaluator = EnhancedMetricEvaluator(config(), {}, providers=[provider])
+            return evaluator, await evaluator.evaluate_entities(list(rows))
+
+    evaluator, results = asyncio.run(evaluate())
+    plan = evaluator.compile()
+    assert list(results) == list(rows)
+    for entity, row in rows.items():
+        assert_same_results(results[entity], plan.run(row))
+
+
+def test_only_needed_inputs_are_routed(rows):
+    targets = ["Final_Rating", "Numeric_Worst"]
+    first = DictProvider(rows, ["G1", "G2"])
+    second = DictProvider(rows, ["G1", "G3", "Category"], batch_size=50)
+    evaluator = EnhancedMetricEvaluator(config(), {"Level": 1}, providers=[first, second], targets=targets)
+    pipeline = AsyncEntityPipeline(evaluator, [first, second])
+    assert [(provider, names) for provider, names in pipeline.requests] == [(first, ["G1", "G2"]), (second, ["G3"])]
+
+    results = asyncio.run(pipeline.evaluate(list(rows)))
+    assert len(first.fetches) == 1 and len(second.fetches) == 3
+    for entity, row in rows.items():
+        assert results[entity] == evaluator.compile().run({**row, "Level": 1})
+
+
+def test_missing_provider_raises(rows):
+    provider = DictProvider(rows, ["G1"])
+    evaluator = EnhancedMetricEvaluator(config(), {}, providers=[provider], targets=["G1_Score"])
+    with pytest.raises(ValueError, match="Input 'G2' has no provider"):
+        AsyncEntityPipeline(evaluator, [provider], targets=["Score_Sum"])
+
+
+def test_provider_errors_propagate(rows):
+    class Failing(DictProvider):
+        async def fetch(self, entity_ids, names):
+            raise ConnectionError("source is down")
+
+    provider = Failing(rows, ["G1"])
+    evaluator = EnhancedMetricEvaluator(config(), {}, providers=[provider], targets=["G1_Score"])
+    with pytest.raises(ConnectionError, match="source is down"):
+        asyncio.run(evaluator.evaluate_entities(list(rows)))
+
+
+def test_concurrency_is_bounded(rows):
+    first = DictProvider(rows, ["G1"], batch_size=5, max_concurrency=2, delay=0.005)
+    second = DictProvider(rows, ["G2"], batch_size=5, max_concurrency=10, delay=0.005)
+    evaluator = EnhancedMetricEvaluator(config(), {}, providers=[first, second], targets=["Score_Sum"])
+    asyncio.run(evaluator.evaluate_entities(list(rows), max_concurrency=5))
+    assert first.most_in_flight == 2
+    assert second.most_in_flight <= 5
+    assert first.most_in_flight + second.most_in_flight >= 5
+
+
+def test_unknown_entity_raises(rows):
+    provider = DictProvider(rows, ["G1"])
+    evaluator = EnhancedMetricEvaluator(config(), {}, providers=[provider], targets=["G1_Score"])
+    with pytest.raises(ValueError, match="Entity 'nobody'"):
+        asyncio.run(evaluator.evaluate_entities([0, "nobody"]))
+
+
+def test_closing_the_stream_cancels_fetches(rows):
+    rows = {entity: rows[entity] for entity in range(20)}
+    provider = DictProvider(rows, ["G1"], batch_size=1, max_concurrency=100)
+    cancelled = []
+
+    async def fetch(entity_ids, names):
+        # Only entity 0 ever arrives
+        try:
+            await asyncio.sleep(0 if entity_ids == [0] else 60)
+        except asyncio.CancelledError:
+            cancelled.append(entity_ids[0])
+            raise
+        return {entity: {"G1": rows[entity]["G1"]} for entity in entity_ids}
+
+    provider.fetch = fetch
+    evaluator = EnhancedMetricEvaluator(config(), {}, providers=[provider], targets=["G1_Score"])
+
+    async def first_result():
+        pipeline = AsyncEntityPipeline(evaluator, [provider], max_concurrency=100)
+        async with contextlib.aclosing(pipeline.stream(list(rows))) as stream:
+            async for entity, _ in stream:
+                return entity
+
+    assert asyncio.run(asyncio.wait_for(first_result(), 10)) == 0
+    assert sorted(cancelled) == list(rows)[1:]
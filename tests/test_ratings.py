@@ -0,0 +1,75 @@
+"""Rating scales: ordering and N/A handling of the worst/best metric types"""
+import random
+
+import pytest
+
+from impact import NA_VALUES, STANDARD_RATING_SCALE, EnhancedMetricEvaluator, rating_scale
+from support import assert_same_results, same, reference
+
+ORDER = ["Low", "Moderate", "High", "Critical"]
+
+
+def _model(values, order, exclude_na, worst):
+    """worst_of/best_of as first written: list.index over the candidates"""
+    candidates = [v for v in values if not (exclude_na and v in NA_VALUES)]
+    if not candidates:
+        return "N/A"
+    ranked = [v for v in candidates if v in order]
+    if not ranked:
+        return candidates[0]
+    key = lambda v: order.index(v)
+    return max(ranked, key=key) if worst else min(ranked, key=key)
+
+
+def test_worst_and_best_follow_the_order():
+    scale = STANDARD_RATING_SCALE
+    assert scale.worst(["Low", "High", "Moderate"]) == "High"
+    assert scale.best(["High", "Critical", "Moderate"]) == "Moderate"
+    assert rating_scale(["C", "B", "A"]).worst(["A", "C", "B"]) == "A"
+    # Duplicated labels rank by their first position, like list.index
+    assert rating_scale(["a", "b", "a"]).worst(["a", "b"]) == "b"
+
+
+def test_na_values():
+    scale = STANDARD_RATING_SCALE
+    assert scale.worst(["N/A", None, "", "Low"]) == "Low"
+    assert scale.worst(["N/A", None, ""]) == "N/A"
+    assert scale.worst([]) == "N/A"
+    assert scale.best([None, "Unknown"], exclude_na=False) is None
+    assert scale.best(["Unknown", "Other"]) == "Unknown"
+
+
+def test_numeric_scales_return_the_dependency_value():
+    scale = rating_scale([1, 2, 3])
+    assert same(scale.worst([1, 3.0, 2]), 3.0)
+    assert same(scale.best([2, True, 3]), True)
+
+
+def test_random_values_match_list_index():
+    rng = random.Random(11)
+    pool = ORDER + ["N/A", None, "", "Unknown", 1, 2.0]
+    for _ in range(2000):
+        order = rng.sample(ORDER + [1, 2], rng.randint(1, 6))
+        values = [rng.choice(pool) for _ in range(rng.randint(0, 5))]
+        exclude_na, worst = rng.random() < 0.5, rng.random() < 0.5
+        scale = rating_scale(order)
+        picked = (scale.worst if worst else scale.best)(values, exclude_na)
+        assert same(picked, _model(values, order, exclude_na, worst)), (order, values, exclude_na, worst)
+
+
+@pytest.mark.parametrize("kind", ["worst_of", "best_of", "rating_worst", "rating_best"])
+def test_metric_types_match_the_model(kind):
+    rng = random.Random(kind)
+    pool = ORDER + ["N/A", None, "", "Unknown"]
+    metric = {"type": kind, "dependencies": ["A", "B", "C"]}
+    if kind in ("worst_of", "best_of"):
+        metric["expression"] = {"rating_order": ORDER, "exclude_na": rng.random() < 0.5}
+    metrics = {"R": metric}
+    plan = EnhancedMetricEvaluator(metrics, {"A": "Low", "B": "Low", "C": "Low"}).compile()
+    for _ in range(300):
+        row = {name: rng.choice(pool) for name in "ABC"}
+        expected = reference(metrics, row)
+        assert_same_results(plan.run(row), expected)
+        exclude_na = metric.get("expression", {}).get("exclude_na", True)
+        worst = kind in ("worst_of", "rating_worst")
+        assert same(expected["R"], _model(list(row.values()), ORDER, exclude_na, worst))
@@ -0,0 +1,107 @@
+"""Rule-branch counters against the legacy per-evaluation string keys"""
+import random
+from collections import Counter
+
+from impact import BranchCounters, RuleUsageMetricEvaluator
+from impact.rule_usage import _usage_per_metric
+from support import assert_same_results, reference
+
+METRICS = {
+    "G1_Rating": {"type": "threshold", "dependencies": ["G1"], "expression": [10, 20, 30]},
+    "G2_Rating": {"type": "threshold", "dependencies": ["G2"], "expression": [15, 25, 35]},
+    "Spread": {"type": "custom", "dependencies": ["G1", "G2"], "expression": "lambda G1, G2: abs(G1 - G2)"},
+    "Doubled": {"type": "custom", "dependencies": ["G1"], "expression": "lambda G1: G1 * 2"},
+    "Spread_Rating": {"type": "threshold", "dependencies": ["Spread"], "expression": [5, 10, 20]},
+    "Top": {"type": "max", "dependencies": ["Spread", "Doubled"]},
+    "G1_Score": {"type": "map_value", "dependencies": ["G1_Rating"],
+                 "expression": {"Low": 1, "Moderate": 2, "High": 3}},
+    "Combined": {"type": "lookup_matrix", "dependencies": ["G1_Rating", "G2_Rating"], "matrix_ref": "risk"},
+}
+# Only part of the grid, so some value pairs fall outside the matrix
+LOOKUP_MATRICES = {"risk": {"Low": {"Low": "Low", "High": "Moderate"}, "High": {"Critical": "Critical"}}}
+# The types the main evaluator shares with the rule-usage one
+SHARED = {m_id: metric for m_id, metric in METRICS.items() if metric["type"] in ("threshold", "max", "custom")}
+BRANCHES = dict(zip(["Low", "Moderate", "High", "Critical"], ["<low", "<moderate", "<high", ">=high"]))
+
+
+def _rows(count, seed):
+    rng = random.Random(seed)
+    return [{"G1": rng.choice([rng.randint(0, 40), 10, 20, 30]), "G2": rng.choice([rng.randint(0, 45), 15, 35])}
+            for _ in range(count)]
+
+
+def _legacy_keys(results):
+    """The keys one evaluation used to add to the rule_usage defaultdict"""
+    keys = []
+    for m_id, metric in METRICS.items():
+        mtype = metric["type"]
+        if mtype == "threshold":
+            keys.append(f"{m_id}_{BRANCHES[results[m_id]]}")
+        elif mtype == "lookup_matrix":
+            val1, val2 = (results[dep] for dep in metric["dependencies"])
+            keys.append(f"{m_id}_{val1}_{val2}_lookup")
+        else:
+            keys.append(f"{m_id}_{mtype}")
+    return keys
+
+
+def _evaluate(rows):
+    """One evaluator per row, as the Monte Carlo shards run them"""
+    for row in rows:
+        evaluator = RuleUsageMetricEvaluator(METRICS, dict(row), LOOKUP_MATRICES)
+        yield row, evaluator.run_evaluation(list(METRICS)), evaluator.branch_counters
+
+
+def test_counts_match_legacy_keys():
+    expected = Counter()
+    total = BranchCounters(METRICS, LOOKUP_MATRICES)
+    for row, results, counters in _evaluate(_rows(300, seed=14)):
+        assert_same_results({m_id: results[m_id] for m_id in SHARED}, reference(SHARED, row))
+        assert counters.rule_usage() == dict(Counter(_legacy_keys(results)))
+        expected.update(_legacy_keys(results))
+        total.merge(counters)
+    assert total.rule_usage() == dict(expected)
+    # Pairs outside the matrix were counted too
+    preassigned = {f"Combined_{val1}_{val2}_lookup" for val1, row in LOOKUP_MATRICES["risk"].items() for val2 in row}
+    assert {key for key in expected if key.startswith("Combined_")} - preassigned
+
+
+def test_repeated_runs_accumulate():
+    rows = _rows(50, seed=15)
+    evaluator = RuleUsageMetricEvaluator(METRICS, {}, LOOKUP_MATRICES)
+    expected = Counter()
+    for row in rows:
+        evaluator.input_values = dict(row)
+        expected.update(_legacy_keys(evaluator.run_evaluation(list(METRICS))))
+    assert evaluator.rule_usage == dict(expected)
+    assert evaluator.branch_counters.per_metric() == dict.fromkeys(METRICS, 50)
+
+
+def test_merge_and_export_round_trip():
+    rows = _rows(120, seed=16)
+    whole = BranchCounters(METRICS, LOOKUP_MATRICES)
+    for _, _, counters in _evaluate(rows):
+        whole.merge(counters)
+
+    shards = [BranchCounters(METRICS, LOOKUP_MATRICES) for _ in range(3)]
+    for i, (_, _, counters) in enumerate(_evaluate(rows)):
+        # Exported triples are what crosses the process boundary
+        shards[i % 3].merge(counters.export())
+    # Counters built without the configuration still merge by label
+    merged = BranchCounters({})
+    for shard in shards:
+        merged.merge(shard)
+    assert merged.rule_usage() == whole.rule_usage()
+    assert sorted(merged.export()) == sorted(whole.export())
+    assert merged.per_metric() == whole.per_metric() == dict.fromkeys(METRICS, 120)
+
+
+def test_per_metric_does_not_mix_up_prefixed_ids():
+    metrics = {"O": {"type": "threshold", "dependencies": ["G1"], "expression": [10, 20, 30]},
+               "O1": {"type": "custom", "dependencies": ["G1"], "expression": "lambda G1: G1"}}
+    evaluator = RuleUsageMetricEvaluator(metrics, {"G1": 25})
+    for _ in range(3):
+        evaluator.run_evaluation(["O", "O1"])
+    assert evaluator.branch_counters.per_metric() == {"O": 3, "O1": 3}
+    assert _usage_per_metric(metrics, evaluator.rule_usage) == {"O": 3, "O1": 3}
+    assert _usage_per_metric(metrics, evaluator.branch_counters) == {"O": 3, "O1": 3}
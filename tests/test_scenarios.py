@@ -0,0 +1,48 @@
+"""Batched what-if scenarios against two plain row-wise runs each"""
+import random
+
+import pytest
+
+from impact import EnhancedMetricEvaluator
+from support import config, random_inputs, random_rows, reference
+
+
+def _scenarios(count, seed):
+    rng = random.Random(seed)
+    return [{name: value for name, value in random_inputs(rng).items() if rng.random() < 0.3}
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread", "process"])
+def test_scenarios_match_two_full_runs(executor):
+    row = random_rows(1, seed=5)[0]
+    scenarios = _scenarios(40, seed=5) + [{}]
+    evaluator = EnhancedMetricEvaluator(config(), dict(row))
+    result = evaluator.impact_analysis_many(scenarios, executor=executor, max_workers=2)
+    assert evaluator.input_values == row
+
+    before = reference(evaluator.metrics, row)
+    affected_anywhere = set()
+    for changes, report in zip(scenarios, result["scenarios"]):
+        after = reference(evaluator.metrics, {**row, **changes})
+        expected = {m_id: {"old_value": before[m_id], "new_value": after[m_id], "changed": True}
+                    for m_id in evaluator.metrics if before[m_id] != after[m_id]}
+        assert report["affected_metrics"] == expected
+        affected_anywhere.update(expected)
+
+    matrix = result["matrix"]
+    assert matrix["metrics"] == [m_id for m_id in evaluator.metrics if m_id in affected_anywhere]
+    assert matrix["baseline"] == {m_id: before[m_id] for m_id in matrix["metrics"]}
+    for i, changes in enumerate(scenarios):
+        after = reference(evaluator.metrics, {**row, **changes})
+        for m_id in matrix["metrics"]:
+            changed = before[m_id] != after[m_id]
+            assert matrix["values"][m_id][i] == (after[m_id] if changed else None)
+            if changed and isinstance(before[m_id], (int, float)) and isinstance(after[m_id], (int, float)):
+                assert matrix["deltas"][m_id][i] == after[m_id] - before[m_id]
+
+
+def test_unknown_executor_raises():
+    evaluator = EnhancedMetricEvaluator(config(), random_rows(1)[0])
+    with pytest.raises(ValueError, match="Unsupported executor"):
+        evaluator.impact_analysis_many([{}], executor="cluster")
@@ -0,0 +1,45 @@
+"""Sensitivity ranges against a brute-force sweep of the input"""
+import pytest
+
+from impact import EnhancedMetricEvaluator
+from support import config, random_rows, same
+
+GRID = [step / 4 for step in range(-20, 201)]
+
+
+def _contains(span, x):
+    above = x > span["low"] or (span["low_inclusive"] and x == span["low"])
+    below = x < span["high"] or (span["high_inclusive"] and x == span["high"])
+    return above and below
+
+
+@pytest.mark.parametrize("input_name, seed", [("G1", 0), ("G1", 1), ("G2", 2), ("G3", 3)])
+def test_ranges_match_a_sweep(input_name, seed):
+    row = random_rows(1, seed=seed)[0]
+    evaluator = EnhancedMetricEvaluator(config(), dict(row))
+    report = evaluator.sensitivity_analysis(input_name, GRID[0], GRID[-1])
+    plan = evaluator.compile()
+    swept = {x: plan.run({**row, input_name: x}) for x in GRID}
+    assert report["metrics"]
+
+    for m_id, analysis in report["metrics"].items():
+        assert same(analysis["baseline"], plan.run(row)[m_id])
+        if analysis["stable"] is not None:
+            assert _contains(analysis["stable"], row[input_name])
+            assert analysis["stable"] in analysis["ranges"]
+        for span in analysis["ranges"]:
+            for x in GRID:
+                if _contains(span, x):
+                    assert same(swept[x][m_id], span["value"]), f"{m_id} at {input_name}={x}: {span}"
+        if all(isinstance(values[m_id], str) for values in swept.values()):
+            # A rating never changes continuously, so the ranges cover the grid
+            uncovered = [x for x in GRID if not any(_contains(span, x) for span in analysis["ranges"])]
+            assert not uncovered, f"{m_id} has no range at {uncovered}"
+
+
+def test_breakpoints_are_exact():
+    evaluator = EnhancedMetricEvaluator(config(), random_rows(1)[0] | {"G1": 15})
+    ranges = evaluator.sensitivity_analysis("G1", targets=["G1_Rating"])["metrics"]["G1_Rating"]["ranges"]
+    inf = float("inf")
+    assert [(span["low"], span["high"], span["low_inclusive"], span["value"]) for span in ranges] == [
+        (-inf, 10, False, "Low"), (10, 20, True, "Moderate"), (20, 30, True, "High"), (30, inf, True, "Critical")]
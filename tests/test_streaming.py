@@ -0,0 +1,99 @@
+"""Chunked streaming of CSV/JSONL files against plain row-wise evaluation"""
+import csv
+import json
+
+import pytest
+
+from impact import EnhancedMetricEvaluator, StreamingPipeline
+from support import INPUT_NAMES, assert_same_results, config, random_rows, reference
+
+
+@pytest.fixture
+def evaluator():
+    return EnhancedMetricEvaluator(config(), random_rows(1)[0])
+
+
+def _csv_rows(count, seed):
+    # CSV has no None; an empty cell reads back as ""
+    return [{"id": f"{i:03d}", **{name: "" if row[name] is None else row[name] for name in INPUT_NAMES}}
+            for i, row in enumerate(random_rows(count, seed=seed))]
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _read_jsonl(path):
+    with open(path) as handle:
+        return [json.loads(line) for line in handle]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_chunks_match_run_evaluation(evaluator, tmp_path, chunk_size):
+    rows = _csv_rows(50, seed=6)
+    _write_csv(tmp_path / "in.csv", rows)
+    chunks = []
+    pipeline = StreamingPipeline(evaluator, chunk_size=chunk_size, on_chunk=chunks.append)
+    stats = pipeline.run(str(tmp_path / "in.csv"), str(tmp_path / "out.jsonl"))
+
+    assert stats["rows"] == stats["next_row"] == 50
+    assert [chunk["rows"] for chunk in chunks] == list(range(chunk_size, 50, chunk_size)) + [50]
+    for i, (row, output) in enumerate(zip(rows, _read_jsonl(tmp_path / "out.jsonl"))):
+        assert output["_row"] == i
+        # IDs are not inputs, so "007" stays text
+        assert output["id"] == row["id"]
+        expected = reference(evaluator.metrics, row)
+        assert_same_results({m_id: output[m_id] for m_id in expected}, json.loads(json.dumps(expected)))
+
+
+def test_jsonl_input_keeps_types(evaluator, tmp_path):
+    rows = random_rows(30, seed=7)
+    with open(tmp_path / "in.jsonl", "w") as handle:
+        handle.writelines(json.dumps(row) + "\n" for row in rows)
+    pipeline = StreamingPipeline(evaluator, chunk_size=8, passthrough=[])
+    outputs = list(pipeline.evaluate(pipeline.read(str(tmp_path / "in.jsonl"))))
+    for i, (row, output) in enumerate(zip(rows, outputs)):
+        assert output.pop("_row") == i
+        assert_same_results(output, reference(evaluator.metrics, row))
+
+
+def test_resume_from_start_row(evaluator, tmp_path):
+    _write_csv(tmp_path / "in.csv", _csv_rows(40, seed=8))
+    whole = StreamingPipeline(evaluator, chunk_size=6)
+    whole.run(str(tmp_path / "in.csv"), str(tmp_path / "whole.csv"))
+
+    stopped = StreamingPipeline(evaluator, chunk_size=6)
+    first = stopped.evaluate(stopped.read(str(tmp_path / "in.csv")))
+    assert stopped.write((row for row, _ in zip(first, range(17))), str(tmp_path / "resumed.csv")) == 17
+    stats = StreamingPipeline(evaluator, chunk_size=6).run(str(tmp_path / "in.csv"), str(tmp_path / "resumed.csv"),
+                                                          start_row=17)
+    assert stats["rows"] == 23 and stats["next_row"] == 40
+    assert (tmp_path / "resumed.csv").read_text() == (tmp_path / "whole.csv").read_text()
+
+
+def test_ragged_rows_are_reported(tmp_path, caplog):
+    metrics = {"S": {"type": "sum", "dependencies": ["G1", "G2"]}}
+    evaluator = EnhancedMetricEvaluator(metrics, {"G1": 0, "G2": 0}, targets=["S"])
+    (tmp_path / "in.csv").write_text("id,G1,G2\n007,1,2\n008,5\n009,3,4,99,100\n010,6,7\n")
+    pipeline = StreamingPipeline(evaluator, passthrough=["id"])
+    rows = list(pipeline.read(str(tmp_path / "in.csv")))
+    assert rows == [{"id": "007", "G1": 1, "G2": 2}, {"id": "008", "G1": 5},
+                    {"id": "009", "G1": 3, "G2": 4}, {"id": "010", "G1": 6, "G2": 7}]
+    assert pipeline.stats["ragged_rows"] == 2
+    assert "row 1 has 0 extra cells and is missing ['G2']" in caplog.text
+    assert "row 2 has 2 extra cells" in caplog.text
+
+    # The short row has no G2, so it cannot be evaluated; the error names the input
+    with pytest.raises(ValueError, match="Dependency 'G2' not found"):
+        pipeline.run(str(tmp_path / "in.csv"), str(tmp_path / "out.jsonl"))
+    outputs = list(pipeline.evaluate(pipeline.read(str(tmp_path / "in.csv"), start_row=2)))
+    assert [(out["id"], out["S"]) for out in outputs] == [("009", 7), ("010", 13)]
+
+
+def test_converters_override_detection(evaluator, tmp_path):
+    (tmp_path / "in.csv").write_text("G1,Category\n007,10\n")
+    pipeline = StreamingPipeline(evaluator, converters={"Category": str, "G1": float})
+    assert list(pipeline.read(str(tmp_path / "in.csv"))) == [{"G1": 7.0, "Category": "10"}]
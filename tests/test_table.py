@@ -0,0 +1,32 @@
+"""Compact result tables against plain row-wise evaluation"""
+import pytest
+
+from impact import EnhancedMetricEvaluator, ResultColumn, ResultTable
+from support import assert_same_results, config, random_rows, reference, same
+
+
+def test_run_table_matches_run_evaluation():
+    rows = random_rows(200, seed=12)
+    evaluator = EnhancedMetricEvaluator(config(), dict(rows[0]))
+    table = evaluator.compile().run_table(rows)
+    assert len(table) == len(rows)
+    for i, row in enumerate(rows):
+        assert_same_results(dict(table[i]), reference(evaluator.metrics, row))
+
+
+@pytest.mark.parametrize("values", [
+    ["x", 0.0, -0.0, 0.0, -0.0, 1, 1.0, True, None],
+    [0.0, -0.0, "x", -0.0, 2 ** 70, 0.0],
+    [1, -0.0, 0.0, 1.0, True],
+])
+def test_values_read_back_with_type_and_sign(values):
+    column = ResultColumn()
+    for value in values:
+        column.append(value)
+    assert all(map(same, column.tolist(), values))
+    assert all(same(column[i], value) for i, value in enumerate(values))
+
+
+def test_from_columns_keeps_zero_signs():
+    table = ResultTable.from_columns({"M": ["Low", -0.0, 0.0]})
+    assert [repr(value) for value in table.column("M")] == ["'Low'", "-0.0", "0.0"]
@@ -0,0 +1,53 @@
+"""Evaluating only the upstream closure of target metrics"""
+import pytest
+
+from impact import EnhancedMetricEvaluator
+from support import assert_same_results, config, random_rows, reference
+
+CLOSURES = {
+    ("Worst_Case_Rating",): ({"G1_Rating", "G2_Rating", "G3_Rating", "Worst_Case_Rating"}, {"G1", "G2", "G3"}),
+    ("Status_Based_Rating", "Pct"): ({"G1_Rating", "G2_Rating", "Status_Based_Rating", "Pct"},
+                                     {"Status", "G1", "G2"}),
+    ("Final_Rating",): ({"G1_Rating", "G2_Rating", "G3_Rating", "G1_Score", "G2_Score", "G3_Score",
+                         "Final_Score", "Final_Rating"}, {"G1", "G2", "G3"}),
+    ("Category_Weight",): ({"Category_Weight"}, {"Category"}),
+}
+
+
+@pytest.mark.parametrize("targets", list(CLOSURES))
+def test_targets_match_full_run(targets):
+    members, inputs = CLOSURES[targets]
+    evaluator = EnhancedMetricEvaluator(config(), random_rows(1)[0])
+    plan = evaluator.compile(targets=targets)
+    assert set(plan.order) == members
+    assert {name for name, _ in plan.input_spec} == inputs
+    for row in random_rows(100, seed=7):
+        full = reference(evaluator.metrics, row)
+        expected = {m_id: full[m_id] for m_id in plan.order}
+        needed = {name: row[name] for name in inputs}
+        assert_same_results(plan.run(needed), expected)
+        assert_same_results(EnhancedMetricEvaluator(config(), dict(row)).run_evaluation(targets=targets), expected)
+
+
+def test_targets_need_only_their_inputs():
+    with pytest.raises(ValueError, match="Configuration validation failed"):
+        EnhancedMetricEvaluator(config(), {"G1": 12})
+    evaluator = EnhancedMetricEvaluator(config(), {"G1": 12}, targets=["G1_Score"])
+    assert evaluator.run_evaluation() == {"G1_Rating": "Moderate", "G1_Score": 2}
+    assert evaluator.compile().run({"G1": 25}) == {"G1_Rating": "High", "G1_Score": 3}
+
+
+def test_cycle_outside_the_closure_is_ignored():
+    metrics = config()
+    metrics["Loop_A"] = {"type": "max", "dependencies": ["Loop_B"]}
+    metrics["Loop_B"] = {"type": "max", "dependencies": ["Loop_A"]}
+    evaluator = EnhancedMetricEvaluator(metrics, {"G3": 31}, targets=["G3_Score"])
+    assert evaluator.run_evaluation() == {"G3_Rating": "Critical", "G3_Score": 4}
+
+
+def test_unknown_target_raises():
+    evaluator = EnhancedMetricEvaluator(config(), random_rows(1)[0])
+    with pytest.raises(ValueError, match="Unknown target metrics"):
+        evaluator.run_evaluation(targets=["Nope"])
+    with pytest.raises(ValueError, match="Unknown target metrics"):
+        evaluator.compile(targets=["Nope"])
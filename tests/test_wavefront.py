@@ -0,0 +1,32 @@
+"""Wavefront scheduling against plain row-wise evaluation"""
+import pytest
+
+from impact import EnhancedMetricEvaluator, WavefrontScheduler
+from support import assert_same_results, config, random_rows, reference
+
+
+@pytest.mark.parametrize("executor, cost_threshold", [
+    ("serial", 10), ("thread", 10), ("thread", 0), ("process", 10), ("process", 0)])
+def test_schedules_match_run_evaluation(executor, cost_threshold):
+    rows = random_rows(15, seed=9)
+    evaluator = EnhancedMetricEvaluator(config(), dict(rows[0]))
+    assert_same_results(evaluator.run_wavefront(executor, max_workers=2, cost_threshold=cost_threshold),
+                        reference(evaluator.metrics, rows[0]))
+    with WavefrontScheduler(evaluator, executor, max_workers=2, cost_threshold=cost_threshold) as scheduler:
+        for row in rows:
+            assert_same_results(scheduler.run(row), reference(evaluator.metrics, row))
+
+
+def test_cost_hints_pick_the_offloaded_metrics():
+    metrics = config()
+    metrics["Pct"]["cost_hint"] = 50
+    metrics["Custom_Sum"]["cost_hint"] = 1
+    scheduler = WavefrontScheduler(EnhancedMetricEvaluator(metrics, random_rows(1)[0]))
+    offloaded = {m_id for m_id, flag in zip(scheduler.plan.order, scheduler.offloaded) if flag}
+    assert offloaded == {"Pct"}
+
+
+def test_errors_propagate():
+    metrics = {"Bad": {"type": "custom", "dependencies": ["X"], "expression": "lambda X: X / 0"}}
+    with pytest.raises(ValueError):
+        EnhancedMetricEvaluator(metrics, {"X": 1}).run_wavefront("thread", max_workers=2)